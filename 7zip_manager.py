@@ -1,6 +1,6 @@
 ﻿# -*- coding: utf-8 -*-
 """
-7-Zip Extra Manager (v1.4.1)
+7-Zip Extra Manager (v2.22.0)
 Author: Oleksii Rovnianskyi System
 
 UA: Менеджер 7-Zip Extra (консольна версія).
@@ -12,6 +12,114 @@ UA: Менеджер 7-Zip Extra (консольна версія).
     - НЕ робить бекап — 7-Zip Extra є CLI-інструментом без даних користувача
 
 Changelog:
+    v2.22.0 (2026-10-17) — --batch=FILE: jobs compress / extract / test з JSON-маніфесту на керованому 7za —
+           best_7za() під архітектуру хоста (arm64/ → x64/ → x86), пул jobs × -mmt ≈ ядра (_batch_plan()),
+           найбільші jobs першими, прогрес через SevenZipProcess, JSON-підсумок з MiB/s по кожному job
+    v2.21.0 (2026-10-17) — SevenZipProcess — неблокуючий раннер 7za: вивід шматками (потік-читач +
+           черга замість readline()/poll(), кадри -bsp1 з backspace), відсотки «на льоту», загальний та idle
+           таймаути (SEVENZIP_TIMEOUT / SEVENZIP_IDLE_TIMEOUT), скасування (cancel_event, SIGTERM демона,
+           Ctrl+C) → SIGINT/CTRL_BREAK → kill, хвіст виводу у помилці; розпакування і _probe_version_exec() — через нього
+    v2.20.0 (2026-10-17) — Цілісність дерева: verify_install() — fast (stat: розмір + mtime_ns) або deep
+           (SHA-256 у VERIFY_WORKERS потоків, mmap); repair_install() — 7za x лише зіпсованих членів з архіву
+           встановленої версії (маніфест пам'ятає source: архів у сховищі + версію), звірка з SHA-256
+           маніфесту перед заміною; --verify[=deep], --repair; health_check()["integrity"];
+           _file_sha256() — через mmap (hashlib відпускає GIL на весь буфер)
+    v2.19.0 (2026-10-17) — --daemon: резидентний режим без TTY — перевірки за розкладом з jitter, адаптивний
+           інтервал (upstream без змін — ×1.5 до DAEMON_INTERVAL_MAX), backoff при помилках, очікування
+           на threading.Event (SIGTERM/SIGINT), файл стану 7zip_daemon_status.json; коди виходу
+           0/1/75 (EXIT_BUSY); check_and_update() повертає "updated"/"up_to_date"/"failed";
+           AutoCloseTimer — на події замість щосекундного опитування; без TTY немає input()/відліку
+    v2.18.0 (2026-10-17) — Планувальник фаз PhasePlan: path_check, log_cleanup і
+           update у main() та version_probe + release_check у check_and_update()
+           виконуються паралельно (залежності — after=...). Консольний вивід
+           впорядковано (_OrderedConsole), стек span-ів — свій у кожного потоку.
+    v2.17.0 (2026-10-17) — Single-flight запуск (RunLock): блокування ОС на
+           LOG_DIR/7zip_manager.lock + стан у 7zip_manager.state.json (PID, дія, фаза,
+           результат). Другий запуск чекає і бере результат першого; --no-wait —
+           лише статус; перерваний попередній запуск виявляється і логується.
+    v2.16.0 (2026-10-17) — Fleet-режим --fleet / update_fleet(roots):
+           версії всіх дерев паралельно, одна перевірка релізу, одне завантаження
+           і розпакування, встановлення у застарілі корені — пул FLEET_WORKERS;
+           статус на кожен корінь, помилка одного не зупиняє решту.
+    v2.15.0 (2026-10-17) — LAN-дзеркало --serve (MirrorServer):
+           download.html-сумісний індекс і архіви зі сховища з Range/ETag/If-Range;
+           upstream — одне завантаження на версію, паралельні запити того самого
+           файлу чекають на нього. ArchiveStore — потокобезпечний (RLock).
+    v2.14.0 (2026-10-17) — Кілька джерел релізу (RELEASE_SOURCES):
+           official, дзеркала download.html, JSON-фіди (HTTP або файл) опитуються
+           паралельно; перша узгоджена відповідь перемагає, решта скасовується.
+           EWMA латентності й circuit breaker на джерело (стан у кеші релізу),
+           повільні джерела стартують із затримкою.
+    v2.13.0 (2026-10-17) — Єдиний HTTP-транспорт request():
+           спільна Session (keep-alive), таймаути (connect, read), повтори при
+           з'єднанні/таймауті/429/5xx з Retry-After або jitter-backoff. Сторінка
+           релізу, HEAD, діапазони й завантаження — тільки через нього; download.html
+           дочитується, щоб архів качався тим самим з'єднанням.
+    v2.12.0 (2026-10-17) — Офлайн e2e-бенчмарк bench/bench_e2e.py: standin_server.release_site() (download.html +
+           синтетичний 7zNNNN-extra.7z, ін'єкція 304 і обривів), bench/fake_7za.py; час фаз,
+           MiB/s, peak RSS; JSON-звіт з історією запусків (--output).
+    v2.11.0 (2026-10-17) — Span-інструментування фаз main()/check_and_update() (час, байти, повтори):
+           JSON-звіт запуску 7zip_run_report.json, Prometheus textfile 7zip_manager.prom,
+           час фаз у консолі; --profile — cProfile у LOG_DIR/7zip_profile.{prof,txt}.
+    v2.10.0 (2026-10-17) — ProgressReporter — спільний прогрес завантаження і розпакування: рендер
+           не частіше PROGRESS_REFRESH (0.1 с) замість кожного chunk-а, швидкість і ETA,
+           PROGRESS=auto (без TTY — періодичні рядки в лог), manager.progress_listeners.
+    v2.9.0 (2026-10-17) — Неблокуюче логування: QueueHandler/QueueListener з пакетним flush файлу,
+           опційний JSON-lines синк подій (event/phase/duration/bytes), злив черги при виході
+           (atexit і AutoCloseTimer.on_exit перед os._exit); LOG_FILE/LOG_CONSOLE/LOG_JSONL;
+           bench/bench_logging.py.
+    v2.8.0 (2026-10-17) — cleanup_old_logs(): один прохід os.scandir замість двох glob (part-файли
+           більше не обробляються двічі), дата з імені без strptime; part-файли стискаються
+           у .gz фоновим потоком під час оновлення; утримання за віком (LOG_KEEP_DAYS)
+           і сумарним розміром (LOG_MAX_MB).
+    v2.7.0 (2026-10-17) — Кеш встановленої версії: get_installed_version() — лише stat, поки шлях/розмір/
+           mtime/inode 7za.exe збігаються з LOG_DIR/7zip_version_cache.json; VERSION_PROBE=resource
+           читає VS_VERSION_INFO без запуску процесу; кеш скидається після встановлення/відкату.
+    v2.6.0 (2026-10-17) — Профіль встановлення INSTALL_PROFILE / --components= (x86, x64, arm64, Far):
+           невибрані компоненти відсікаються фільтрами 7za -x! під час розпакування;
+           health_check() перевіряє лише вибрані компоненти; sevenzip_exe — 7za.exe профілю.
+    v2.5.0 (2026-10-17) — Атомарне staged-встановлення: розпакування у apps/.7zip.staging-<pid>
+           (той самий том), INSTALL_MODE=staged / --staged — заміна дерева перейменуванням
+           з apps/.7zip.previous; --rollback; автоприбирання staging та старого .previous.
+    v2.4.0 (2026-10-17) — Delta-встановлення: _copy_extracted_files() більше не робить rmtree+copytree —
+           порівнює розпаковане дерево з маніфестом apps/7zip/.7zip_manifest.json
+           (розмір, mtime, SHA-256), копіює лише додані/змінені файли, видаляє файли
+           попереднього архіву, яких немає в новому; звіт: записано/пропущено (байти)/видалено.
+    v2.3.0 (2026-10-17) — Сховище архівів (content-addressed):
+           fetch_archive() бере Extra архів з downloads/7zip_store/<sha256>.7z
+           (індекс за версією та URL) або завантажує його; SHA-256 рахується під час
+           запису chunk-ів (_RangeHasher), без окремого проходу. ArchiveStore — LRU
+           витіснення за STORE_MAX_MB / STORE_MAX_ITEMS; архів більше не видаляється
+           після встановлення. --reinstall — встановлення зі сховища навіть без нової версії.
+    v2.2.0 (2026-10-17) — Докачка завантажень (.part + .part.json):
+           _download_with_progress() пише у <архів>.part, стан (URL, ETag, Last-Modified,
+           розмір, прогрес кожного сегмента) — у <архів>.part.json; DOWNLOAD_RETRIES спроб
+           з backoff, кожна докачує з offset-у (Range + If-Range). Стан переживає
+           перезапуск; змінений віддалений об'єкт → завантаження з нуля.
+    v2.1.0 (2026-10-17) — Сегментоване завантаження (HTTP Range):
+           _download_with_progress() перевіряє Accept-Ranges (HEAD), ділить архів на
+           DOWNLOAD_SEGMENTS діапазонів і качає їх паралельно (ThreadPoolExecutor +
+           http_session() з пулом з'єднань) у попередньо виділений файл за offset-ами.
+           Сервер без Range / відповідь 200 на Range → fallback на один потік.
+           bench/standin_server.py + bench/bench_download.py — локальна перевірка.
+    v2.0.0 (2026-10-17) — Імпорт без побічних ефектів + бібліотечний API:
+           уся логіка перенесена у клас SevenZipManager (конфігурація: аргументи →
+           .env → auto-detect, резолвиться при створенні екземпляра, не при імпорті).
+           ensure_dependencies(), os.system(""), ротація/налаштування логів і
+           AutoCloseTimer — лише в main(); requests/bs4/packaging імпортуються ліниво,
+           _can_import() перевіряє через find_spec без імпорту.
+           SEVENZIP_DOWNLOAD_PAGE / SEVENZIP_BASE_URL читаються з .env.
+           bench/bench_import.py — бюджет часу імпорту (python -X importtime).
+    v1.6.0 (2026-10-17) — Потоковий сканер download.html з ранньою зупинкою:
+           _scan_release_stream() читає відповідь через iter_content (HTMLParser,
+           без повного DOM) і зупиняється, щойно знайдено версію та Extra посилання.
+           BeautifulSoup-парсер лишився еталоном (_parse_release_page) для
+           bench/bench_release_page.py (латентність + пікова пам'ять).
+    v1.5.0 (2026-10-17) — Кеш метаданих релізу (conditional GET):
+           get_latest_info() зберігає ETag/Last-Modified, версію та Extra URL
+           у LOG_DIR/7zip_release_cache.json; у межах RELEASE_CACHE_TTL — без запиту,
+           далі If-None-Match/If-Modified-Since і 304 → відповідь з кешу.
+           Лічильники hits/misses; прапорець --refresh ігнорує кеш.
     v1.4.1 (2026-02-26) — Виправлено застарілий хардкод: tags/7zip.bat → tags/7zip.lnk (Windows ярлик). — Приведено до стандарту manager_standard v3.0:
         - Додано health_check() — перевірка критичних компонентів
         - Додано error_reporting() — структурована обробка помилок
@@ -44,37 +152,169 @@ Changelog:
 """
 import os
 import sys
+import codecs
 import hashlib
+import json
 import subprocess
 import time
 import datetime
 import logging
-import glob
 import re
 import tempfile
 import shutil
-import signal
+import struct
 import threading
-from typing import Optional
+import importlib.util
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Iterable, Optional
 
-__version__ = "1.4.1"
+if TYPE_CHECKING:
+    import requests  # type: ignore
+
+__version__ = "2.22.0"
 APP_NAME = "7zip"
 
 # ---------------------------------------------------------------------------
 # AUTO-DETECT CAPSULE ROOT — хардкод абсолютних шляхів ЗАБОРОНЕНО
 # UA: SCRIPT_DIR → два рівні вгору → корінь капсули
 #     Структура: CAPSULE_ROOT/devops/7zipupdate/7zip_manager.py
+#     Імпорт модуля НЕ має побічних ефектів: конфігурація, логування, залежності
+#     та консоль налаштовуються явно (SevenZipManager / main()).
 # ---------------------------------------------------------------------------
 SCRIPT_DIR   = os.path.dirname(os.path.abspath(__file__))
 CAPSULE_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
 
+# UA: Офіційна сторінка завантажень 7-Zip (перевизначається через .env)
+SEVENZIP_DOWNLOAD_PAGE = "https://www.7-zip.org/download.html"
+SEVENZIP_BASE_URL      = "https://www.7-zip.org/"
+
+RELEASE_CACHE_TTL  = 3600  # UA: секунд, скільки відповідь кешу свіжа без запиту
+RELEASE_SCAN_CHUNK = 8192  # UA: розмір chunk-а потокового сканера download.html
+
+# UA: Джерела релізу (RELEASE_SOURCES, через кому): "official" — SEVENZIP_DOWNLOAD_PAGE;
+#     URL або шлях на .json — фід {"version": "26.00", "extra_url": "..."}; інший URL —
+#     дзеркало download.html. Кілька джерел опитуються паралельно: перша валідна відповідь
+#     перемагає, решта скасовується. Повільні джерела (EWMA латентності) стартують із
+#     затримкою, після RELEASE_BREAKER_FAILS невдач поспіль джерело пропускається (circuit open).
+RELEASE_SOURCES          = "official"
+RELEASE_HEDGE_DELAY      = 0.5     # UA: с до запуску понижених джерел
+RELEASE_HEDGE_TIMEOUT    = 5       # UA: с — таймаут однієї спроби в гонці; штраф EWMA скасованому джерелу
+RELEASE_SLOW_MS          = 3000    # UA: EWMA латентності (мс), вище якої джерело понижується
+RELEASE_BREAKER_FAILS    = 3
+RELEASE_BREAKER_COOLDOWN = 1800    # UA: с, скільки відкритий circuit
+
+# UA: Сегментоване завантаження (HTTP Range): кількість паралельних з'єднань
+#     і мінімальний розмір сегмента (менші файли качаються одним потоком).
+DOWNLOAD_SEGMENTS    = 4
+DOWNLOAD_MIN_SEGMENT = 256 * 1024
+DOWNLOAD_CHUNK       = 65536
+DOWNLOAD_RETRIES     = 3                # UA: спроб з докачкою з offset-у (експоненційний backoff)
+PART_STATE_EVERY     = 1024 * 1024      # UA: як часто (байт) зберігати прогрес у .part.json
+USER_AGENT           = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+
+# UA: Сховище архівів (content-addressed, SHA-256) у DOWNLOADS_DIR/7zip_store/ — LRU з лімітами
+STORE_MAX_MB    = 64
+STORE_MAX_ITEMS = 5
+
+# UA: Single-flight: один запуск на капсулу. Блокування ОС на LOG_DIR/7zip_manager.lock (знімається
+#     разом зі смертю процесу), стан запуску (PID, фаза, результат) — 7zip_manager.state.json.
+#     Другий запуск чекає до RUN_LOCK_WAIT с і бере результат першого; --no-wait — лише статус.
+RUN_LOCK_WAIT = 900
+
+# UA: Режим --daemon: перевірка за розкладом (інтервал ± jitter, щоб fleet не приходив одночасно).
+#     Upstream без змін — інтервал × DAEMON_BACKOFF до DAEMON_INTERVAL_MAX; нова версія — назад до бази;
+#     помилка — повтор через DAEMON_RETRY · 2^(помилок−1), не довше за базовий інтервал.
+DAEMON_INTERVAL     = 6 * 3600
+DAEMON_INTERVAL_MAX = 24 * 3600
+DAEMON_BACKOFF      = 1.5
+DAEMON_JITTER       = 0.1
+DAEMON_RETRY        = 900
+DAEMON_BUSY_RETRY   = 60     # UA: с — інший запуск тримає single-flight блокування
+
+# UA: Процес 7za (SevenZipProcess): вивід читається шматками без блокування, таймаути — загальний
+#     і «тиша у виводі» (с), скасування — SIGINT/CTRL_BREAK, за SEVENZIP_KILL_GRACE с — kill.
+SEVENZIP_TIMEOUT      = 1800
+SEVENZIP_IDLE_TIMEOUT = 300
+SEVENZIP_KILL_GRACE   = 5
+SEVENZIP_CANCEL_POLL  = 0.25   # UA: с — як часто перевіряти зовнішню подію скасування
+SEVENZIP_TAIL         = 4096   # UA: символів хвоста виводу для повідомлень про помилку
+VERSION_PROBE_TIMEOUT = 5
+
+# UA: Пакетний режим (--batch=FILE): jobs compress / extract / test на керованому 7za (бінарник під
+#     архітектуру хоста). Паралельні jobs × потоки 7za (-mmt) ≈ кількість ядер — без oversubscription.
+BATCH_OPS     = ("compress", "extract", "test")
+BATCH_WORKERS = 0   # UA: 0 — авто: min(кількість jobs, ядра)
+
+# UA: Коди виходу (--daemon, --no-wait, автоматизація)
+EXIT_OK     = 0
+EXIT_FAILED = 1
+EXIT_BUSY   = 75  # UA: EX_TEMPFAIL — виконується інший запуск (--no-wait)
+
+# UA: LAN-дзеркало (--serve): download.html-сумісний індекс + архіви зі сховища (Range, ETag)
+MIRROR_HOST  = "0.0.0.0"
+MIRROR_PORT  = 8077
+MIRROR_CHUNK = 256 * 1024
+
+# UA: Маніфест встановленого дерева (розмір, mtime, SHA-256) — для delta-встановлення
+#     і перевірки цілісності (--verify[=deep], --repair); deep — SHA-256 у VERIFY_WORKERS потоків
+INSTALL_MANIFEST = ".7zip_manifest.json"
+VERIFY_WORKERS   = 4
+
+# UA: Режим встановлення: "delta" (копіювання змінених файлів) або "staged" (заміна дерева
+#     перейменуванням, попереднє дерево — apps/.7zip.previous для миттєвого відкату)
+INSTALL_MODE       = "delta"
+PREVIOUS_KEEP_DAYS = 7
+
+# UA: Компоненти Extra архіву: назва → (члени архіву в корені, 7za.exe компонента або None).
+#     Профіль встановлення (INSTALL_PROFILE / --components=) — напр. "x64" або "x86+Far";
+#     невибрані компоненти відсікаються фільтрами -x! 7za (не розпаковуються й не пишуться).
+#     history.txt / License.txt / readme.txt встановлюються завжди.
+EXTRA_COMPONENTS = {
+    "x86":   (("7za.exe", "7za.dll", "7zxa.dll"), "7za.exe"),
+    "x64":   (("x64",), os.path.join("x64", "7za.exe")),
+    "arm64": (("arm64",), os.path.join("arm64", "7za.exe")),
+    "Far":   (("Far",), None),
+}
+INSTALL_PROFILE = "all"
+
+# UA: Fleet-режим (--fleet / FLEET_ROOTS): кілька 7-Zip дерев (по одному на капсулу/користувача/агента),
+#     одна перевірка релізу, одне завантаження і розпакування, встановлення — у пулі з FLEET_WORKERS потоків.
+FLEET_WORKERS = 4
+
+# UA: Кеш встановленої версії (ключ: шлях + розмір + mtime + inode 7za.exe) у LOG_DIR.
+#     VERSION_PROBE: "resource" — версія з ресурсу VS_VERSION_INFO (без запуску процесу,
+#     fallback на запуск), "exec" — лише запуск 7za.exe і розбір банера.
+VERSION_PROBE = "resource"
+
+# UA: Обслуговування логів: один прохід os.scandir, part-файли стискаються у .gz у фоні,
+#     утримання за віком (днів) і за сумарним розміром LOG_DIR.
+LOG_KEEP_DAYS = 7
+LOG_MAX_MB    = 256
+_LOG_NAME_RE  = re.compile(r"^7zip_(?:log|events)_(\d{4})-(\d{2})-(\d{2})(?:_part(\d+))?\.(?:log|jsonl)(\.gz)?$")
+
+PYTHON_EXE = sys.executable
+
+# ---------------------------------------------------------------------------
+# NETWORK TIMEOUTS
+# UA: Усі HTTP-запити — через SevenZipManager.request(): одна сесія (keep-alive пул),
+#     окремі таймаути з'єднання/читання, повтори з jitter-backoff і повагою до Retry-After.
+# ---------------------------------------------------------------------------
+HTTP_CONNECT_TIMEOUT = 10    # UA: секунд на TCP/TLS з'єднання
+HTTP_READ_TIMEOUT    = 60    # UA: секунд між байтами відповіді (не на весь файл)
+DEFAULT_TIMEOUT      = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)  # UA: формат timeout= для requests
+HTTP_RETRIES         = 3     # UA: повторів запиту (з'єднання/таймаут/429/5xx)
+HTTP_BACKOFF         = 1.0   # UA: база експоненційного backoff, с
+HTTP_BACKOFF_MAX     = 30.0  # UA: стеля однієї паузи (і Retry-After), с
+HTTP_RETRY_STATUSES  = (429, 500, 502, 503, 504)
+RELEASE_DRAIN_MAX    = 256 * 1024  # UA: дочитати решту download.html, щоб з'єднання повернулось у пул
+
 # ---------------------------------------------------------------------------
 # LOAD .ENV (сумісність)
 # ---------------------------------------------------------------------------
-def _load_env() -> dict:
+def _load_env(script_dir: str = SCRIPT_DIR) -> dict:
     """Load .env file next to script. UA: Завантаження .env поруч зі скриптом."""
     result: dict = {}
-    env_path = os.path.join(SCRIPT_DIR, ".env")
+    env_path = os.path.join(script_dir, ".env")
     if not os.path.exists(env_path):
         return result
     try:
@@ -88,50 +328,92 @@ def _load_env() -> dict:
         pass
     return result
 
-_env = _load_env()
 
-# Шляхи: з .env або auto-detect від CAPSULE_ROOT
-SEVENZIP_DIR  = _env.get("SEVENZIP_DIR")  or os.path.join(CAPSULE_ROOT, "apps", "7zip")
-LOG_DIR       = _env.get("LOG_DIR")       or os.path.join(CAPSULE_ROOT, "logs", "7ziplog")
-DOWNLOADS_DIR = _env.get("DOWNLOADS")     or os.path.join(CAPSULE_ROOT, "downloads")
-PWSH_EXE      = _env.get("PWSH_EXE")      or os.path.join(CAPSULE_ROOT, "apps", "pwsh", "pwsh.exe")
-
-# UA: 7za.exe — консольна версія (x86), x64/ — 64-бітна версія
-SEVENZIP_EXE = os.path.join(SEVENZIP_DIR, "7za.exe")
+def _env_int(env: dict, key: str, default: int) -> int:
+    """Read integer value from .env with fallback. UA: Ціле значення з .env або default."""
+    try:
+        return int(env.get(key) or default)
+    except ValueError:
+        return default
 
-# UA: Офіційна сторінка завантажень 7-Zip
-SEVENZIP_DOWNLOAD_PAGE = "https://www.7-zip.org/download.html"
-SEVENZIP_BASE_URL      = "https://www.7-zip.org/"
 
-PYTHON_EXE = sys.executable
-START_TIME = time.time()
+def _parse_install_profile(profile: str) -> list:
+    """
+    Parse an install profile ("all", "x64", "x86+Far") into component names.
+    UA: Розбирає профіль встановлення у список компонентів EXTRA_COMPONENTS
+        (роздільники "+" або ","; регістр не важливий). Невідома назва — ValueError.
+    """
+    names = {n.lower(): n for n in EXTRA_COMPONENTS}
+    parts = [p.strip().lower() for p in re.split(r"[+,]", profile or "") if p.strip()]
+    if not parts or parts == ["all"]:
+        return list(EXTRA_COMPONENTS)
+    unknown = [p for p in parts if p not in names]
+    if unknown:
+        raise ValueError(f"Невідомі компоненти профілю: {', '.join(unknown)} (доступні: {', '.join(EXTRA_COMPONENTS)}, all)")
+    return [n for n in EXTRA_COMPONENTS if n.lower() in parts]
 
-# ---------------------------------------------------------------------------
-# NETWORK TIMEOUTS
-# ---------------------------------------------------------------------------
-DEFAULT_TIMEOUT = 30  # seconds
 
+def _parse_fleet_roots(spec: str) -> list:
+    """
+    Parse fleet install roots: os.pathsep-separated list or "@file" (one root per line).
+    UA: Корені fleet-режиму — папки 7-Zip (де лежить 7za.exe), через ";" (Windows) / ":" (POSIX),
+        або @файл зі списком (порожні рядки та # коментарі пропускаються). Дублікати — один раз.
+    """
+    roots: list = []
+    for part in (spec or "").split(os.pathsep):
+        part = part.strip()
+        if part.startswith("@"):
+            with open(os.path.expandvars(part[1:]), encoding="utf-8") as f:
+                roots += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+        elif part:
+            roots.append(part)
+    return list(dict.fromkeys(os.path.abspath(os.path.expandvars(r)) for r in roots))
 
-def network_request_with_retry(url: str, max_retries: int = 3, initial_delay: float = 1.0) -> requests.Response:
-    """Make HTTP request with exponential backoff retry.
-    UA: HTTP запит з retry та експоненційним backoff."""
-    delay = initial_delay
-    last_error = None
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
-            return response
-        except Exception as e:
-            last_error = e
-            if attempt < max_retries - 1:
-                log(f"   Спроба {attempt + 1}/{max_retries} невдала: {e}. Повтор через {delay}с...", Colors.YELLOW)
-                time.sleep(delay)
-                delay *= 2  # exponential backoff
+def _load_batch_manifest(path: str) -> dict:
+    """
+    Load a --batch job manifest (JSON) and normalise its jobs.
+    UA: {"jobs": [...], "workers": N, "threads": N, "output": "results.json"} або просто список jobs.
+        Job: {"op": "compress"|"extract"|"test", "archive": ..., "sources": [...] (compress),
+        "output": папка (extract), "level": 0-9, "type": "7z"|"zip"|..., "args": [...], "id": ...}.
+        Відносні шляхи — від папки маніфесту. Помилка структури — ValueError (до запуску jobs).
+    """
+    path = os.path.abspath(os.path.expandvars(path))
+    with open(path, encoding="utf-8-sig") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list) or not data["jobs"]:
+        raise ValueError(f"{path}: очікується {{\"jobs\": [...]}} з хоча б одним job")
+    base = os.path.dirname(path)
 
-    raise ConnectionError(f"Не вдалося виконати запит після {max_retries} спроб: {last_error}")
+    def resolve(p: str) -> str:
+        return os.path.normpath(os.path.join(base, os.path.expandvars(str(p))))
 
+    jobs = []
+    for n, raw in enumerate(data["jobs"], 1):
+        if not isinstance(raw, dict) or raw.get("op") not in BATCH_OPS or not raw.get("archive"):
+            raise ValueError(f"{path}: job #{n} — потрібні op ({'/'.join(BATCH_OPS)}) і archive")
+        job = dict(raw, id=str(raw.get("id") or n), archive=resolve(raw["archive"]))
+        if job["op"] == "compress":
+            sources = raw.get("sources")
+            if isinstance(sources, str):
+                sources = [sources]
+            if not sources:
+                raise ValueError(f"{path}: job #{n} (compress) — порожній sources")
+            job["sources"] = [resolve(src) for src in sources]
+        elif job["op"] == "extract":
+            job["output"] = resolve(raw.get("output") or os.path.splitext(job["archive"])[0])
+        job["args"] = [str(a) for a in raw.get("args") or []]
+        jobs.append(job)
+    output = data.get("output")
+    return {
+        "path": path,
+        "jobs": jobs,
+        "workers": int(data.get("workers") or 0) or None,
+        "threads": int(data.get("threads") or 0) or None,
+        "output": resolve(output) if output else os.path.splitext(path)[0] + ".results.json",
+    }
 
 # ---------------------------------------------------------------------------
 # AUTO-CLOSE TIMER (30 seconds of inactivity)
@@ -140,15 +422,19 @@ class AutoCloseTimer:
     """Auto-close after 30 seconds of inactivity.
     UA: Автозакриття після 30 секунд бездіяльності."""
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, on_exit=None):
         self.timeout = timeout
         self.last_activity = time.time()
         self.running = False
         self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        # UA: Викликається перед os._exit (atexit-обробники там не спрацьовують) — злив логів
+        self.on_exit = on_exit
 
     def reset(self) -> None:
         """Reset the inactivity timer."""
         self.last_activity = time.time()
+        self._wake.set()
 
     def start(self) -> None:
         """Start the auto-close timer."""
@@ -159,24 +445,31 @@ class AutoCloseTimer:
     def stop(self) -> None:
         """Stop the auto-close timer."""
         self.running = False
+        self._wake.set()
 
     def _run(self) -> None:
-        """Internal timer loop."""
+        """Internal timer loop. UA: Чекає на подію (reset/stop) до дедлайну — без опитування щосекунди."""
         while self.running:
-            if time.time() - self.last_activity > self.timeout:
-                cprint(f"\n[{Colors.YELLOW}TIMEOUT{Colors.RESET}] Автозакриття через {self.timeout} сек бездіяльності.", Colors.YELLOW)
-                self.running = False
-                os._exit(0)
-            time.sleep(1)
+            remaining = self.last_activity + self.timeout - time.time()
+            if remaining > 0:
+                self._wake.wait(remaining)
+                self._wake.clear()
+                continue
+            cprint(f"\n[{Colors.YELLOW}TIMEOUT{Colors.RESET}] Автозакриття через {self.timeout} сек бездіяльності.", Colors.YELLOW)
+            self.running = False
+            if self.on_exit:
+                try:
+                    self.on_exit()
+                except Exception:
+                    pass
+            os._exit(0)
 
 
-_auto_close = AutoCloseTimer(30)
+_auto_close: Optional[AutoCloseTimer] = None
 
 # ---------------------------------------------------------------------------
 # КОЛЬОРИ
 # ---------------------------------------------------------------------------
-os.system('')  # UA: Вмикаємо ANSI-кольори в Windows CMD
-
 class Colors:
     HEADER = '\033[95m'
     BLUE   = '\033[94m'
@@ -187,10 +480,196 @@ class Colors:
     RESET  = '\033[0m'
     BOLD   = '\033[1m'
 
+class _OrderedConsole:
+    """Console output of concurrently running phases, kept in declaration order.
+    UA: Фаза на «голові» черги пише в консоль одразу; решта — у свій буфер, який виводиться,
+        щойно всі попередні фази завершились (далі фаза пише вже напряму). Перерисовки
+        прогрес-бару (\r...) у буфері згортаються до останньої. Вкладений план пише через
+        слот фази, з якої його запущено (parent)."""
+
+    _local = threading.local()
+
+    def __init__(self, names: Iterable[str], parent: Optional[tuple] = None):
+        self.order = list(names)
+        self.parent = parent
+        self.head = 0
+        self._buffers: dict = {name: [] for name in self.order}
+        self._done: set = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def current(cls) -> Optional[tuple]:
+        """UA: (консоль, фаза), до якої прив'язаний поточний потік, або None."""
+        return getattr(cls._local, "slot", None)
+
+    @classmethod
+    def bind(cls, slot: Optional[tuple]) -> Optional[tuple]:
+        """UA: Прив'язує потік до слоту; повертає попередню прив'язку (для відновлення)."""
+        previous = cls.current()
+        cls._local.slot = slot
+        return previous
+
+    @classmethod
+    def capture(cls, text: str) -> bool:
+        """UA: Текст потоку, прив'язаного до фази, — у впорядковану консоль (True) або напряму (False)."""
+        slot = cls.current()
+        if slot is None:
+            return False
+        slot[0].write(slot[1], text)
+        return True
+
+    def write(self, name: str, text: str) -> None:
+        with self._lock:
+            if self.head < len(self.order) and self.order[self.head] != name:
+                buffer = self._buffers[name]
+                if text.startswith("\r") and buffer and buffer[-1].startswith("\r"):
+                    buffer[-1] = text  # UA: проміжні кадри прогрес-бару не потрібні
+                else:
+                    buffer.append(text)
+                return
+        self._emit(text)
+
+    def finish(self, name: str) -> None:
+        """UA: Фаза завершилась — просуваємо голову і виводимо буфери наступних фаз."""
+        with self._lock:
+            self._done.add(name)
+            while self.head < len(self.order) and self.order[self.head] in self._done:
+                self.head += 1
+                if self.head < len(self.order):
+                    buffer = self._buffers[self.order[self.head]]
+                    for text in buffer:
+                        self._emit(text)
+                    buffer.clear()
+
+    def _emit(self, text: str) -> None:
+        if self.parent is not None:
+            self.parent[0].write(self.parent[1], text)
+        else:
+            _stdout_write(text)
+
+
+def _stdout_write(text: str) -> None:
+    """UA: Запис у stdout: через чергу логів, якщо консольний синк асинхронний (порядок з log()), інакше напряму."""
+    sink = _QueuedConsole.active
+    if sink is not None:
+        sink.write(text)
+        return
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _console_drain() -> None:
+    """UA: Дочекатися виводу всього, що вже в черзі консолі (перед input()/очищенням екрана)."""
+    sink = _QueuedConsole.active
+    if sink is not None:
+        sink.drain()
+
+
+def _console_write(text: str) -> None:
+    """UA: Єдина точка виводу в консоль (cprint, прогрес-бар) — з урахуванням планувальника фаз."""
+    if not _OrderedConsole.capture(text):
+        _stdout_write(text)
+
+
 def cprint(msg: str, color: str = Colors.RESET, end: str = "\n") -> None:
     """Print colored message to stdout. UA: Виводить кольоровий текст."""
-    sys.stdout.write(color + msg + Colors.RESET + end)
-    sys.stdout.flush()
+    _console_write(color + msg + Colors.RESET + end)
+
+# ---------------------------------------------------------------------------
+# ЛОГУВАННЯ: СИНКИ (файл пакетами, JSON-lines події, консоль)
+# UA: log() лише кладе запис у чергу (QueueHandler); запис на диск/у консоль —
+#     у потоці QueueListener. Кожен синк вмикається окремо (.env LOG_FILE/LOG_JSONL/LOG_CONSOLE).
+# ---------------------------------------------------------------------------
+LOG_FLUSH_EVERY    = 64    # UA: записів між flush() файлових синків
+LOG_FLUSH_INTERVAL = 0.5   # UA: секунд — максимальна затримка flush() при рідких записах
+
+
+class _BatchFileHandler(logging.FileHandler):
+    """File handler that flushes every N records / T seconds instead of every record.
+    UA: FileHandler з пакетним flush (flush_every=1 — поведінка звичайного FileHandler)."""
+
+    def __init__(self, path: str, flush_every: int = LOG_FLUSH_EVERY, flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(path, encoding="utf-8", delay=True)
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+class _JsonLinesHandler(_BatchFileHandler):
+    """Structured sink: one JSON object per event record (SevenZipManager.event()).
+    UA: Синк подій JSON-lines: {"ts", "event", "phase", "duration", "bytes", ...}."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self.addFilter(lambda record: hasattr(record, "event"))
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {"ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")}
+        data.update(record.event)  # type: ignore[attr-defined]
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _ConsoleHandler(logging.Handler):
+    """Colored console sink (color from record.color). UA: Консольний синк (cprint без flush на кожен запис).
+        Сирий текст (record.console_text — cprint, прогрес-бар) пишеться як є; flush() — коли черга
+        спорожніла, тож під навантаженням записи йдуть пакетом, а в паузах з'являються одразу."""
+
+    def __init__(self, log_queue=None):
+        super().__init__()
+        self.queue = log_queue
+        self.addFilter(lambda record: hasattr(record, "color") or hasattr(record, "console_text"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            text = getattr(record, "console_text", None)
+            if text is None:
+                text = getattr(record, "color", Colors.RESET) + record.getMessage() + Colors.RESET + "\n"
+            sys.stdout.write(text)
+            drained = getattr(record, "drained", None)
+            if drained is not None or self.queue is None or self.queue.empty():
+                sys.stdout.flush()
+            if drained is not None:
+                drained.set()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        sys.stdout.flush()
+
+
+class _QueuedConsole:
+    """Direct console output (cprint, progress bar) routed through the log queue.
+    UA: Один FIFO для log() і прямого виводу — рядки не обганяють одне одного (LOG_CONSOLE=async)."""
+
+    active: Optional["_QueuedConsole"] = None
+
+    def __init__(self, log_queue):
+        self.queue = log_queue
+
+    def write(self, text: str) -> None:
+        self.queue.put(logging.makeLogRecord({"console_text": text}))
+
+    def drain(self, timeout: float = 2.0) -> None:
+        done = threading.Event()
+        self.queue.put(logging.makeLogRecord({"console_text": "", "drained": done}))
+        done.wait(timeout)
 
 # ---------------------------------------------------------------------------
 # SELF-INTEGRITY CHECK
@@ -205,10 +684,11 @@ def get_manager_hash() -> str:
         return "????????????"
 
 # ---------------------------------------------------------------------------
-# ЗАЛЕЖНОСТІ (self-healing)
+# ЗАЛЕЖНОСТІ (self-healing, явний виклик)
 # ---------------------------------------------------------------------------
 def ensure_dependencies() -> None:
-    """Install missing pip packages automatically. UA: Автовстановлення залежностей."""
+    """Install missing pip packages automatically. UA: Автовстановлення залежностей.
+    Викликається явно з main() — НЕ під час імпорту модуля."""
     required = {'requests', 'packaging', 'bs4'}
     missing = [lib for lib in required if not _can_import(lib)]
     if missing:
@@ -223,536 +703,3676 @@ def ensure_dependencies() -> None:
             cprint(f"[SETUP] Помилка встановлення: {e}", Colors.RED)
 
 def _can_import(name: str) -> bool:
-    """Check if module is importable. UA: Перевіряє чи можна імпортувати модуль."""
+    """Check if module is importable without importing it. UA: Перевіряє наявність модуля (find_spec, без імпорту)."""
     try:
-        __import__(name)
-        return True
-    except ImportError:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
         return False
 
-ensure_dependencies()
-
-import requests          # type: ignore
-from packaging import version  # type: ignore
-from bs4 import BeautifulSoup  # type: ignore
-
 # ---------------------------------------------------------------------------
-# ЛОГУВАННЯ
+# УТИЛІТИ
 # ---------------------------------------------------------------------------
-def _rotate_log_if_needed() -> str:
-    """If today's log > 50 MB → rename to _part2, _part3... Return active log path.
-    UA: Якщо поточний лог > 50 МБ → перейменувати з суфіксом _part2, _part3...
-        Повертає шлях до активного лог-файлу. Поточний день ніколи не видаляється."""
-    os.makedirs(LOG_DIR, exist_ok=True)
-    today = datetime.date.today().strftime("%Y-%m-%d")
-    base = os.path.join(LOG_DIR, f"7zip_log_{today}.log")
-    if not os.path.exists(base):
-        return base
-    size_mb = os.path.getsize(base) / (1024 * 1024)
-    if size_mb <= 50:
-        return base
-    part = 2
-    while os.path.exists(os.path.join(LOG_DIR, f"7zip_log_{today}_part{part}.log")):
-        part += 1
-    new_path = os.path.join(LOG_DIR, f"7zip_log_{today}_part{part}.log")
-    os.rename(base, new_path)
-    return base
-
-_log_path = _rotate_log_if_needed()
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[logging.FileHandler(_log_path, encoding='utf-8')]
-)
+def _file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file via mmap (streaming fallback).
+    UA: mmap без копіювання у буфери Python; hashlib відпускає GIL на весь буфер — кілька потоків
+        хешують паралельно. Порожній файл / mmap недоступний — блоками по 1 MiB.
+    """
+    import mmap
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sha.update(mm)
+                return sha.hexdigest()
+        except (ValueError, OSError):
+            pass
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
 
-def log(msg: str, color: str = Colors.RESET, console: bool = True) -> None:
-    """Log to file and optionally to console. UA: Логує у файл і консоль."""
-    logging.info(msg)
-    if console:
-        cprint(msg, color)
+def _pe_file_version(path: str) -> Optional[str]:
+    """
+    Read "major.minor" from a PE binary's VS_FIXEDFILEINFO (no process spawn).
+    UA: Версія з вбудованого ресурсу VS_VERSION_INFO (FILEVERSION 26,0,0,0 → "26.00").
+        None — не PE-файл або ресурсу немає.
+    """
+    import mmap
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"MZ":
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find("VS_VERSION_INFO".encode("utf-16-le"))
+                if pos < 0:
+                    return None
+                # UA: VS_FIXEDFILEINFO: dwSignature 0xFEEF04BD, dwStrucVersion, dwFileVersionMS, ...
+                sig = mm.find(struct.pack("<I", 0xFEEF04BD), pos, pos + 64)
+                if sig < 0:
+                    return None
+                (version_ms,) = struct.unpack_from("<I", mm, sig + 8)
+    except (OSError, ValueError, struct.error):
+        return None
+    return f"{version_ms >> 16}.{version_ms & 0xFFFF:02d}"
 
-# ---------------------------------------------------------------------------
-# УТИЛІТИ
-# ---------------------------------------------------------------------------
-def draw_progress(label: str, percent: int, width: int = 20) -> None:
-    """Draw ASCII progress bar. UA: Малює прогрес-бар."""
+def draw_progress(label: str, percent: int, width: int = 20, suffix: str = "") -> None:
+    """Draw ASCII progress bar. UA: Малює прогрес-бар (suffix — швидкість/ETA)."""
     bars = int(percent / (100 / width))
     bar = '=' * bars + '.' * (width - bars)
-    sys.stdout.write(f"\r{Colors.YELLOW}{label}: [{bar}] {percent}%{Colors.RESET}")
-    sys.stdout.flush()
+    _console_write(f"\r{Colors.YELLOW}{label}: [{bar}] {percent}%{suffix}{Colors.RESET}\033[K")
 
 # ---------------------------------------------------------------------------
-# КРОК 1: Перевірка PATH
+# ПРОГРЕС (завантаження і розпакування)
+# UA: Один інтерфейс для обох фаз: update() дешевий (лише лічильник), рендер —
+#     не частіше PROGRESS_REFRESH с. Без TTY (або PROGRESS=log) — рядок у лог раз на
+#     PROGRESS_LOG_EVERY с. Слухачі (listeners) отримують snapshot() на кожному кроці рендеру.
 # ---------------------------------------------------------------------------
-def show_path_info() -> None:
+PROGRESS_REFRESH   = 0.1
+PROGRESS_LOG_EVERY = 5.0
+
+
+def _format_bytes(n: float) -> str:
+    """UA: 1536 → "1.5 KiB"."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+class ProgressReporter:
     """
-    Show information about what is registered in PATH for 7-Zip.
-    UA: Показує інформацію про те, що зареєстровано в PATH для 7-Zip.
-        - tags/ → Win+R → 7zip (ярлик/менеджер)
-        - apps/7zip/ → 7za.exe (консольний архіватор)
+    Throttled progress with throughput and ETA (console bar, log lines or listeners only).
+    UA: mode: "tty" — прогрес-бар у консолі; "log" — періодичні рядки через log();
+        "off" — лише слухачі. Потокобезпечний (сегменти завантаження звітують з кількох потоків).
     """
-    cprint("-" * 50, Colors.BLUE)
-    log("🔧 ІНФОРМАЦІЯ ПРО PATH", Colors.HEADER)
 
-    # Paths to check
-    tags_dir = os.path.join(CAPSULE_ROOT, "tags")
-    sevenzip_dir = SEVENZIP_DIR.rstrip('\\')
+    def __init__(self, label: str, total: int = 0, mode: str = "tty", log=None, listeners: Iterable = (),
+                 initial: int = 0, refresh: float = PROGRESS_REFRESH, log_every: float = PROGRESS_LOG_EVERY):
+        self.label = label
+        self.total = total
+        self.mode = mode
+        self.done = initial
+        self._log = log
+        self._listeners = list(listeners)
+        self._initial = initial
+        self._refresh = refresh if mode == "tty" else min(refresh * 10, log_every)
+        self._log_every = log_every
+        self._started = time.monotonic()
+        self._next_render = 0.0
+        self._next_log = self._started + log_every
+        self._rendered = False
+        self._finished = False
+        self._lock = threading.Lock()
+        # UA: Сегменти завантаження звітують з інших потоків — вивід іде у слот фази-власника
+        self._console = _OrderedConsole.current()
 
-    # Read PATH from registry
-    try:
-        import winreg  # type: ignore[import]
-        key = winreg.OpenKey(
-            winreg.HKEY_LOCAL_MACHINE,
-            r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
-            0, winreg.KEY_READ
-        )
-        current_path, _ = winreg.QueryValueEx(key, "Path")
-        winreg.CloseKey(key)
-        entries = [e.rstrip('\\').strip().lower() for e in current_path.split(';') if e.strip()]
-    except Exception:
-        entries = []
+    def update(self, done: Optional[int] = None, advance: int = 0) -> None:
+        """Set absolute progress or advance it. UA: Рендер — лише якщо минув інтервал оновлення."""
+        with self._lock:
+            self.done = done if done is not None else self.done + advance
+            now = time.monotonic()
+            if now < self._next_render:
+                return
+            self._next_render = now + self._refresh
+            self._emit(now)
 
-    # Check tags/ (for Win+R → 7zip)
-    tags_norm = tags_dir.rstrip('\\').lower()
-    tags_in_path = tags_norm in entries
+    def finish(self) -> None:
+        """Final render (100%) + newline after the console bar. UA: Завершення (ідемпотентне)."""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            self._emit(time.monotonic(), final=True)
+            if self._rendered and self.mode == "tty":
+                previous = _OrderedConsole.bind(self._console)
+                try:
+                    _console_write("\n")
+                finally:
+                    _OrderedConsole.bind(previous)
 
-    # Check apps/7zip/ (for 7za.exe)
-    sevenzip_norm = sevenzip_dir.lower()
-    sevenzip_in_path = sevenzip_norm in entries
+    def snapshot(self) -> dict:
+        """Current state: done/total/pct, rate (units/s), eta (s), elapsed (s). UA: Стан для слухачів."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = (self.done - self._initial) / elapsed
+        pct = int(self.done * 100 / self.total) if self.total > 0 else None
+        remaining = self.total - self.done
+        eta = remaining / rate if self.total > 0 and rate > 0 and remaining > 0 else None
+        return {
+            "label": self.label.strip(), "done": self.done, "total": self.total, "pct": pct,
+            "rate": rate, "eta": eta, "elapsed": elapsed, "finished": self._finished,
+        }
 
-    # Display information
-    log("", Colors.RESET)
-    log("   📋 РЕЄСТРАЦІЯ В PATH:", Colors.CYAN)
-    log("", Colors.RESET)
+    def _emit(self, now: float, final: bool = False) -> None:
+        previous = _OrderedConsole.bind(self._console)
+        try:
+            self._render(now, final)
+        finally:
+            _OrderedConsole.bind(previous)
 
-    if tags_in_path:
-        log("   ✅ tags/         → Win+R → 7zip (ярлик менеджера)", Colors.GREEN)
-    else:
-        log("   ❌ tags/         → Win+R → 7zip (ярлик менеджера) — НЕ зареєстровано", Colors.RED)
+    def _render(self, now: float, final: bool) -> None:
+        snap = self.snapshot()
+        for listener in self._listeners:
+            try:
+                listener(snap)
+            except Exception:
+                pass
+        pct = snap["pct"] if snap["pct"] is not None else 0
+        suffix = f"  {_format_bytes(snap['rate'])}/s"
+        if snap["eta"] is not None:
+            suffix += f"  ETA {int(snap['eta']) // 60}:{int(snap['eta']) % 60:02d}"
+        if self.mode == "tty":
+            draw_progress(self.label, min(pct, 100), suffix=suffix)
+            self._rendered = True
+        elif self.mode == "log" and self._log and (final or now >= self._next_log):
+            self._next_log = now + self._log_every
+            self._log(f"{self.label}: {pct}% ({_format_bytes(self.done)} / {_format_bytes(self.total)}){suffix}")
 
-    if sevenzip_in_path:
-        log("   ✅ apps/7zip/    → 7za.exe (консольний архіватор)", Colors.GREEN)
-    else:
-        log("   ❌ apps/7zip/    → 7za.exe (консольний архіватор) — НЕ зареєстровано", Colors.RED)
+# ---------------------------------------------------------------------------
+# МЕТРИКИ ЗАПУСКУ (span-и фаз)
+# UA: Кожна фаза main()/check_and_update() — span: час (wall), байти, повтори, помилка.
+#     Експорт: JSON-звіт запуску та Prometheus textfile (node_exporter textfile collector).
+# ---------------------------------------------------------------------------
+class RunMetrics:
+    """Span recorder for one run. UA: Span-и фаз одного запуску (вкладені — з parent)."""
 
-    log("", Colors.RESET)
-    log("   💡 ПРИМІТКА:", Colors.YELLOW)
-    log("      Win+R → 7zip  → запускає менеджер (tags/7zip.lnk)", Colors.CYAN)
-    log("      Win+R → 7za   → консольний архіватор (apps/7zip/7za.exe)", Colors.CYAN)
-    log("", Colors.RESET)
+    def __init__(self):
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: list = []
+        self._local = threading.local()  # UA: стек відкритих span-ів — свій у кожного потоку
+        self.labels: dict = {}
 
+    @property
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
 
-def ensure_in_system_path() -> None:
-    """
-    Ensure apps/7zip/ is in system PATH (HKLM), remove duplicates.
-    UA: Перевіряє що apps/7zip/ є в системному PATH (HKLM).
-        Якщо відсутній — додає через PowerShell з UAC elevation.
-        Також прибирає дублікати та обрізані записи.
-        Потрібно для роботи `7za` з будь-якого місця в системі.
-    """
-    # UA: Спочатку показуємо інформацію про поточний стан PATH
-    show_path_info()
+    def bind(self, stack: list) -> None:
+        """UA: Потік-виконавець успадковує відкриті span-и потоку, що його запустив (parent)."""
+        self._local.stack = list(stack)
 
-    ps_script = os.path.join(CAPSULE_ROOT, "devops", "pathupdate", "fix_path.ps1")
-    if not os.path.exists(ps_script):
-        log("   ⚠️ fix_path.ps1 не знайдено, пропускаємо.", Colors.YELLOW)
-        return
+    def span(self, name: str, **attrs) -> "_Span":
+        """UA: with metrics.span("download") as sp: ... sp["bytes"] = n."""
+        return _Span(self, name, attrs)
 
-    # UA: Перевіряємо поточний PATH через реєстр
-    try:
-        import winreg  # type: ignore[import]
-        key = winreg.OpenKey(
-            winreg.HKEY_LOCAL_MACHINE,
-            r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
-            0, winreg.KEY_READ
-        )
-        current_path, _ = winreg.QueryValueEx(key, "Path")
-        winreg.CloseKey(key)
-        entries = [e.rstrip('\\').strip() for e in current_path.split(';') if e.strip()]
-        sevenzip_norm = SEVENZIP_DIR.rstrip('\\')
-        if sevenzip_norm in entries:
-            # log("   ✅ apps/7zip/ вже в системному PATH.", Colors.GREEN)
-            return
-    except Exception:
-        pass  # UA: winreg недоступний або помилка читання — продовжуємо
+    def add(self, key: str, value: float = 1) -> None:
+        """UA: Додає до поля поточного (найглибшого відкритого) span-а, напр. add("retries")."""
+        if self._stack:
+            span = self._stack[-1]
+            span[key] = span.get(key, 0) + value
 
-    # UA: apps/7zip/ відсутній — запускаємо fix_path.ps1 з UAC
-    log("   ℹ️  apps/7zip/ відсутній в PATH. Запускаю реєстрацію (UAC)...", Colors.YELLOW)
-    pwsh = PWSH_EXE if os.path.exists(PWSH_EXE) else "pwsh"
+    def report(self, ok: bool = True) -> dict:
+        """UA: JSON-звіт запуску."""
+        return {
+            "started": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "duration": round(time.perf_counter() - self._t0, 4),
+            "ok": ok,
+            "labels": self.labels,
+            "spans": self.spans,
+        }
 
-    try:
-        subprocess.run(
-            [pwsh, "-NoProfile", "-Command",
-             f"Start-Process '{pwsh}' -Verb RunAs -Wait "
-             f"-ArgumentList '-NoProfile -ExecutionPolicy Bypass -File \"{ps_script}\" -AutoClose'"],
-            timeout=60
+    def prometheus(self, ok: bool = True) -> str:
+        """UA: Текст для textfile collector (gauge-и останнього запуску, по фазах)."""
+        def esc(value) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = []
+        families = (
+            ("sevenzip_phase_duration_seconds", "Wall time of each phase in the last run.", "duration"),
+            ("sevenzip_phase_bytes", "Bytes processed by each phase in the last run.", "bytes"),
+            ("sevenzip_phase_retries", "Retries within each phase in the last run.", "retries"),
         )
-        log("   ✅ PATH оновлено. Перезапусти термінал для застосування.", Colors.GREEN)
-    except Exception as e:
-        log(f"   ⚠️ Не вдалося оновити PATH: {e}", Colors.YELLOW)
-        log(f"   ℹ️  Запусти вручну: {ps_script}", Colors.CYAN)
+        # UA: Фаза може повторюватися (version_probe до і після встановлення) — сумуємо,
+        #     бо дублікати серій з однаковими мітками textfile collector відкидає
+        phases: dict = {}
+        for span in self.spans:
+            totals = phases.setdefault(span["name"], {"duration": 0.0, "bytes": 0, "retries": 0})
+            for key in totals:
+                totals[key] += span.get(key, 0)
+        for metric, help_text, key in families:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for name, totals in phases.items():
+                lines.append(f'{metric}{{phase="{esc(name)}"}} {round(totals[key], 4)}')
+        lines += [
+            "# HELP sevenzip_run_duration_seconds Wall time of the last run.",
+            "# TYPE sevenzip_run_duration_seconds gauge",
+            f"sevenzip_run_duration_seconds {round(time.perf_counter() - self._t0, 4)}",
+            "# HELP sevenzip_run_success 1 if the last run finished without a critical error.",
+            "# TYPE sevenzip_run_success gauge",
+            f"sevenzip_run_success {1 if ok else 0}",
+            "# HELP sevenzip_run_timestamp_seconds Start time of the last run.",
+            "# TYPE sevenzip_run_timestamp_seconds gauge",
+            f"sevenzip_run_timestamp_seconds {int(self.started)}",
+        ]
+        if self.labels:
+            labels = ",".join(f'{k}="{esc(v)}"' for k, v in sorted(self.labels.items()))
+            lines += [
+                "# HELP sevenzip_info Versions seen by the last run.",
+                "# TYPE sevenzip_info gauge",
+                f"sevenzip_info{{{labels}}} 1",
+            ]
+        return "\n".join(lines) + "\n"
 
-# ---------------------------------------------------------------------------
-# HEALTH CHECKS
-# ---------------------------------------------------------------------------
-def health_check() -> dict:
-    """Validate critical components before execution.
-    UA: Перевірка критичних компонентів перед виконанням."""
-    checks = {
-        "7zip": os.path.exists(SEVENZIP_EXE),
-        "7zip_dir": os.path.exists(SEVENZIP_DIR),
-        "log_dir": os.path.exists(LOG_DIR),
-        "capsule_root": os.path.exists(CAPSULE_ROOT),
-    }
 
-    if not checks["7zip"]:
-        log("⚠️ 7za.exe не знайдено! Запусти Win+R → 7zip", Colors.YELLOW)
-    if not checks["7zip_dir"]:
-        log(f"⚠️ Директорія 7-Zip не знайдена: {SEVENZIP_DIR}", Colors.YELLOW)
+class _Span:
+    """Context manager behind RunMetrics.span(). UA: Запис span-а при виході (і при винятку)."""
 
-    return checks
+    def __init__(self, metrics: RunMetrics, name: str, attrs: dict):
+        self.metrics = metrics
+        self.data = {"name": name, **attrs}
+        self.on_close = None
 
+    def __enter__(self) -> dict:
+        self._t = time.perf_counter()
+        stack = self.metrics._stack
+        if stack:
+            self.data["parent"] = stack[-1]["name"]
+        self.data["start"] = round(self._t - self.metrics._t0, 4)
+        stack.append(self.data)
+        return self.data
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.data["duration"] = round(time.perf_counter() - self._t, 4)
+        if exc is not None:
+            self.data["error"] = f"{type(exc).__name__}: {exc}"
+        stack = self.metrics._stack
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i] is self.data:
+                del stack[i]
+                break
+        self.metrics.spans.append(self.data)
+        if self.on_close:
+            self.on_close(self.data)
+        return False
 
 # ---------------------------------------------------------------------------
-# ERROR REPORTING
+# ПЛАНУВАЛЬНИК ФАЗ (незалежні фази — паралельно)
 # ---------------------------------------------------------------------------
-def error_reporting(error: Exception, context: str = "") -> None:
-    """Structured error handling with actionable messages.
-    UA: Структурована обробка помилок з рекомендаціями."""
-    error_msg = f"❌ ПОМИЛКА [{context}]: {type(error).__name__}: {error}"
-    log(error_msg, Colors.RED)
-
-    # Діагностичні поради
-    if "FileNotFoundError" in str(type(error)):
-        log("   ℹ️  Перевірте наявність файлів/директорій", Colors.CYAN)
-    elif "PermissionError" in str(type(error)):
-        log("   ℹ️  Можливо, потрібні права адміністратора (UAC)", Colors.CYAN)
-    elif "ConnectionError" in str(type(error)):
-        log("   ℹ️  Перевірте мережеве підключення", Colors.CYAN)
+class PhasePlan:
+    """Run named phases on a thread pool as soon as their dependencies are done.
+    UA: plan.add("update", fn, after=("path_check",)) — фаза стартує, щойно завершились її
+        залежності; незалежні йдуть паралельно. span=True — фаза обгорнута у span з тим самим
+        ім'ям (parent — span, відкритий у потоці, що викликав run()). Консольний вивід — у
+        порядку оголошення фаз (_OrderedConsole). Помилка фази — залежні від неї пропускаються,
+        run() перекидає першу помилку (в порядку оголошення) після завершення решти.
+        workers=1 або manager.serial_phases (--profile: cProfile бачить лише свій потік) — фази
+        виконуються по черзі у потоці, що викликав run()."""
 
-    # Запис у лог файл
-    logging.error(f"{context}: {error}", exc_info=True)
+    def __init__(self, manager: "SevenZipManager", workers: int = 4):
+        self.manager = manager
+        self.workers = workers
+        self._phases: list = []
 
+    def add(self, name: str, fn, after: Iterable[str] = (), span: bool = True) -> None:
+        self._phases.append({"name": name, "fn": fn, "after": tuple(after), "span": span})
 
-# ---------------------------------------------------------------------------
-# КРОК 2: Ротація логів
-# ---------------------------------------------------------------------------
-def cleanup_old_logs(max_days: int = 7) -> None:
-    """Delete log files older than max_days.
-    UA: Видаляє лог-файли старші за max_days днів.
-    Поточний день НЕ видаляється."""
-    log("🧹 Перевірка старих логів...", Colors.CYAN)
-    today_str = datetime.date.today().strftime("%Y-%m-%d")
-    deleted = 0
+    def run(self) -> dict:
+        """UA: Виконує план; повертає {фаза: результат fn()}."""
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-    # Delete part files older than 7 days
-    for f in glob.glob(os.path.join(LOG_DIR, "7zip_log_*_part*.log")):
-        fname = os.path.basename(f)
-        match = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
-        if not match:
-            continue
-        file_date = match.group(1)
-        if file_date == today_str:
-            continue
+        console = None
+        if self.manager.console:
+            console = _OrderedConsole([p["name"] for p in self._phases], parent=_OrderedConsole.current())
+        parent_stack = list(self.manager.metrics._stack)
+        results: dict = {}
+        errors: dict = {}
+        pending = list(self._phases)
+        running: dict = {}
+        if self.workers <= 1 or self.manager.serial_phases:
+            while pending:
+                phase = next((p for p in pending if all(d in results or d in errors for d in p["after"])), pending[0])
+                pending.remove(phase)
+                failed = [d for d in phase["after"] if d not in results]
+                if failed:
+                    errors[phase["name"]] = RuntimeError(f"пропущено: не виконано {', '.join(failed)}")
+                    if console:
+                        console.finish(phase["name"])
+                    continue
+                try:
+                    results[phase["name"]] = self._run_phase(phase, console, None)
+                except Exception as e:
+                    errors[phase["name"]] = e
+            pending = []  # UA: пул нижче не знадобиться
+        with ThreadPoolExecutor(max(1, self.workers), thread_name_prefix="7zip-phase") as pool:
+            while pending or running:
+                for phase in list(pending):
+                    failed = [d for d in phase["after"] if d in errors]
+                    if failed:
+                        pending.remove(phase)
+                        errors[phase["name"]] = RuntimeError(f"пропущено: не виконано {', '.join(failed)}")
+                        if console:
+                            console.finish(phase["name"])
+                    elif all(d in results for d in phase["after"]):
+                        pending.remove(phase)
+                        running[pool.submit(self._run_phase, phase, console, parent_stack)] = phase
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    phase = running.pop(future)
+                    try:
+                        results[phase["name"]] = future.result()
+                    except Exception as e:
+                        errors[phase["name"]] = e
+        for phase in self._phases:
+            if phase["name"] in errors:
+                raise errors[phase["name"]]
+        return results
 
+    def _run_phase(self, phase: dict, console: Optional[_OrderedConsole], parent_stack: Optional[list]):
+        """UA: parent_stack=None — фаза у потоці виклику (стек span-ів уже свій, не перев'язуємо)."""
+        if parent_stack is not None:
+            self.manager.metrics.bind(parent_stack)
+        previous = _OrderedConsole.bind((console, phase["name"]) if console else None)
         try:
-            file_date_obj = datetime.datetime.strptime(file_date, "%Y-%m-%d").date()
-            days_old = (datetime.date.today() - file_date_obj).days
-            if days_old > max_days:
-                os.remove(f)
-                deleted += 1
-        except ValueError:
-            continue
-
-    # Delete regular log files older than max_days
-    for f in glob.glob(os.path.join(LOG_DIR, "7zip_log_*.log")):
-        fname = os.path.basename(f)
-        match = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
-        if not match:
-            continue
-        file_date = match.group(1)
-        if file_date == today_str:
-            continue  # UA: поточний день — ніколи не видаляємо
-        try:
-            file_dt = datetime.datetime.strptime(file_date, "%Y-%m-%d").date()
-            cutoff = datetime.date.today() - datetime.timedelta(days=max_days)
-            if file_dt < cutoff:
-                os.remove(f)
-                deleted += 1
-                log(f"   🗑️ Видалено лог: {fname}", Colors.YELLOW)
-        except Exception:
-            pass
-
-    if deleted:
-        log(f"✅ Очищено логів: {deleted}", Colors.GREEN)
-    else:
-        log("✨ Старих логів немає.", Colors.GREEN)
+            if phase["span"]:
+                with self.manager.span(phase["name"]):
+                    return phase["fn"]()
+            return phase["fn"]()
+        finally:
+            _OrderedConsole.bind(previous)
+            if parent_stack is not None:
+                self.manager.metrics.bind([])
+            if console:
+                console.finish(phase["name"])
 
 # ---------------------------------------------------------------------------
-# КРОК 3: Перевірка версії та оновлення
+# ПАРСИНГ СТОРІНКИ ЗАВАНТАЖЕНЬ
 # ---------------------------------------------------------------------------
-def get_installed_version() -> str:
-    """
-    Read 7-Zip version from 7za.exe output.
-    UA: Читає версію 7-Zip з виводу 7za.exe.
-        Формат: "7-Zip (a) 26.00 (x86) : Copyright..."
-    """
-    if not os.path.exists(SEVENZIP_EXE):
-        return "0.0.0"
-    try:
-        result = subprocess.run(
-            [SEVENZIP_EXE],
-            capture_output=True, text=True, timeout=5
-        )
-        output = result.stdout or result.stderr
-        # UA: Шукаємо рядок типу "7-Zip (a) 26.00 (x86)"
-        m = re.search(r"7-Zip\s+\S+\s+([\d\.]+)", output)
-        if m:
-            return m.group(1)
-    except Exception:
-        pass
-    return "0.0.0"
+_RELEASE_VERSION_RE = re.compile(r"Download 7-Zip\s+([\d\.]+)")
+_RELEASE_EXTRA_RE   = re.compile(r'7z\d+-extra\.7z$')
+
 
-def get_latest_info() -> tuple[str, str] | tuple[None, None]:
+def _parse_release_page(html: str) -> tuple[Optional[str], Optional[str]]:
     """
-    Parse 7-zip.org/download.html to get latest version and Extra download URL.
-    UA: Парсить сторінку 7-zip.org для отримання версії та URL Extra пакету.
-        Extra пакет містить: 7za.exe, 7za.dll, 7zxa.dll, x64/, arm64/, Far/
-        URL pattern: https://www.7-zip.org/a/7z{VER}-extra.7z
+    Extract latest version and Extra href from download.html (full BeautifulSoup parse).
+    UA: Еталонний парсер (повне DOM-дерево). Робочий шлях — _scan_release_stream();
+        цей лишається для порівняння результатів і бенчмарку (bench/bench_release_page.py).
+        Повертає сирі (версія, href) — URL/fallback будує SevenZipManager._resolve_release().
     """
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-        resp = requests.get(SEVENZIP_DOWNLOAD_PAGE, headers=headers, timeout=10)
-        resp.raise_for_status()
+    from bs4 import BeautifulSoup  # type: ignore
 
-        soup = BeautifulSoup(resp.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
 
-        # UA: Шукаємо версію з заголовку "Download 7-Zip 26.00 (2026-02-12) for Windows"
-        ver_match = re.search(r"Download 7-Zip\s+([\d\.]+)", soup.get_text())
-        if not ver_match:
-            log("   ⚠️ Не вдалося знайти версію на сторінці.", Colors.YELLOW)
-            return None, None
-        latest_ver = ver_match.group(1)
+    # UA: Шукаємо версію з заголовку "Download 7-Zip 26.00 (2026-02-12) for Windows"
+    ver_match = _RELEASE_VERSION_RE.search(soup.get_text())
+    latest_ver = ver_match.group(1) if ver_match else None
 
-        # UA: Шукаємо посилання на Extra пакет (7z{VER}-extra.7z)
-        extra_url: str | None = None
-        for a in soup.find_all('a', href=True):
+    # UA: Шукаємо посилання на Extra пакет (7z{VER}-extra.7z)
+    href: Optional[str] = None
+    for a in soup.find_all('a', href=True):
+        if _RELEASE_EXTRA_RE.search(str(a['href'])):
             href = str(a['href'])
-            if re.search(r'7z\d+-extra\.7z$', href):
-                # UA: href може бути відносним (a/7z2600-extra.7z) або абсолютним
-                if href.startswith('http'):
-                    extra_url = href
-                else:
-                    extra_url = SEVENZIP_BASE_URL + href.lstrip('/')
-                break
+            break
 
-        if not extra_url:
-            # UA: Fallback — будуємо URL з версії (26.00 → 2600)
-            ver_parts = latest_ver.split('.')
-            ver_code = f"{int(ver_parts[0]) * 100 + int(ver_parts[1]):04d}"
-            extra_url = f"{SEVENZIP_BASE_URL}a/7z{ver_code}-extra.7z"
-            log(f"   ℹ️  Extra URL побудовано з версії: {extra_url}", Colors.CYAN)
+    return latest_ver, href
 
-        return latest_ver, extra_url
 
-    except Exception as e:
-        log(f"   ⚠️ Помилка запиту до 7-zip.org: {e}", Colors.YELLOW)
-        return None, None
+class _ReleasePageScanner(HTMLParser):
+    """Incremental download.html scanner with early exit.
+    UA: Потоковий сканер сторінки завантажень: не будує DOM, тримає лише хвіст
+        тексту (для regex версії) і зупиняється, щойно знайдено версію та Extra href.
+        Семантика як у BeautifulSoup: текст без <script>/<style>, перший <a href> з Extra."""
 
-def check_and_update() -> None:
-    """
-    Check 7-zip.org for new Extra release and update if needed.
-    UA: Перевіряє 7-zip.org на нову версію Extra пакету.
-        Якщо є — завантажує .7z, розпаковує поверх apps/7zip/,
-        видаляє завантажений архів.
-        Використовує вже встановлений 7za.exe для розпакування.
-    """
-    cprint("-" * 50, Colors.BLUE)
-    log("🌍 ПЕРЕВІРКА ОНОВЛЕНЬ (7-zip.org)", Colors.HEADER)
+    _TEXT_TAIL = 256  # UA: довжина хвоста тексту — з запасом більша за "Download 7-Zip NN.NN"
 
-    current_ver = get_installed_version()
-    log(f"   ℹ️  Встановлена версія: {current_ver}", Colors.CYAN)
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.version: Optional[str] = None
+        self.extra_href: Optional[str] = None
+        self._text = ""
+        self._skip_tag: Optional[str] = None
 
-    latest_ver, extra_url = get_latest_info()
-    if not latest_ver or not extra_url:
-        log("   ⚠️ Не вдалося отримати інформацію про останню версію.", Colors.YELLOW)
-        return
+    @property
+    def done(self) -> bool:
+        """Both version and Extra href found. UA: Усе знайдено — можна зупинити читання."""
+        return self.version is not None and self.extra_href is not None
 
-    log(f"   ℹ️  Остання версія:     {latest_ver}", Colors.CYAN)
-    log(f"   ℹ️  Extra URL:          {extra_url}", Colors.CYAN)
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in ("script", "style"):
+            self._skip_tag = tag
+        elif tag == "a" and self.extra_href is None:
+            for name, value in attrs:
+                if name == "href" and value and _RELEASE_EXTRA_RE.search(value):
+                    self.extra_href = value
+                    break
 
-    if current_ver != "0.0.0" and version.parse(latest_ver) <= version.parse(current_ver):
-        log("   ✅ Версія актуальна.", Colors.GREEN)
-        return
+    def handle_endtag(self, tag: str) -> None:
+        if tag == self._skip_tag:
+            self._skip_tag = None
 
-    log(f"🚀 Знайдено нову версію {latest_ver}! Починаю завантаження...", Colors.HEADER)
+    def handle_data(self, data: str) -> None:
+        if self.version is not None or self._skip_tag:
+            return
+        self._text += data
+        m = _RELEASE_VERSION_RE.search(self._text)
+        # UA: Збіг у самому кінці може бути обрізаним на межі chunk-а ("26.0" + "0") — чекаємо далі
+        if m and m.end() < len(self._text):
+            self.version = m.group(1)
+            self._text = ""
+            return
+        self._text = self._text[-self._TEXT_TAIL:]
 
-    archive_name = extra_url.split('/')[-1]  # UA: напр. 7z2600-extra.7z
-    save_path = os.path.join(DOWNLOADS_DIR, archive_name)
-    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+    def close(self) -> None:
+        super().close()
+        if self.version is None:
+            m = _RELEASE_VERSION_RE.search(self._text)
+            if m:
+                self.version = m.group(1)
 
-    log(f"   ⬇️  URL: {extra_url}", Colors.BLUE)
-    log(f"   💾 Збереження: {archive_name}", Colors.BLUE)
 
+def _scan_release_stream(chunks: Iterable[bytes], encoding: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
+    """
+    Scan download.html chunk by chunk, stop as soon as version and Extra href are known.
+    UA: Потоковий аналог _parse_release_page(): ті самі (версія, href),
+        але без повного DOM і без дочитування решти сторінки.
+    """
     try:
-        _download_with_progress(extra_url, save_path)
-    except Exception as e:
-        log(f"   ❌ Помилка завантаження: {e}", Colors.RED)
-        return
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scanner = _ReleasePageScanner()
+    for chunk in chunks:
+        scanner.feed(decoder.decode(chunk))
+        if scanner.done:
+            break
+    else:
+        scanner.feed(decoder.decode(b"", final=True))
+        scanner.close()
+    return scanner.version, scanner.extra_href
 
-    log("   ⚙️  Розпакування поверх apps/7zip/...", Colors.BLUE)
-    try:
-        _extract_extra_archive(save_path, SEVENZIP_DIR)
-    except Exception as e:
-        log(f"   ❌ Помилка розпакування: {e}", Colors.RED)
-        return
+# ---------------------------------------------------------------------------
+# СХОВИЩЕ АРХІВІВ (content-addressed)
+# ---------------------------------------------------------------------------
+class _RangeHasher:
+    """Sequential SHA-256 of a file whose ranges are written out of order.
+    UA: SHA-256 «на льоту»: байти, що йдуть по порядку, хешуються прямо з пам'яті
+        (без другого проходу); ділянки, записані іншими сегментами наперед,
+        дочитуються з файлу (page cache) один раз, коли курсор до них доходить.
+        ranges — спільний зі завантажувачем список [start, end, записано]; None — один потік.
+        Власний замок, без очікування: хешує той сегмент, що його захопив; решта не чекає —
+        їхні chunk-и вже на диску і будуть дочитані (замок завантажувача під час хешування не тримається)."""
 
-    # UA: Видаляємо завантажений архів
-    try:
-        os.remove(save_path)
-        log(f"   🗑️  Архів видалено: {archive_name}", Colors.YELLOW)
-    except Exception:
-        pass
+    def __init__(self, path: str, ranges: Optional[list] = None):
+        self.path = path
+        self.ranges = ranges
+        self.pos = 0
+        self._sha = hashlib.sha256()
+        self._lock = threading.Lock()
 
-    new_ver = get_installed_version()
-    log(f"   ✅ Оновлення встановлено! Версія: {new_ver}", Colors.GREEN)
+    def feed(self, offset: int, data: bytes) -> None:
+        """Account chunk written at offset. UA: Chunk на позиції курсора — одразу в хеш."""
+        if not self._lock.acquire(blocking=False):
+            return  # UA: хешує інший потік; цей chunk уже записаний — дочитається з файлу
+        try:
+            if offset == self.pos:
+                self._sha.update(data)
+                self.pos += len(data)
+            self._catch_up()
+        finally:
+            self._lock.release()
 
-def _download_with_progress(url: str, save_path: str) -> None:
-    """
-    Download file with progress bar (follows redirects).
-    UA: Завантажує файл з відображенням прогресу.
-    """
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-    with requests.get(url, stream=True, timeout=120, allow_redirects=True, headers=headers) as r:
-        r.raise_for_status()
-        total = int(r.headers.get("content-length", 0))
-        downloaded = 0
-        with open(save_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=65536):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total > 0:
-                    draw_progress("   Download", int(downloaded * 100 / total))
-    print("")
-
-def _extract_extra_archive(archive_path: str, target_dir: str) -> None:
-    """
-    Extract 7-Zip Extra .7z archive using the existing 7za.exe.
-    UA: Розпаковує Extra архів поверх apps/7zip/ за допомогою поточного 7za.exe.
-        Використовуємо тимчасову папку, потім копіюємо файли — щоб уникнути
-        конфлікту "оновлення себе" (7za.exe не можна перезаписати поки він запущений).
-    """
-    # UA: Розпаковуємо у тимчасову папку
-    tmp_dir = tempfile.mkdtemp(prefix="7zip_update_")
-    try:
-        log(f"   📂 Тимчасова папка: {tmp_dir}", Colors.CYAN)
+    def catch_up(self) -> None:
+        """Hash already-written bytes right after the cursor. UA: Дочитує записане наперед."""
+        with self._lock:
+            self._catch_up()
 
-        # UA: Використовуємо поточний 7za.exe для розпакування
-        cmd = [SEVENZIP_EXE, "x", archive_path, f"-o{tmp_dir}", "-y", "-bsp1"]
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, encoding='utf-8', errors='ignore'
-        )
-        last_pct = -1
-        while True:
-            line = process.stdout.readline() if process.stdout else ""  # type: ignore[union-attr]
-            if not line and process.poll() is not None:
+    def _catch_up(self) -> None:
+        if not self.ranges:
+            return
+        for start, end, written in sorted(self.ranges):
+            stop = start + written
+            if self.pos < start:
+                break
+            if self.pos < stop:
+                with open(self.path, "rb") as f:
+                    f.seek(self.pos)
+                    while self.pos < stop:
+                        block = f.read(min(DOWNLOAD_CHUNK * 16, stop - self.pos))
+                        if not block:
+                            return
+                        self._sha.update(block)
+                        self.pos += len(block)
+            if self.pos <= end:
                 break
-            if line:
-                m = re.search(r"\s(\d+)%", line)
-                if m:
-                    pct = int(m.group(1))
-                    if pct != last_pct:
-                        draw_progress("   Розпакування", pct)
-                        last_pct = pct
-        print("")
 
-        if process.returncode != 0:
-            raise RuntimeError(f"7za.exe повернув код {process.returncode}")
+    def hexdigest(self) -> str:
+        self.catch_up()
+        return self._sha.hexdigest()
 
-        # UA: Копіюємо файли з тимчасової папки у apps/7zip/
-        # Структура Extra архіву: файли лежать у корені (без підпапки з версією)
-        _copy_extracted_files(tmp_dir, target_dir)
 
-    finally:
-        # UA: Завжди видаляємо тимчасову папку
+class ArchiveStore:
+    """Content-addressed archive store with LRU, size- and count-capped eviction.
+    UA: Сховище архівів: файли <sha256>.7z + index.json (SHA → розмір/ім'я/last_used,
+        версія → SHA, URL → SHA). Дає змогу перевстановлювати/ремонтувати або ставити
+        у ще один корінь без повторного завантаження. Витіснення — найдавніше використані,
+        поки не вкладемося в max_bytes і max_items. Перше звернення до об'єкта за життя
+        екземпляра (запуск / дзеркало) перевіряє SHA-256 вмісту, а не лише розмір."""
+
+    def __init__(self, root: str, max_bytes: int = STORE_MAX_MB * 1024 * 1024, max_items: int = STORE_MAX_ITEMS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.RLock()  # UA: index.json — спільний для потоків (дзеркало --serve)
+        self._verified: set = set()     # UA: SHA, вміст яких уже звірено в цьому запуску
+
+    def _load_index(self) -> dict:
         try:
-            shutil.rmtree(tmp_dir, ignore_errors=True)
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
         except Exception:
-            pass
+            index = {}
+        for key in ("objects", "versions", "urls"):
+            index.setdefault(key, {})
+        return index
 
-def _copy_extracted_files(src_dir: str, dst_dir: str) -> None:
-    """
-    Copy extracted files to target directory, overwriting existing.
-    UA: Копіює розпаковані файли у цільову папку, перезаписуючи існуючі.
-        7za.exe не можна перезаписати поки він запущений — але ми вже завершили
-        розпакування, тому копіювання безпечне.
-    """
-    os.makedirs(dst_dir, exist_ok=True)
-    copied = 0
-    for item in os.listdir(src_dir):
-        src = os.path.join(src_dir, item)
-        dst = os.path.join(dst_dir, item)
-        try:
-            if os.path.isdir(src):
-                if os.path.exists(dst):
-                    shutil.rmtree(dst)
-                shutil.copytree(src, dst)
-            else:
-                shutil.copy2(src, dst)
-            copied += 1
-        except Exception as e:
-            log(f"   ⚠️ Не вдалося скопіювати {item}: {e}", Colors.YELLOW)
-    log(f"   📋 Скопійовано елементів: {copied}", Colors.CYAN)
+    def _save_index(self, index: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, f"{sha256}.7z")
+
+    def lookup(self, version: Optional[str] = None, url: Optional[str] = None,
+               sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Find stored archive by SHA-256, URL or version; touch LRU. Return path or None.
+        UA: Пошук за SHA, URL (точніше) або версією; зниклий/обрізаний/пошкоджений файл — видаляється
+            з індексу (None → викликач качає заново). SHA-256 вмісту звіряється при першому зверненні.
+        """
+        with self._lock:
+            return self._lookup(version, url, sha256)
+
+    def _lookup(self, version: Optional[str], url: Optional[str], sha256: Optional[str] = None) -> Optional[str]:
+        index = self._load_index()
+        sha = sha256 or index["urls"].get(url or "") or index["versions"].get(version or "")
+        if not sha:
+            return None
+        meta = index["objects"].get(sha)
+        if meta is None and sha256:
+            return None  # UA: невідомий SHA (напр. з маніфесту) — у сховищі нічого не чіпаємо
+        path = self.object_path(sha)
+        try:
+            ok = meta is not None and os.path.getsize(path) == meta["size"]
+            if ok and sha not in self._verified:
+                ok = _file_sha256(path) == sha  # UA: той самий розмір ще не означає той самий вміст
+        except OSError:
+            ok = False
+        if not ok:
+            self._forget(index, sha)
+            self._save_index(index)
+            return None
+        self._verified.add(sha)
+        meta["last_used"] = time.time()
+        self._save_index(index)
+        return path
+
+    def put(self, path: str, sha256: str, version: Optional[str] = None, url: Optional[str] = None) -> tuple[str, list]:
+        """
+        Move downloaded file into the store under its SHA-256; evict over limits.
+        UA: Переносить файл у сховище (rename у межах тому) та індексує.
+            Повертає (шлях у сховищі, список витіснених SHA).
+        """
+        with self._lock:
+            return self._put(path, sha256, version, url)
+
+    def _put(self, path: str, sha256: str, version: Optional[str], url: Optional[str]) -> tuple[str, list]:
+        os.makedirs(self.root, exist_ok=True)
+        dest = self.object_path(sha256)
+        if sha256 in self._verified and os.path.exists(dest):
+            os.remove(path)  # UA: такий вміст уже є (звірений) — дублікат не потрібен
+        else:
+            os.replace(path, dest)
+        self._verified.add(sha256)  # UA: SHA пораховано під час завантаження
+        index = self._load_index()
+        index["objects"][sha256] = {
+            "size": os.path.getsize(dest),
+            "name": os.path.basename(path),
+            "last_used": time.time(),
+        }
+        if version:
+            index["versions"][version] = sha256
+        if url:
+            index["urls"][url] = sha256
+        evicted = self._evict(index, keep=sha256)
+        self._save_index(index)
+        return dest, evicted
+
+    def _evict(self, index: dict, keep: str) -> list:
+        """UA: LRU-витіснення понад max_bytes / max_items (keep — ніколи)."""
+        objects = index["objects"]
+        evicted = []
+        for sha in sorted(objects, key=lambda k: objects[k].get("last_used", 0)):
+            total = sum(o["size"] for o in objects.values())
+            if total <= self.max_bytes and len(objects) <= self.max_items:
+                break
+            if sha == keep:
+                continue
+            self._forget(index, sha)
+            evicted.append(sha)
+        return evicted
+
+    def _forget(self, index: dict, sha256: str) -> None:
+        """UA: Видаляє об'єкт і всі посилання на нього з індексу та диска."""
+        index["objects"].pop(sha256, None)
+        for key in ("versions", "urls"):
+            for name in [k for k, v in index[key].items() if v == sha256]:
+                del index[key][name]
+        try:
+            os.remove(self.object_path(sha256))
+        except FileNotFoundError:
+            pass
 
 # ---------------------------------------------------------------------------
-# MAIN
+# LAN-ДЗЕРКАЛО (--serve)
 # ---------------------------------------------------------------------------
-def main() -> None:
-    """Main entry point. UA: Головна функція менеджера."""
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print("\n")
-    cprint("=" * 50, Colors.HEADER)
-    cprint(f"🚀 MNT: 7-ZIP EXTRA (AUTO-PILOT v{__version__})", Colors.HEADER)
-    cprint(f"   Hash: {get_manager_hash()}", Colors.BLUE)
-    cprint("=" * 50 + "\n", Colors.HEADER)
+_MIRROR_ARCHIVE_RE = re.compile(r"7z(\d{3,4})-extra\.7z")
+_MIRROR_RANGE_RE   = re.compile(r"bytes=(\d*)-(\d*)$")
 
-    if not os.path.exists(SEVENZIP_EXE):
-        log(f"❌ 7za.exe не знайдено: {SEVENZIP_EXE}", Colors.RED)
-        input("Enter для виходу...")
-        sys.exit(1)
 
-    try:
-        # UA: Крок 1 — перевірка PATH (до будь-яких мережевих операцій)
-        ensure_in_system_path()
+class _UpstreamUnavailable(Exception):
+    """Mirror could not fetch the current archive. UA: Дзеркало не змогло завантажити архів (502)."""
 
-        # UA: Крок 2 — ротація логів (7 днів; >50 MB → part-файл)
-        cleanup_old_logs(max_days=7)
 
-        # UA: Крок 3 — перевірка та оновлення
-        check_and_update()
+class MirrorServer:
+    """Caching HTTP mirror of 7-zip.org for the Extra archive.
+    UA: /download.html — мінімальна сумісна сторінка (версія + посилання a/7zNNNN-extra.7z);
+        /a/7zNNNN-extra.7z — архів зі сховища менеджера (Range, ETag = SHA-256, If-Range).
+        З upstream качається лише поточна версія (та, що в download.html) — одне завантаження
+        через fetch_archive(); паралельні запити того самого файлу чекають на нього (coalescing).
+        Інші версії — лише якщо вже є у сховищі, інакше 404 (клієнти не засмічують сховище).
+        Клієнтам достатньо SEVENZIP_DOWNLOAD_PAGE / SEVENZIP_BASE_URL на дзеркало."""
 
-    except Exception as e:
-        log(f"❌ Критична помилка: {e}", Colors.RED)
-        input("Enter для виходу...")
-        sys.exit(1)
+    def __init__(self, manager: "SevenZipManager", host: str = MIRROR_HOST, port: int = MIRROR_PORT):
+        from http.server import ThreadingHTTPServer
 
-    elapsed = time.time() - START_TIME
-    cprint("-" * 50, Colors.BLUE)
-    cprint(f"⏱️  Час виконання: {elapsed:.1f} сек", Colors.BLUE)
-    print("\n")
+        self.manager = manager
+        self.stats = {"requests": 0, "upstream_fetches": 0, "bytes_sent": 0}
+        self._stats_lock = threading.Lock()  # UA: лічильники оновлюють потоки обробників
+        self._lock = threading.Lock()    # UA: лише короткі зміни словника in-flight
+        self._release_lock = threading.Lock()  # UA: get_latest_info() — один запит upstream за раз
+        self._inflight: dict = {}        # UA: ім'я архіву → Lock завантаження (лише поки качається)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        if host in ("0.0.0.0", "::"):
+            import socket
+            host = socket.gethostname()
+        return f"http://{host}:{port}/"
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def start(self) -> str:
+        """Serve in a background thread. UA: Запуск у фоновому потоці (бібліотека/бенчмарки)."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="7zip-mirror", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def release(self) -> tuple[str, str] | tuple[None, None]:
+        """UA: Остання версія upstream (кеш релізу менеджера, RELEASE_CACHE_TTL).
+            Окремий замок: повільний запит upstream при холодному кеші не блокує _inflight; паралельні
+            запити чекають на нього і беруть щойно оновлений кеш."""
+        with self._release_lock:
+            return self.manager.get_latest_info()
+
+    def index_html(self) -> Optional[bytes]:
+        """UA: download.html для клієнтів: рядок версії + відносне посилання на Extra архів."""
+        latest_ver, extra_url = self.release()
+        if not latest_ver or not extra_url:
+            return None
+        name = extra_url.rsplit("/", 1)[-1]
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>7-Zip mirror</title></head><body>\n"
+            f"<h1>Download 7-Zip {latest_ver} for Windows</h1>\n"
+            f"<p><a href=\"a/{name}\">{name}</a> (mirror of {extra_url})</p>\n"
+            "</body></html>\n"
+        ).encode("utf-8")
+
+    def count(self, key: str, n: int = 1) -> None:
+        """UA: Потокобезпечне збільшення лічильника stats."""
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def archive(self, name: str) -> Optional[str]:
+        """
+        Path of the archive in the store, fetching only the current upstream version, at most once.
+        UA: None — такого архіву дзеркало не віддає (404): не поточна версія і немає у сховищі.
+            Перший запит поточної версії качає (під замком імені), решта чекає і бере файл зі
+            сховища; замок прибирається після завантаження. Невдача — _UpstreamUnavailable (502).
+        """
+        m = _MIRROR_ARCHIVE_RE.fullmatch(name)
+        if not m:
+            return None
+        code = m.group(1)
+        version = f"{int(code[:-2])}.{code[-2:]}"
+        store = self.manager.store
+        stored = store.lookup(version=version)
+        if stored:
+            return stored
+        latest_ver, extra_url = self.release()
+        if not extra_url or extra_url.rsplit("/", 1)[-1] != name:
+            return None  # UA: довільні старі версії з upstream не качаємо
+        with self._lock:
+            lock = self._inflight.setdefault(name, threading.Lock())
+        try:
+            with lock:
+                stored = store.lookup(version=latest_ver, url=extra_url)  # UA: інший запит уже завантажив
+                if stored:
+                    return stored
+                self.count("upstream_fetches")
+                self.manager.log(f"🌐 Дзеркало: {name} — завантаження з upstream", Colors.BLUE)
+                stored = self.manager.fetch_archive(latest_ver, extra_url)
+        finally:
+            with self._lock:
+                if self._inflight.get(name) is lock:
+                    del self._inflight[name]
+        if not stored:
+            raise _UpstreamUnavailable(name)
+        return stored
+
+    def _handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+        import email.utils
+
+        mirror = self
+        logger = self.manager.logger
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):
+                logger.info("Дзеркало: %s %s", self.address_string(), fmt % args)
+
+            def do_HEAD(self):
+                self._dispatch(head=True)
+
+            def do_GET(self):
+                self._dispatch(head=False)
+
+            def _dispatch(self, head: bool) -> None:
+                mirror.count("requests")
+                path = self.path.split("?", 1)[0]
+                try:
+                    if path in ("/", "/download.html"):
+                        body = mirror.index_html()
+                        if body is None:
+                            return self._empty(502)
+                        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                        self._send_bytes(body, etag, "text/html; charset=utf-8", head)
+                    elif path.startswith("/a/"):
+                        stored = mirror.archive(path[3:])
+                        if stored is None:
+                            return self._empty(404)
+                        self._send_file(stored, head)
+                    else:
+                        self._empty(404)
+                except _UpstreamUnavailable:
+                    self._empty(502)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # UA: клієнт закрив з'єднання (напр. скасований сегмент)
+
+            def _empty(self, status: int, headers: Optional[dict] = None) -> None:
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _send_bytes(self, body: bytes, etag: str, content_type: str, head: bool) -> None:
+                if self.headers.get("If-None-Match") == etag:
+                    return self._empty(304, {"ETag": etag})
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def _send_file(self, path: str, head: bool) -> None:
+                st = os.stat(path)
+                size = st.st_size
+                etag = '"' + os.path.splitext(os.path.basename(path))[0] + '"'  # UA: ім'я у сховищі = SHA-256
+                last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+                if self.headers.get("If-None-Match") == etag:
+                    return self._empty(304, {"ETag": etag})
+
+                start, end, status = 0, size - 1, 200
+                m = _MIRROR_RANGE_RE.match(self.headers.get("Range", ""))
+                if_range = self.headers.get("If-Range")
+                if m and (m.group(1) or m.group(2)) and if_range in (None, etag, last_modified):
+                    if m.group(1):
+                        start = int(m.group(1))
+                        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+                    else:
+                        start = max(0, size - int(m.group(2)))
+                    if start >= size or start > end:
+                        return self._empty(416, {"Content-Range": f"bytes */{size}"})
+                    status = 206
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-7z-compressed")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.end_headers()
+                if head:
+                    return
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = f.read(min(MIRROR_CHUNK, remaining))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+                        mirror.count("bytes_sent", len(chunk))
+
+        return Handler
+
+
+# ---------------------------------------------------------------------------
+# ПРОЦЕС 7za (неблокуючий насос виводу)
+# ---------------------------------------------------------------------------
+_7ZA_PERCENT_RE = re.compile(r"(\d{1,3})%")
+_7ZA_REDRAW_RE = re.compile(r"[\b\r\n]+")
+
+
+class SevenZipProcess:
+    """Run 7za without blocking on its output: chunked pump, progress, timeouts, cancellation.
+    UA: 7za з -bsp1 перемальовує відсотки backspace-ами, без "\\n" — readline() чекав би до кінця.
+        Потік-читач бере з pipe шматки (os.read — скільки є), головний потік чекає на черзі
+        з дедлайнами: загальний timeout і idle_timeout (тиша у виводі). Відсотки розбираються
+        «на льоту» (on_percent), хвіст виводу (tail_chars) — для повідомлень про помилку.
+        Скасування (cancel Event / cancel() / виняток, напр. Ctrl+C) пересилається процесу:
+        SIGINT (Windows — CTRL_BREAK) → за SEVENZIP_KILL_GRACE с — kill.
+        Після run(): returncode, percent, reason (None / "timeout" / "idle" / "cancelled")."""
+
+    def __init__(self, cmd: list, timeout: Optional[float] = None, idle_timeout: Optional[float] = None,
+                 cancel: Optional[threading.Event] = None, on_percent=None, tail_chars: int = SEVENZIP_TAIL):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.cancel_event = cancel
+        self.on_percent = on_percent
+        self.tail_chars = tail_chars
+        self.returncode: Optional[int] = None
+        self.percent = -1
+        self.reason: Optional[str] = None
+        self.tail = ""
+        self._carry = ""
+        self._queue = None  # UA: SimpleQueue шматків виводу (створюється в run())
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def cancel(self) -> None:
+        """UA: Скасувати з іншого потоку (будить цикл run() одразу)."""
+        self.reason = self.reason or "cancelled"
+        if self._queue is not None:
+            self._queue.put(b"")
+
+    def run(self) -> int:
+        """UA: Запуск до завершення / таймауту / скасування; повертає код виходу процесу."""
+        import queue
+
+        self._queue = queue.SimpleQueue()
+        kwargs: dict = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP  # UA: для CTRL_BREAK_EVENT
+        process = subprocess.Popen(
+            self.cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, **kwargs
+        )
+        reader = threading.Thread(target=self._pump, args=(process.stdout,), name="7za_pump", daemon=True)
+        reader.start()
+        try:
+            self._drain(process)
+        except BaseException:
+            self.reason = self.reason or "cancelled"  # UA: Ctrl+C / помилка — не лишаємо 7za сиротою
+            raise
+        finally:
+            if self.reason:
+                self._stop(process)
+            try:
+                self.returncode = process.wait(timeout=SEVENZIP_KILL_GRACE)
+            except subprocess.TimeoutExpired:
+                process.kill()  # UA: закрив stdout, але не завершується
+                self.returncode = process.wait()
+            reader.join(1)
+            while not self._queue.empty():  # UA: вивід після зупинки (повідомлення 7za про причину)
+                self._feed(self._decoder.decode(self._queue.get() or b""))
+            if process.stdout:
+                process.stdout.close()
+        return self.returncode
+
+    def _drain(self, process: subprocess.Popen) -> None:
+        """UA: Чекає на шматки виводу з дедлайнами; виходить на EOF або з reason."""
+        import queue
+
+        started = last_output = time.monotonic()
+        while not self.reason:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                self.reason = "cancelled"
+                break
+            now = time.monotonic()
+            deadlines = {}
+            if self.timeout:
+                deadlines["timeout"] = started + self.timeout - now
+            if self.idle_timeout:
+                deadlines["idle"] = last_output + self.idle_timeout - now
+            expired = [name for name, left in deadlines.items() if left <= 0]
+            if expired:
+                self.reason = expired[0]
+                break
+            wait = min(deadlines.values()) if deadlines else None
+            if self.cancel_event is not None:
+                wait = min(wait or SEVENZIP_CANCEL_POLL, SEVENZIP_CANCEL_POLL)
+            try:
+                chunk = self._queue.get(timeout=wait)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                self._feed(self._decoder.decode(b"", final=True))
+                return
+            if chunk:
+                last_output = time.monotonic()
+                self._feed(self._decoder.decode(chunk))
+
+    def _pump(self, pipe) -> None:
+        """UA: Потік-читач: шматки з pipe у чергу (None — EOF)."""
+        try:
+            fd = pipe.fileno()
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                self._queue.put(chunk)
+        except (OSError, ValueError):
+            pass
+        self._queue.put(None)
+
+    def _feed(self, text: str) -> None:
+        """UA: Відсотки з перемальованих фрагментів (монотонно) + хвіст виводу."""
+        if not text:
+            return
+        self.tail = (self.tail + text)[-self.tail_chars:]
+        pieces = _7ZA_REDRAW_RE.split(self._carry + text)
+        self._carry = pieces[-1][-256:]  # UA: незавершений фрагмент — доповниться наступним шматком
+        for piece in pieces:
+            m = _7ZA_PERCENT_RE.search(piece)
+            if m and self.percent < int(m.group(1)) <= 100:
+                self.percent = int(m.group(1))
+                if self.on_percent:
+                    self.on_percent(self.percent)
+
+    @staticmethod
+    def _stop(process: subprocess.Popen) -> None:
+        """UA: М'яка зупинка (7za прибирає за собою), за SEVENZIP_KILL_GRACE с — kill."""
+        import signal
+        if process.poll() is not None:
+            return
+        try:
+            process.send_signal(signal.CTRL_BREAK_EVENT if os.name == "nt" else signal.SIGINT)
+            process.wait(timeout=SEVENZIP_KILL_GRACE)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            process.kill()
+
+    def output_tail(self, lines: int = 8) -> str:
+        """UA: Останні рядки виводу без кадрів прогресу (для повідомлення про помилку)."""
+        text = [line.strip() for line in _7ZA_REDRAW_RE.split(self.tail)]
+        return " | ".join([line for line in text if line and not re.match(r"\d{1,3}%(\s|$)", line)][-lines:])
+
+
+# ---------------------------------------------------------------------------
+# SINGLE-FLIGHT (міжпроцесне блокування запуску)
+# ---------------------------------------------------------------------------
+class RunLock:
+    """Inter-process single-flight lock with a readable run state.
+    UA: Ексклюзивне блокування ОС (fcntl.flock / msvcrt.locking) на lock-файлі: якщо процес
+        помер, ОС знімає його сама — «завислих» lock-файлів не буває. Стан поточного/останнього
+        запуску — окремий JSON (на Windows заблокований байт lock-файлу не читається):
+        {status: running|finished, pid, host, action, phase, started, finished, ok, ...}.
+        Стан "running" при вільному блокуванні = попередній запуск перервано (stale)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state_path = os.path.splitext(path)[0] + ".state.json"
+        self.previous: dict = {}   # UA: стан, який лишив попередній власник (до нашого acquire)
+        self.stale = False
+        self._fd: Optional[int] = None
+        self._state: dict = {}
+        self._lock = threading.Lock()  # UA: фази пишуть стан з потоків планувальника
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def _try_lock(self) -> bool:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def acquire(self, wait: bool = True, timeout: Optional[float] = None, poll: float = 0.5, **state) -> bool:
+        """
+        Take the lock (optionally waiting); record our run as "running".
+        UA: wait=False — одна спроба; timeout — скільки чекати (None — без обмеження).
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self._try_lock():
+            if not wait or (deadline is not None and time.time() >= deadline):
+                return False
+            time.sleep(poll)
+        self.previous = self.read()
+        self.stale = self.previous.get("status") == "running"
+        import socket
+        self._state = {}
+        self.update(status="running", pid=os.getpid(), host=socket.gethostname(), started=time.time(), **state)
+        return True
+
+    def read(self) -> dict:
+        """UA: Стан запуску з JSON ({} — немає або читається саме під час заміни)."""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def update(self, **fields) -> None:
+        """UA: Оновлює стан (фаза тощо) — атомарно (tmp → replace). Лише власник блокування."""
+        if not self.held:
+            return
+        with self._lock:
+            self._state.update(fields)
+            try:
+                tmp_path = self.state_path + f".{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.state_path)
+            except OSError:
+                pass  # UA: стан — інформаційний; блокування тримається незалежно від нього
+
+    def release(self, **result) -> None:
+        """UA: Записує результат (status=finished) і знімає блокування."""
+        if not self.held:
+            return
+        self.update(status="finished", finished=time.time(), phase=None, **result)
+        fd, self._fd = self._fd, None
+        try:
+            if os.name == "nt":
+                import msvcrt
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+# ---------------------------------------------------------------------------
+# МЕНЕДЖЕР (бібліотечний API)
+# ---------------------------------------------------------------------------
+class _RangeNotSupported(Exception):
+    """Server refused byte ranges. UA: Сервер не підтримує Range — падаємо на один потік."""
+
+
+class SevenZipManager:
+    """7-Zip Extra manager bound to one install root.
+    UA: Менеджер 7-Zip Extra для одного кореня встановлення.
+        Конфігурація: аргументи конструктора → .env → auto-detect від CAPSULE_ROOT.
+        Створення екземпляра не торкається мережі, логів і консолі — лише читає .env;
+        тому в одному процесі-оркестраторі можна тримати скільки завгодно менеджерів.
+        console=False — тиха робота (лише logging), для бібліотечного використання.
+    """
+
+    def __init__(
+        self,
+        sevenzip_dir: Optional[str] = None,
+        log_dir: Optional[str] = None,
+        downloads_dir: Optional[str] = None,
+        pwsh_exe: Optional[str] = None,
+        download_page: Optional[str] = None,
+        base_url: Optional[str] = None,
+        capsule_root: Optional[str] = None,
+        env: Optional[dict] = None,
+        console: bool = True,
+    ):
+        self.env = _load_env() if env is None else env
+        env = self.env
+        self.capsule_root = capsule_root or CAPSULE_ROOT
+        root = self.capsule_root
+
+        # Шляхи: з аргументів, .env або auto-detect від CAPSULE_ROOT
+        self.sevenzip_dir  = sevenzip_dir  or env.get("SEVENZIP_DIR")  or os.path.join(root, "apps", "7zip")
+        self.log_dir       = log_dir       or env.get("LOG_DIR")       or os.path.join(root, "logs", "7ziplog")
+        self.downloads_dir = downloads_dir or env.get("DOWNLOADS")     or os.path.join(root, "downloads")
+        self.pwsh_exe      = pwsh_exe      or env.get("PWSH_EXE")      or os.path.join(root, "apps", "pwsh", "pwsh.exe")
+
+        self.download_page = download_page or env.get("SEVENZIP_DOWNLOAD_PAGE") or SEVENZIP_DOWNLOAD_PAGE
+        self.base_url      = base_url      or env.get("SEVENZIP_BASE_URL")      or SEVENZIP_BASE_URL
+
+        # UA: Кеш метаданих релізу (ETag/Last-Modified + версія + Extra URL) поруч з логами.
+        #     TTL — скільки секунд відповідь вважається свіжою без жодного запиту.
+        self.release_cache_file = env.get("RELEASE_CACHE_FILE") or os.path.join(self.log_dir, "7zip_release_cache.json")
+        self.release_cache_ttl  = _env_int(env, "RELEASE_CACHE_TTL", RELEASE_CACHE_TTL)
+        self.release_cache_stats = {"hits": 0, "misses": 0}
+        self.release_sources = [
+            src.strip() for src in (env.get("RELEASE_SOURCES") or RELEASE_SOURCES).split(",") if src.strip()
+        ] or ["official"]
+        self.release_hedge_delay = float(env.get("RELEASE_HEDGE_DELAY") or RELEASE_HEDGE_DELAY)
+        self.release_hedge_timeout = float(env.get("RELEASE_HEDGE_TIMEOUT") or RELEASE_HEDGE_TIMEOUT)
+        self.release_source: Optional[str] = None
+
+        self.version_cache_file = env.get("VERSION_CACHE_FILE") or os.path.join(self.log_dir, "7zip_version_cache.json")
+        self.version_probe = (env.get("VERSION_PROBE") or VERSION_PROBE).strip().lower()
+        self._version_cache: Optional[dict] = None
+        self._version_lock = threading.RLock()  # UA: кеш версій спільний для потоків fleet-режиму
+
+        # UA: DOWNLOAD_SEGMENTS=1 вимикає сегментоване завантаження
+        self.download_segments = max(1, _env_int(env, "DOWNLOAD_SEGMENTS", DOWNLOAD_SEGMENTS))
+        self._session: Optional["requests.Session"] = None
+        self.http_timeout = (
+            _env_int(env, "HTTP_CONNECT_TIMEOUT", HTTP_CONNECT_TIMEOUT),
+            _env_int(env, "HTTP_READ_TIMEOUT", HTTP_READ_TIMEOUT),
+        )
+        self.http_retries = _env_int(env, "HTTP_RETRIES", HTTP_RETRIES)
+
+        self.install_mode = (env.get("INSTALL_MODE") or INSTALL_MODE).strip().lower()
+        self.sevenzip_timeout = _env_int(env, "SEVENZIP_TIMEOUT", SEVENZIP_TIMEOUT)
+        self.sevenzip_idle_timeout = _env_int(env, "SEVENZIP_IDLE_TIMEOUT", SEVENZIP_IDLE_TIMEOUT)
+        self.cancel_event = threading.Event()  # UA: set() — скасувати запущені 7za (--daemon: SIGTERM)
+        self.components = _parse_install_profile(env.get("INSTALL_PROFILE") or INSTALL_PROFILE)
+
+        self.store = ArchiveStore(
+            os.path.join(self.downloads_dir, "7zip_store"),
+            max_bytes=_env_int(env, "STORE_MAX_MB", STORE_MAX_MB) * 1024 * 1024,
+            max_items=_env_int(env, "STORE_MAX_ITEMS", STORE_MAX_ITEMS),
+        )
+
+        self.console = console
+        # UA: Спостереження за прогресом з коду: callback(snapshot: dict) — див. ProgressReporter
+        self.progress_listeners: list = []
+        self.metrics = RunMetrics()
+        self.run_lock_file = env.get("RUN_LOCK_FILE") or os.path.join(self.log_dir, "7zip_manager.lock")
+        self.run_lock: Optional[RunLock] = None  # UA: main() — single-flight; фази span-ів пишуться у стан
+        self.serial_phases = False  # UA: --profile — PhasePlan без пулу (фази в потоці cProfile)
+        self.progress_mode = (env.get("PROGRESS") or "auto").strip().lower()
+        self.logger = logging.getLogger(APP_NAME)
+        self.log_path: Optional[str] = None
+        self._log_compressor: Optional[threading.Thread] = None
+        self.console_mode = (env.get("LOG_CONSOLE") or "async").strip().lower()
+        self.events_path: Optional[str] = None
+        self._log_listener = None
+        self._queued_console: Optional["_QueuedConsole"] = None
+        self._attached_handlers: list = []   # UA: на self.logger (QueueHandler або sync FileHandler)
+        self._log_handlers: list = []        # UA: синки, які закриваються у shutdown_logging()
+
+    @property
+    def sevenzip_exe(self) -> str:
+        """UA: 7za.exe — консольна версія (x86), x64/ — 64-бітна версія.
+            Перший наявний 7za.exe серед вибраних компонентів (профіль "x64" → x64/7za.exe),
+            далі — будь-який наявний (перехід між профілями), інакше 7za.exe у корені."""
+        return self._component_exe(self.sevenzip_dir)
+
+    def _component_exe(self, root: str) -> str:
+        """UA: 7za.exe дерева root за профілем компонентів (див. sevenzip_exe)."""
+        exes = [EXTRA_COMPONENTS[c][1] for c in self.components] + [e for _m, e in EXTRA_COMPONENTS.values()]
+        for rel in exes:
+            if rel and os.path.exists(os.path.join(root, rel)):
+                return os.path.join(root, rel)
+        return os.path.join(root, "7za.exe")
+
+    def _extract_filters(self) -> list:
+        """UA: Аргументи 7za -x! для невибраних компонентів (порожньо — профіль "all")."""
+        args = []
+        for name, (members, _exe) in EXTRA_COMPONENTS.items():
+            if name in self.components:
+                continue
+            for member in members:
+                args.append(f"-x!{member}")
+                if "." not in member:
+                    args.append(f"-x!{member}\\*")  # UA: вміст підпапки компонента
+        return args
+
+    # -----------------------------------------------------------------------
+    # ЛОГУВАННЯ
+    # -----------------------------------------------------------------------
+    def _rotate_log_if_needed(self) -> str:
+        """If today's log > 50 MB → rename to _part2, _part3... Return active log path.
+        UA: Якщо поточний лог > 50 МБ → перейменувати з суфіксом _part2, _part3...
+            Повертає шлях до активного лог-файлу. Поточний день ніколи не видаляється."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        today = datetime.date.today().strftime("%Y-%m-%d")
+        base = os.path.join(self.log_dir, f"7zip_log_{today}.log")
+        if not os.path.exists(base):
+            return base
+        size_mb = os.path.getsize(base) / (1024 * 1024)
+        if size_mb <= 50:
+            return base
+        part = 2
+        while os.path.exists(os.path.join(self.log_dir, f"7zip_log_{today}_part{part}.log")):
+            part += 1
+        new_path = os.path.join(self.log_dir, f"7zip_log_{today}_part{part}.log")
+        os.rename(base, new_path)
+        return base
+
+    def setup_logging(self) -> str:
+        """Rotate today's log and start the queued logging pipeline (idempotent). Return log path.
+        UA: Ротація + синки на logger менеджера. Явний крок — не під час імпорту.
+            LOG_FILE=async|sync|off — текстовий лог (async: черга + пакетний flush);
+            LOG_JSONL=on — події у 7zip_events_YYYY-MM-DD.jsonl; LOG_CONSOLE=async|sync
+            (async — cprint і прогрес-бар теж ідуть через чергу, тож порядок рядків зберігається).
+            Злив черги — shutdown_logging() (atexit, AutoCloseTimer.on_exit)."""
+        if self.log_path:
+            return self.log_path
+        import atexit
+        import logging.handlers
+        import queue
+
+        env = self.env
+        file_mode = (env.get("LOG_FILE") or "async").strip().lower()
+        jsonl_on = (env.get("LOG_JSONL") or "off").strip().lower() in ("1", "on", "true", "yes")
+        self.log_path = self._rotate_log_if_needed()
+
+        queued = []
+        log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        if file_mode != "off":
+            flush_every = _env_int(env, "LOG_FLUSH_EVERY", LOG_FLUSH_EVERY) if file_mode == "async" else 1
+            handler = _BatchFileHandler(self.log_path, flush_every=flush_every)
+            handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+            handler.addFilter(lambda record: not hasattr(record, "event") and not hasattr(record, "console_text"))
+            if file_mode == "async":
+                queued.append(handler)
+            else:
+                self._attached_handlers.append(handler)
+        if jsonl_on:
+            today = datetime.date.today().strftime("%Y-%m-%d")
+            self.events_path = env.get("LOG_JSONL_FILE") or os.path.join(self.log_dir, f"7zip_events_{today}.jsonl")
+            queued.append(_JsonLinesHandler(self.events_path, flush_every=_env_int(env, "LOG_FLUSH_EVERY", LOG_FLUSH_EVERY)))
+        if self.console and self.console_mode == "async":
+            queued.append(_ConsoleHandler(log_queue))
+
+        if queued:
+            self._attached_handlers.append(logging.handlers.QueueHandler(log_queue))
+            self._log_listener = logging.handlers.QueueListener(log_queue, *queued)
+            self._log_listener.start()
+            if self.console and self.console_mode == "async":
+                self._queued_console = _QueuedConsole.active = _QueuedConsole(log_queue)
+        for handler in self._attached_handlers:
+            self.logger.addHandler(handler)
+        self._log_handlers = queued + [h for h in self._attached_handlers if isinstance(h, logging.FileHandler)]
+        self.logger.setLevel(logging.INFO)
+        atexit.register(self.shutdown_logging)
+        return self.log_path
+
+    def shutdown_logging(self) -> None:
+        """Drain the log queue and close sinks (idempotent).
+        UA: Злив черги логів: зупинка QueueListener (обробляє все, що вже в черзі) + close()."""
+        listener, self._log_listener = self._log_listener, None
+        if self._queued_console is not None and _QueuedConsole.active is self._queued_console:
+            _QueuedConsole.active = None
+        self._queued_console = None
+        try:
+            if listener is not None:
+                listener.stop()
+        finally:
+            for handler in self._attached_handlers:
+                self.logger.removeHandler(handler)
+            for handler in self._log_handlers:
+                handler.close()
+            self._attached_handlers, self._log_handlers = [], []
+            sys.stdout.flush()
+
+    def log(self, msg: str, color: str = Colors.RESET, console: bool = True) -> None:
+        """Log to file and optionally to console. UA: Логує у файл і консоль."""
+        if (console and self.console and self._log_listener is not None and self.console_mode == "async"
+                and _OrderedConsole.current() is None):
+            # UA: Один запис у черзі — і для файлу, і для консолі (колір у record.color)
+            self.logger.info(msg, extra={"color": color})
+            return
+        self.logger.info(msg)
+        if console and self.console:
+            cprint(msg, color)
+
+    def event(self, name: str, phase: Optional[str] = None, duration: Optional[float] = None,
+              nbytes: Optional[int] = None, **fields) -> None:
+        """Structured event for the JSON-lines sink. UA: Подія (LOG_JSONL=on): фаза, тривалість (с), байти."""
+        data = {"event": name, "phase": phase, "duration": None if duration is None else round(duration, 4), "bytes": nbytes}
+        data.update(fields)
+        self.logger.info(name, extra={"event": {k: v for k, v in data.items() if v is not None}})
+
+    def span(self, name: str, **attrs) -> "_Span":
+        """Time a phase (RunMetrics span + JSON-lines event on close).
+        UA: with manager.span("download") as sp: ... sp["bytes"] = n; повтори — metrics.add("retries")."""
+        span = self.metrics.span(name, **attrs)
+        if self.run_lock is not None:
+            self.run_lock.update(phase=name)
+
+        def emit(data: dict) -> None:
+            fields = {k: v for k, v in data.items() if k not in ("name", "duration", "bytes", "start")}
+            self.event("span", phase=data["name"], duration=data["duration"], nbytes=data.get("bytes"), **fields)
+        span.on_close = emit
+        return span
+
+    def write_run_report(self, ok: bool = True) -> Optional[str]:
+        """
+        Write the JSON run report and the Prometheus textfile (atomic tmp → replace).
+        UA: RUN_REPORT_FILE (за замовчуванням LOG_DIR/7zip_run_report.json) і
+            METRICS_TEXTFILE (LOG_DIR/7zip_manager.prom; "off" — вимкнено). Повертає шлях звіту.
+        """
+        report_path = self.env.get("RUN_REPORT_FILE") or os.path.join(self.log_dir, "7zip_run_report.json")
+        prom_path = self.env.get("METRICS_TEXTFILE") or os.path.join(self.log_dir, "7zip_manager.prom")
+        try:
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            with open(report_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.metrics.report(ok), f, ensure_ascii=False, indent=2)
+            os.replace(report_path + ".tmp", report_path)
+            if prom_path.lower() != "off":
+                os.makedirs(os.path.dirname(prom_path), exist_ok=True)
+                with open(prom_path + ".tmp", "w", encoding="utf-8", newline="\n") as f:
+                    f.write(self.metrics.prometheus(ok))
+                os.replace(prom_path + ".tmp", prom_path)
+        except OSError as e:
+            self.logger.warning(f"Run report write failed: {e}")
+            return None
+        return report_path
+
+    # -----------------------------------------------------------------------
+    # МЕРЕЖА
+    # -----------------------------------------------------------------------
+    def http_session(self) -> "requests.Session":
+        """Lazily create pooled requests.Session. UA: Спільна сесія з пулом з'єднань (keep-alive).
+        Пул розрахований на download_segments паралельних з'єднань до одного хоста."""
+        if self._session is None:
+            import requests  # type: ignore
+            from requests.adapters import HTTPAdapter  # type: ignore
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, self.download_segments))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            self._session = session
+        return self._session
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> "requests.Response":
+        """
+        The only HTTP path: pooled session, (connect, read) timeouts, jittered backoff.
+        UA: Єдиний шлях для HTTP: спільна сесія (keep-alive), таймаути self.http_timeout,
+            повтор при помилці з'єднання/таймауті та статусах 429/5xx — пауза з Retry-After
+            (секунди або HTTP-дата) або «full jitter» backoff. Після останньої спроби
+            повертає відповідь як є (raise_for_status — у викликача) або кидає виняток.
+        """
+        import requests  # type: ignore
+
+        retries = self.http_retries if retries is None else retries
+        kwargs.setdefault("timeout", self.http_timeout)
+        for attempt in range(retries + 1):
+            try:
+                response = self.http_session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.log(f"   Спроба {attempt + 1}/{retries + 1} невдала: {e}. Повтор через {delay:.1f}с...", Colors.YELLOW)
+            else:
+                if response.status_code not in HTTP_RETRY_STATUSES or attempt >= retries:
+                    return response
+                delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+                self.log(f"   HTTP {response.status_code} ({url}). Повтор через {delay:.1f}с...", Colors.YELLOW)
+            self.metrics.add("retries")
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+        """UA: Пауза перед повтором: Retry-After (обмежений HTTP_BACKOFF_MAX) або random(0, base·2^attempt)."""
+        import random
+
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                import email.utils
+                try:
+                    when = email.utils.parsedate_to_datetime(retry_after)
+                    delay = when.timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None  # type: ignore[assignment]
+            if delay is not None:
+                return min(max(delay, 0.0), HTTP_BACKOFF_MAX)
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF * 2 ** attempt))
+
+    def network_request_with_retry(self, url: str, max_retries: int = 3, initial_delay: float = 1.0) -> "requests.Response":
+        """Make HTTP GET with retry (compatibility wrapper over request()).
+        UA: Сумісність: GET через request() з max_retries спробами; помилка → ConnectionError."""
+        try:
+            response = self.request("GET", url, retries=max(0, max_retries - 1))
+            response.raise_for_status()
+            return response
+        except Exception as e:
+            raise ConnectionError(f"Не вдалося виконати запит після {max_retries} спроб: {e}")
+
+    # -----------------------------------------------------------------------
+    # КРОК 1: Перевірка PATH
+    # -----------------------------------------------------------------------
+    def show_path_info(self) -> None:
+        """
+        Show information about what is registered in PATH for 7-Zip.
+        UA: Показує інформацію про те, що зареєстровано в PATH для 7-Zip.
+            - tags/ → Win+R → 7zip (ярлик/менеджер)
+            - apps/7zip/ → 7za.exe (консольний архіватор)
+        """
+        log = self.log
+        if self.console:
+            cprint("-" * 50, Colors.BLUE)
+        log("🔧 ІНФОРМАЦІЯ ПРО PATH", Colors.HEADER)
+
+        # Paths to check
+        tags_dir = os.path.join(self.capsule_root, "tags")
+        sevenzip_dir = self.sevenzip_dir.rstrip('\\')
+
+        # Read PATH from registry
+        try:
+            import winreg  # type: ignore[import]
+            key = winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
+                0, winreg.KEY_READ
+            )
+            current_path, _ = winreg.QueryValueEx(key, "Path")
+            winreg.CloseKey(key)
+            entries = [e.rstrip('\\').strip().lower() for e in current_path.split(';') if e.strip()]
+        except Exception:
+            entries = []
+
+        # Check tags/ (for Win+R → 7zip)
+        tags_norm = tags_dir.rstrip('\\').lower()
+        tags_in_path = tags_norm in entries
+
+        # Check apps/7zip/ (for 7za.exe)
+        sevenzip_norm = sevenzip_dir.lower()
+        sevenzip_in_path = sevenzip_norm in entries
+
+        # Display information
+        log("", Colors.RESET)
+        log("   📋 РЕЄСТРАЦІЯ В PATH:", Colors.CYAN)
+        log("", Colors.RESET)
+
+        if tags_in_path:
+            log("   ✅ tags/         → Win+R → 7zip (ярлик менеджера)", Colors.GREEN)
+        else:
+            log("   ❌ tags/         → Win+R → 7zip (ярлик менеджера) — НЕ зареєстровано", Colors.RED)
+
+        if sevenzip_in_path:
+            log("   ✅ apps/7zip/    → 7za.exe (консольний архіватор)", Colors.GREEN)
+        else:
+            log("   ❌ apps/7zip/    → 7za.exe (консольний архіватор) — НЕ зареєстровано", Colors.RED)
+
+        log("", Colors.RESET)
+        log("   💡 ПРИМІТКА:", Colors.YELLOW)
+        log("      Win+R → 7zip  → запускає менеджер (tags/7zip.lnk)", Colors.CYAN)
+        log("      Win+R → 7za   → консольний архіватор (apps/7zip/7za.exe)", Colors.CYAN)
+        log("", Colors.RESET)
+
+    def ensure_in_system_path(self) -> None:
+        """
+        Ensure apps/7zip/ is in system PATH (HKLM), remove duplicates.
+        UA: Перевіряє що apps/7zip/ є в системному PATH (HKLM).
+            Якщо відсутній — додає через PowerShell з UAC elevation.
+            Також прибирає дублікати та обрізані записи.
+            Потрібно для роботи `7za` з будь-якого місця в системі.
+        """
+        # UA: Спочатку показуємо інформацію про поточний стан PATH
+        self.show_path_info()
+
+        ps_script = os.path.join(self.capsule_root, "devops", "pathupdate", "fix_path.ps1")
+        if not os.path.exists(ps_script):
+            self.log("   ⚠️ fix_path.ps1 не знайдено, пропускаємо.", Colors.YELLOW)
+            return
+
+        # UA: Перевіряємо поточний PATH через реєстр
+        try:
+            import winreg  # type: ignore[import]
+            key = winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment",
+                0, winreg.KEY_READ
+            )
+            current_path, _ = winreg.QueryValueEx(key, "Path")
+            winreg.CloseKey(key)
+            entries = [e.rstrip('\\').strip() for e in current_path.split(';') if e.strip()]
+            sevenzip_norm = self.sevenzip_dir.rstrip('\\')
+            if sevenzip_norm in entries:
+                # self.log("   ✅ apps/7zip/ вже в системному PATH.", Colors.GREEN)
+                return
+        except Exception:
+            pass  # UA: winreg недоступний або помилка читання — продовжуємо
+
+        # UA: apps/7zip/ відсутній — запускаємо fix_path.ps1 з UAC
+        self.log("   ℹ️  apps/7zip/ відсутній в PATH. Запускаю реєстрацію (UAC)...", Colors.YELLOW)
+        pwsh = self.pwsh_exe if os.path.exists(self.pwsh_exe) else "pwsh"
+
+        try:
+            subprocess.run(
+                [pwsh, "-NoProfile", "-Command",
+                 f"Start-Process '{pwsh}' -Verb RunAs -Wait "
+                 f"-ArgumentList '-NoProfile -ExecutionPolicy Bypass -File \"{ps_script}\" -AutoClose'"],
+                timeout=60
+            )
+            self.log("   ✅ PATH оновлено. Перезапусти термінал для застосування.", Colors.GREEN)
+        except Exception as e:
+            self.log(f"   ⚠️ Не вдалося оновити PATH: {e}", Colors.YELLOW)
+            self.log(f"   ℹ️  Запусти вручну: {ps_script}", Colors.CYAN)
+
+    # -----------------------------------------------------------------------
+    # HEALTH CHECKS
+    # -----------------------------------------------------------------------
+    def health_check(self, deep: bool = False) -> dict:
+        """Validate critical components before execution.
+        UA: Перевірка критичних компонентів перед виконанням + цілісність дерева за маніфестом
+            (integrity: True / False — є зіпсовані файли / None — маніфесту немає; deep — SHA-256)."""
+        checks = {
+            "7zip": os.path.exists(self.sevenzip_exe),
+            "7zip_dir": os.path.exists(self.sevenzip_dir),
+            "log_dir": os.path.exists(self.log_dir),
+            "capsule_root": os.path.exists(self.capsule_root),
+        }
+        # UA: Лише компоненти з профілю встановлення (x64-профіль не вимагає x86/arm64/Far)
+        for name in self.components:
+            members, exe = EXTRA_COMPONENTS[name]
+            checks[f"component:{name}"] = os.path.exists(os.path.join(self.sevenzip_dir, exe or members[0]))
+
+        if not checks["7zip"]:
+            self.log("⚠️ 7za.exe не знайдено! Запусти Win+R → 7zip", Colors.YELLOW)
+        for name in self.components:
+            if not checks[f"component:{name}"]:
+                self.log(f"⚠️ Компонент {name} не встановлено (профіль: {'+'.join(self.components)})", Colors.YELLOW)
+        if not checks["7zip_dir"]:
+            self.log(f"⚠️ Директорія 7-Zip не знайдена: {self.sevenzip_dir}", Colors.YELLOW)
+        else:
+            checks["integrity"] = self.verify_install(deep=deep)["ok"]
+
+        return checks
+
+    # -----------------------------------------------------------------------
+    # ЦІЛІСНІСТЬ ДЕРЕВА (маніфест, --verify / --repair)
+    # -----------------------------------------------------------------------
+    def verify_install(self, deep: bool = False, target_dir: Optional[str] = None,
+                       workers: Optional[int] = None) -> dict:
+        """
+        Compare the installed tree with its manifest; report exactly which files drifted.
+        UA: fast — лише stat кожного файлу маніфесту (розмір + mtime_ns), без читання;
+            deep — SHA-256 усіх файлів паралельно (пул VERIFY_WORKERS потоків, mmap-читання).
+            Причини: missing / size / mtime (fast) / sha256 (deep).
+            Повертає {ok, mode, files, bytes_hashed, seconds, drifted: {rel: причина}};
+            ok=None — маніфесту немає (встановлено не менеджером), звіряти ні з чим.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        target_dir = os.path.abspath(target_dir or self.sevenzip_dir)
+        files = self._load_install_manifest(target_dir).get("files", {})
+        report = {"ok": None, "mode": "deep" if deep else "fast", "files": len(files),
+                  "bytes_hashed": 0, "seconds": 0.0, "drifted": {}}
+        if not files:
+            return report
+
+        t0 = time.perf_counter()
+        drifted, to_hash = report["drifted"], []
+        for rel, entry in files.items():
+            path = os.path.join(target_dir, *rel.split("/"))
+            try:
+                st = os.stat(path)
+            except OSError:
+                drifted[rel] = "missing"
+                continue
+            if st.st_size != entry.get("size"):
+                drifted[rel] = "size"
+            elif deep:
+                to_hash.append((rel, path, st.st_size))
+            elif st.st_mtime_ns != entry.get("mtime_ns"):
+                drifted[rel] = "mtime"
+
+        if to_hash:
+            workers = workers or _env_int(self.env, "VERIFY_WORKERS", VERIFY_WORKERS)
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="7zip_verify") as pool:
+                digests = pool.map(lambda item: self._hash_or_none(item[1]), to_hash)
+                for (rel, _path, size), digest in zip(to_hash, digests):
+                    report["bytes_hashed"] += size
+                    if digest != files[rel].get("sha256"):
+                        drifted[rel] = "sha256" if digest else "missing"
+
+        report["drifted"] = dict(sorted(drifted.items()))
+        report["ok"] = not drifted
+        report["seconds"] = round(time.perf_counter() - t0, 4)
+        self.metrics.labels["integrity"] = "ok" if report["ok"] else "drift"
+        if drifted:
+            self.log(f"   ⚠️ Цілісність ({report['mode']}): змінено {len(drifted)} з {len(files)} файлів", Colors.YELLOW)
+            for rel, reason in report["drifted"].items():
+                self.log(f"      {reason:<8} {rel}", Colors.YELLOW)
+        else:
+            self.log(f"   ✅ Цілісність ({report['mode']}): {len(files)} файлів відповідають маніфесту "
+                     f"({report['seconds']:.2f} с)", Colors.GREEN)
+        return report
+
+    @staticmethod
+    def _hash_or_none(path: str) -> Optional[str]:
+        """UA: SHA-256 або None (файл зник / немає доступу між stat і читанням)."""
+        try:
+            return _file_sha256(path)
+        except OSError:
+            return None
+
+    def repair_install(self, report: Optional[dict] = None, target_dir: Optional[str] = None) -> dict:
+        """
+        Re-extract only the drifted files from the archive they were installed from.
+        UA: Архів — source.archive маніфесту у сховищі або сховище за source.version; 7za x лише
+            зіпсованих членів у тимчасову папку в DOWNLOADS; кожен файл звіряється з SHA-256
+            маніфесту і лише тоді замінює встановлений. Розпаковує 7za.exe, який сам не зіпсований
+            (x86 / x64 / arm64 дерева). Повертає {repaired: [...], failed: {rel: причина}, archive}.
+        """
+        target_dir = os.path.abspath(target_dir or self.sevenzip_dir)
+        report = report or self.verify_install(deep=True, target_dir=target_dir)
+        drifted = sorted(report.get("drifted") or {})
+        result: dict = {"repaired": [], "failed": {}, "archive": None}
+        if not drifted:
+            return result
+
+        manifest = self._load_install_manifest(target_dir)
+        source = manifest.get("source") or {}
+        name = source.get("archive") or ""
+        archive = self.store.lookup(sha256=name[:-len(".7z")]) if name.endswith(".7z") else None
+        if not archive and source.get("version"):
+            archive = self.store.lookup(version=source.get("version"))
+        exe = next(
+            (os.path.join(target_dir, rel) for rel in
+             [EXTRA_COMPONENTS[c][1] for c in self.components] + [e for _m, e in EXTRA_COMPONENTS.values()]
+             if rel and rel.replace(os.sep, "/") not in drifted and os.path.isfile(os.path.join(target_dir, rel))),
+            None,
+        )
+        if not archive or not exe:
+            reason = "no_archive" if not archive else "no_7za"
+            detail = "архіву встановленої версії немає у сховищі" if not archive else "немає цілого 7za.exe"
+            self.log(f"   ❌ Ремонт неможливий ({detail}) — запустіть з --reinstall.", Colors.RED)
+            result["failed"] = {rel: reason for rel in drifted}
+            return result
+
+        result["archive"] = archive
+        self.log(f"   🛠️  Ремонт: {len(drifted)} файл(ів) з {os.path.basename(archive)}", Colors.BLUE)
+        os.makedirs(self.downloads_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix="7zip_repair_", dir=self.downloads_dir)
+        files = manifest.setdefault("files", {})
+        try:
+            with self.span("extract", bytes=os.path.getsize(archive), members=len(drifted)):
+                self._run_7za_extract(archive, tmp_dir, exe=exe, members=drifted)
+            for rel in drifted:
+                src = os.path.join(tmp_dir, *rel.split("/"))
+                dst = os.path.join(target_dir, *rel.split("/"))
+                if not os.path.isfile(src):
+                    result["failed"][rel] = "not_in_archive"
+                elif _file_sha256(src) != files[rel].get("sha256"):
+                    result["failed"][rel] = "archive_mismatch"  # UA: архів іншої збірки — не ставимо
+                else:
+                    try:
+                        if os.path.isdir(dst):
+                            shutil.rmtree(dst)
+                        os.makedirs(os.path.dirname(dst), exist_ok=True)
+                        shutil.copy2(src, dst)
+                    except OSError as e:
+                        result["failed"][rel] = f"copy: {e}"
+                        continue
+                    st = os.stat(dst)
+                    files[rel].update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                    result["repaired"].append(rel)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        if result["repaired"]:
+            self._save_install_manifest(target_dir, manifest)
+            self.invalidate_version_cache(target_dir)
+        for rel, reason in result["failed"].items():
+            self.log(f"      ❌ {rel}: {reason}", Colors.RED)
+        self.log(f"   🛠️  Відновлено {len(result['repaired'])} з {len(drifted)}",
+                 Colors.GREEN if not result["failed"] else Colors.YELLOW)
+        return result
+
+    # -----------------------------------------------------------------------
+    # ERROR REPORTING
+    # -----------------------------------------------------------------------
+    def error_reporting(self, error: Exception, context: str = "") -> None:
+        """Structured error handling with actionable messages.
+        UA: Структурована обробка помилок з рекомендаціями."""
+        error_msg = f"❌ ПОМИЛКА [{context}]: {type(error).__name__}: {error}"
+        self.log(error_msg, Colors.RED)
+
+        # Діагностичні поради
+        if "FileNotFoundError" in str(type(error)):
+            self.log("   ℹ️  Перевірте наявність файлів/директорій", Colors.CYAN)
+        elif "PermissionError" in str(type(error)):
+            self.log("   ℹ️  Можливо, потрібні права адміністратора (UAC)", Colors.CYAN)
+        elif "ConnectionError" in str(type(error)):
+            self.log("   ℹ️  Перевірте мережеве підключення", Colors.CYAN)
+
+        # Запис у лог файл
+        self.logger.error(f"{context}: {error}", exc_info=True)
+
+    # -----------------------------------------------------------------------
+    # КРОК 2: Ротація логів
+    # -----------------------------------------------------------------------
+    def _index_logs(self) -> list:
+        """
+        One os.scandir pass over LOG_DIR → dated index of log artifacts.
+        UA: Індекс лог-файлів за один прохід: {name, path, date, part, gz, size},
+            відсортований від найстаріших. Дата — з імені (без strptime), розмір — зі scandir.
+        """
+        index = []
+        try:
+            entries = os.scandir(self.log_dir)
+        except OSError:
+            return index
+        with entries:
+            for entry in entries:
+                m = _LOG_NAME_RE.match(entry.name)
+                if not m or not entry.is_file():
+                    continue
+                try:
+                    day = datetime.date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+                    size = entry.stat().st_size
+                except (ValueError, OSError):
+                    continue
+                index.append({
+                    "name": entry.name, "path": entry.path, "date": day,
+                    "part": int(m.group(4) or 0), "gz": bool(m.group(5)), "size": size,
+                })
+        index.sort(key=lambda e: (e["date"], e["part"], e["gz"]))
+        return index
+
+    def cleanup_old_logs(self, max_days: int = LOG_KEEP_DAYS, max_total_mb: Optional[int] = None) -> dict:
+        """Delete log files older than max_days or over the total size limit.
+        UA: Видаляє лог-файли старші за max_days днів, потім — найстаріші, поки LOG_DIR
+        перевищує max_total_mb (LOG_MAX_MB). Поточний день НЕ видаляється.
+        Part-файли (_partN.log) стискаються у .gz фоновим потоком (wait_log_maintenance)."""
+        self.log("🧹 Перевірка старих логів...", Colors.CYAN)
+        if max_total_mb is None:
+            max_total_mb = _env_int(self.env, "LOG_MAX_MB", LOG_MAX_MB)
+        today = datetime.date.today()
+        cutoff = today - datetime.timedelta(days=max_days)
+        stats = {"scanned": 0, "deleted": 0, "deleted_over_limit": 0, "compress": 0}
+
+        index = self._index_logs()
+        stats["scanned"] = len(index)
+        kept = []
+        for item in index:
+            if item["date"] != today and item["date"] < cutoff:
+                if self._remove_log(item):
+                    stats["deleted"] += 1
+                    self.log(f"   🗑️ Видалено лог: {item['name']}", Colors.YELLOW)
+            else:
+                kept.append(item)
+
+        # UA: Ліміт розміру — видаляємо найстаріші (поточний день — ніколи)
+        total = sum(item["size"] for item in kept)
+        limit = max_total_mb * 1024 * 1024
+        for item in list(kept):
+            if total <= limit:
+                break
+            if item["date"] == today:
+                continue
+            if self._remove_log(item):
+                total -= item["size"]
+                stats["deleted"] += 1
+                stats["deleted_over_limit"] += 1
+                kept.remove(item)
+                self.log(f"   🗑️ Видалено лог (ліміт {max_total_mb} MB): {item['name']}", Colors.YELLOW)
+
+        # UA: Part-файли більше не пишуться (активний — лише 7zip_log_<сьогодні>.log) → у .gz у фоні
+        pending = [item["path"] for item in kept if item["part"] and not item["gz"]]
+        stats["compress"] = len(pending)
+        if pending:
+            self._log_compressor = threading.Thread(
+                target=self._compress_log_files, args=(pending,), name="7zip-log-gzip"
+            )
+            self._log_compressor.start()
+
+        if stats["deleted"]:
+            self.log(f"✅ Очищено логів: {stats['deleted']}", Colors.GREEN)
+        else:
+            self.log("✨ Старих логів немає.", Colors.GREEN)
+        if pending:
+            self.log(f"   🗜️  Стискання part-файлів у фоні: {len(pending)}", Colors.CYAN)
+        return stats
+
+    def _remove_log(self, item: dict) -> bool:
+        """UA: Видалення лог-файлу з індексу (False — файл зайнятий/зник)."""
+        try:
+            os.remove(item["path"])
+            return True
+        except OSError:
+            return False
+
+    def _compress_log_files(self, paths: list) -> None:
+        """
+        Streaming gzip of rotated part files (background worker).
+        UA: Потокове стискання: part.log → part.log.gz.tmp → replace → видалення оригіналу
+            (mtime зберігається). Перерваний запуск лишає лише .tmp, який перезапишеться.
+        """
+        import gzip
+        for path in paths:
+            gz_path = path + ".gz"
+            try:
+                with open(path, "rb") as src, gzip.open(gz_path + ".tmp", "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                shutil.copystat(path, gz_path + ".tmp")
+                os.replace(gz_path + ".tmp", gz_path)
+                os.remove(path)
+            except OSError as e:
+                self.logger.warning(f"Log compression failed for {path}: {e}")
+
+    def wait_log_maintenance(self, timeout: Optional[float] = None) -> None:
+        """UA: Дочекатися фонового стискання логів (перед виходом з процесу)."""
+        worker = self._log_compressor
+        if worker is not None:
+            worker.join(timeout)
+
+    # -----------------------------------------------------------------------
+    # КРОК 3: Перевірка версії та оновлення
+    # -----------------------------------------------------------------------
+    def get_installed_version(self, root: Optional[str] = None) -> str:
+        """
+        Read 7-Zip version (cached by path/size/mtime/inode of 7za.exe).
+        UA: Версія встановленого 7-Zip. Якщо stat 7za.exe збігається з кешем — лише stat,
+            без запуску процесу. Інакше — ресурс VS_VERSION_INFO (VERSION_PROBE=resource)
+            або вивід 7za.exe: "7-Zip (a) 26.00 (x86) : Copyright..."
+            root — інше дерево 7-Zip (fleet-режим), за замовчуванням sevenzip_dir.
+        """
+        exe = os.path.abspath(self._component_exe(root) if root else self.sevenzip_exe)
+        try:
+            st = os.stat(exe)
+        except OSError:
+            return "0.0.0"
+        key = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
+        cache = self._load_version_cache()
+        entry = cache.get(exe)
+        if entry and all(entry.get(k) == v for k, v in key.items()):
+            return entry["version"]
+
+        source = "resource"
+        ver = _pe_file_version(exe) if self.version_probe == "resource" else None
+        if not ver:
+            source = "exec"
+            ver = self._probe_version_exec(exe)
+        if not ver:
+            return "0.0.0"
+        with self._version_lock:
+            cache[exe] = dict(key, version=ver, source=source)
+            self._save_version_cache(cache)
+        return ver
+
+    @staticmethod
+    def _probe_version_exec(exe: str) -> Optional[str]:
+        """UA: Запуск 7za.exe без аргументів і розбір банера (None — не вдалося)."""
+        try:
+            process = SevenZipProcess([exe], timeout=VERSION_PROBE_TIMEOUT)
+            process.run()
+            # UA: Шукаємо рядок типу "7-Zip (a) 26.00 (x86)"
+            m = re.search(r"7-Zip\s+\S+\s+([\d\.]+)", process.tail)
+            if m and not process.reason:
+                return m.group(1)
+        except Exception:
+            pass
+        return None
+
+    def _load_version_cache(self) -> dict:
+        """UA: Кеш версій {шлях 7za.exe: {size, mtime_ns, ino, version, source}} (читається один раз)."""
+        if self._version_cache is None:
+            try:
+                with open(self.version_cache_file, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._version_cache = data if isinstance(data, dict) else {}
+            except Exception:
+                self._version_cache = {}
+        return self._version_cache
+
+    def _save_version_cache(self, cache: dict) -> None:
+        """UA: Атомарний запис кешу версій (tmp → replace); помилка запису не критична."""
+        self._version_cache = cache
+        try:
+            os.makedirs(os.path.dirname(self.version_cache_file), exist_ok=True)
+            tmp_path = self.version_cache_file + ".tmp"
+            with self._version_lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(cache, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.version_cache_file)
+        except Exception as e:
+            self.logger.warning(f"Version cache write failed: {e}")
+
+    def invalidate_version_cache(self, root_dir: Optional[str] = None) -> None:
+        """
+        Drop cached versions of binaries under root_dir (default: apps/7zip/).
+        UA: Викликається після заміни файлів (_copy_extracted_files, staged swap, відкат):
+            copy2 зберігає mtime, а на тому ж inode — тож stat-ключ сам по собі не надійний.
+        """
+        root_dir = os.path.abspath(root_dir or self.sevenzip_dir)
+        with self._version_lock:
+            cache = self._load_version_cache()
+            stale = [p for p in cache if os.path.abspath(p).startswith(root_dir + os.sep)]
+            if stale:
+                for p in stale:
+                    del cache[p]
+                self._save_version_cache(cache)
+
+    # -----------------------------------------------------------------------
+    # КЕШ МЕТАДАНИХ РЕЛІЗУ (conditional GET)
+    # -----------------------------------------------------------------------
+    def _load_release_cache(self) -> dict:
+        """Load release metadata cache. UA: Читає кеш метаданих релізу (порожній dict якщо немає)."""
+        try:
+            with open(self.release_cache_file, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_release_cache(self, cache: dict) -> None:
+        """Atomically write release metadata cache. UA: Атомарний запис кешу (tmp → replace)."""
+        try:
+            os.makedirs(os.path.dirname(self.release_cache_file), exist_ok=True)
+            tmp_path = self.release_cache_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.release_cache_file)
+        except Exception as e:
+            self.logger.warning(f"Не вдалося зберегти кеш релізу: {e}")
+
+    def _count_release_cache(self, cache: dict, hit: bool) -> None:
+        """Update session and persisted hit/miss counters. UA: Лічильники hits/misses (сесія + файл)."""
+        key = "hits" if hit else "misses"
+        self.release_cache_stats[key] += 1
+        stats = cache.setdefault("stats", {})
+        stats[key] = int(stats.get(key, 0)) + 1
+        self.logger.info(f"Кеш релізу: {key} (усього hits={stats.get('hits', 0)}, misses={stats.get('misses', 0)})")
+
+    def _extra_url_from_href(self, href: str) -> str:
+        """Resolve Extra href against base_url. UA: Відносний href → абсолютний URL."""
+        # UA: href може бути відносним (a/7z2600-extra.7z) або абсолютним
+        if href.startswith('http'):
+            return href
+        return self.base_url + href.lstrip('/')
+
+    def _resolve_release(self, latest_ver: Optional[str], href: Optional[str]) -> tuple[str, str] | tuple[None, None]:
+        """
+        Turn scanned version/href into (version, extra_url) with fallback URL.
+        UA: Спільний фінал для обох парсерів: версія + Extra URL (або fallback з версії).
+        """
+        if not latest_ver:
+            self.log("   ⚠️ Не вдалося знайти версію на сторінці.", Colors.YELLOW)
+            return None, None
+
+        if href:
+            return latest_ver, self._extra_url_from_href(href)
+
+        # UA: Fallback — будуємо URL з версії (26.00 → 2600)
+        ver_parts = latest_ver.split('.')
+        ver_code = f"{int(ver_parts[0]) * 100 + int(ver_parts[1]):04d}"
+        extra_url = f"{self.base_url}a/7z{ver_code}-extra.7z"
+        self.log(f"   ℹ️  Extra URL побудовано з версії: {extra_url}", Colors.CYAN)
+        return latest_ver, extra_url
+
+    def get_latest_info(self, refresh: bool = False) -> tuple[str, str] | tuple[None, None]:
+        """
+        Parse 7-zip.org/download.html to get latest version and Extra download URL.
+        UA: Парсить сторінку 7-zip.org для отримання версії та URL Extra пакету.
+            Extra пакет містить: 7za.exe, 7za.dll, 7zxa.dll, x64/, arm64/, Far/
+            URL pattern: https://www.7-zip.org/a/7z{VER}-extra.7z
+            Кеш: у межах release_cache_ttl — без запиту; далі conditional GET
+            (If-None-Match / If-Modified-Since) і 304 → відповідь з кешу.
+            refresh=True (--refresh) — ігнорує кеш і завантажує сторінку повністю.
+        """
+        cache = self._load_release_cache()
+        cached = (
+            not refresh
+            and cache.get("page") == self.download_page
+            and bool(cache.get("version"))
+            and bool(cache.get("extra_url"))
+        )
+
+        if cached:
+            age = time.time() - float(cache.get("checked_at", 0))
+            if 0 <= age < self.release_cache_ttl:
+                self._count_release_cache(cache, hit=True)
+                self._save_release_cache(cache)
+                self.log(f"   ⚡ Кеш релізу актуальний ({int(age)} с < TTL {self.release_cache_ttl} с), запит пропущено.", Colors.CYAN)
+                return cache["version"], cache["extra_url"]
+
+        source, answer = self._discover_release(cache, cached)
+        self.release_source = source
+        if answer is None:
+            self._save_release_cache(cache)  # UA: зберігаємо стан джерел (латентність, circuit)
+            return None, None
+        if answer.get("not_modified"):
+            cache["checked_at"] = time.time()
+            self._count_release_cache(cache, hit=True)
+            self._save_release_cache(cache)
+            self.log("   ⚡ 304 Not Modified — використано кеш релізу.", Colors.CYAN)
+            return cache["version"], cache["extra_url"]
+
+        cache = {
+            "page": self.download_page,
+            "version": answer["version"],
+            "extra_url": answer["extra_url"],
+            "etag": answer.get("etag"),
+            "last_modified": answer.get("last_modified"),
+            "source": source,
+            "checked_at": time.time(),
+            "stats": cache.get("stats", {}),
+            "sources": cache.get("sources", {}),
+        }
+        self._count_release_cache(cache, hit=False)
+        self._save_release_cache(cache)
+        return answer["version"], answer["extra_url"]
+
+    # -----------------------------------------------------------------------
+    # ДЖЕРЕЛА РЕЛІЗУ (hedging + circuit breaker)
+    # -----------------------------------------------------------------------
+    def _query_release_source(self, source: str, cache: dict, cached: bool,
+                              cancel: Optional[threading.Event] = None, retries: Optional[int] = None,
+                              opened: Optional[list] = None) -> Optional[dict]:
+        """
+        Ask one release source for {"version", "extra_url", ...}.
+        UA: official / дзеркало — потоковий сканер download.html (conditional GET лише для
+            джерела, з якого взято кеш); .json — фід (HTTP або локальний файл).
+            cancel — перервати читання, коли інше джерело вже відповіло; opened — сюди кладеться
+            відкрита відповідь, щоб гонка могла закрити її (читання, що чекає на байти, обривається).
+            У гонці (cancel) кожна спроба має короткий таймаут release_hedge_timeout.
+        """
+        from urllib.parse import urljoin
+
+        def until_cancelled(chunks):
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    return
+                yield chunk
+
+        kwargs: dict = {}
+        if cancel is not None:
+            hedge = self.release_hedge_timeout
+            kwargs["timeout"] = (min(self.http_timeout[0], hedge), min(self.http_timeout[1], hedge))
+
+        def track(resp):
+            if opened is not None:
+                opened.append(resp)
+            return resp
+
+        if source.lower().endswith(".json"):
+            if source.startswith(("http://", "https://")):
+                with track(self.request("GET", source, retries=retries, **kwargs)) as resp:
+                    resp.raise_for_status()
+                    feed = resp.json()
+            else:
+                with open(source, encoding="utf-8") as f:
+                    feed = json.load(f)
+            href = feed.get("extra_url") if isinstance(feed, dict) else None
+            if not href:
+                raise ValueError("у фіді немає extra_url")
+            return {"version": str(feed.get("version") or ""), "extra_url": urljoin(source, href)}
+
+        page = self.download_page if source == "official" else source
+        conditional = cached and cache.get("source", "official") == source
+        headers = {}
+        if conditional:
+            if cache.get("etag"):
+                headers['If-None-Match'] = cache["etag"]
+            if cache.get("last_modified"):
+                headers['If-Modified-Since'] = cache["last_modified"]
+        with track(self.request("GET", page, headers=headers, stream=True, retries=retries, **kwargs)) as resp:
+            if resp.status_code == 304 and conditional:
+                return {"version": cache["version"], "extra_url": cache["extra_url"], "not_modified": True}
+
+            resp.raise_for_status()
+            # UA: Потокове сканування з ранньою зупинкою (без повного BeautifulSoup DOM)
+            chunks = until_cancelled(resp.iter_content(chunk_size=RELEASE_SCAN_CHUNK))
+            latest_ver, href = _scan_release_stream(chunks, resp.encoding)
+            # UA: Дочитуємо решту сторінки без парсингу — з'єднання повертається у пул
+            #     і завантаження архіву з того ж хоста йде тим самим TCP/TLS з'єднанням
+            drained = 0
+            for chunk in chunks:
+                drained += len(chunk)
+                if drained > RELEASE_DRAIN_MAX:
+                    break
+        if cancel is not None and cancel.is_set():
+            return None
+        if source == "official":
+            latest_ver, extra_url = self._resolve_release(latest_ver, href)
+        else:
+            extra_url = urljoin(page, href) if href else None
+        return {
+            "version": latest_ver,
+            "extra_url": extra_url,
+            "etag": resp.headers.get("ETag") if source == "official" else None,
+            "last_modified": resp.headers.get("Last-Modified") if source == "official" else None,
+        }
+
+    @staticmethod
+    def _valid_release(answer: Optional[dict]) -> bool:
+        """UA: Відповідь узгоджена: версія NN.NN і Extra URL саме цієї версії (7zNNNN-extra.7z)."""
+        if not answer or not answer.get("extra_url"):
+            return False
+        match = re.fullmatch(r"(\d+)\.(\d{2})", answer.get("version") or "")
+        if not match:
+            return False
+        code = f"{int(match.group(1)) * 100 + int(match.group(2)):04d}"
+        return answer["extra_url"].rsplit("/", 1)[-1].lower() == f"7z{code}-extra.7z"
+
+    def _record_source(self, health: dict, source: str, latency: float, ok: Optional[bool],
+                       error: Optional[str] = None) -> None:
+        """UA: EWMA латентності джерела; невдачі поспіль → circuit open на RELEASE_BREAKER_COOLDOWN.
+            ok=None — лише латентність (джерело скасоване в гонці: штраф release_hedge_timeout)."""
+        h = health.setdefault(source, {})
+        ms = latency * 1000
+        h["ewma_ms"] = round(ms if "ewma_ms" not in h else 0.7 * h["ewma_ms"] + 0.3 * ms, 1)
+        if ok is None:
+            return
+        if ok:
+            h["fails"] = 0
+            h.pop("open_until", None)
+            h.pop("last_error", None)
+            return
+        h["fails"] = int(h.get("fails", 0)) + 1
+        if error:
+            h["last_error"] = error[:200]
+        if h["fails"] >= RELEASE_BREAKER_FAILS:
+            h["open_until"] = time.time() + RELEASE_BREAKER_COOLDOWN
+            self.log(f"   ⛔ Джерело релізу {source}: {h['fails']} невдач поспіль — пропускається "
+                     f"{RELEASE_BREAKER_COOLDOWN // 60} хв.", Colors.YELLOW)
+
+    def _discover_release(self, cache: dict, cached: bool) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Race the configured release sources; first valid answer wins.
+        UA: Одне джерело — звичайний запит (з повторами). Кілька — кожне у своєму потоці без
+            повторів (hedging замість retry): здорові стартують одразу, понижені (EWMA >
+            RELEASE_SLOW_MS або half-open після circuit) — через release_hedge_delay, якщо
+            переможця ще немає. Відкриті circuit-и пропускаються (якщо відкриті всі — пробуємо всі).
+            Відповідь старша за кешовану версію вважається застарілою (відстале дзеркало) і
+            повертається лише якщо свіжої немає. Стан джерел — cache["sources"].
+        """
+        import queue
+
+        health = cache.setdefault("sources", {})
+        now = time.time()
+        ranked = []
+        for src in self.release_sources:
+            h = health.get(src, {})
+            if h.get("open_until", 0) > now:
+                self.logger.info(f"Джерело релізу {src}: circuit open, пропущено")
+                continue
+            demoted = h.get("ewma_ms", 0) > RELEASE_SLOW_MS or h.get("fails", 0) >= RELEASE_BREAKER_FAILS
+            ranked.append((demoted, h.get("ewma_ms", 0), src))
+        if not ranked:
+            ranked = [(False, 0, src) for src in self.release_sources]
+        ranked.sort()
+
+        def label(src):
+            return "7-zip.org" if src == "official" else src
+
+        if len(ranked) == 1:
+            src = ranked[0][2]
+            t0 = time.perf_counter()
+            try:
+                answer = self._query_release_source(src, cache, cached)
+            except Exception as e:
+                self._record_source(health, src, time.perf_counter() - t0, False, str(e))
+                self.log(f"   ⚠️ Помилка запиту до {label(src)}: {e}", Colors.YELLOW)
+                return src, None
+            ok = self._valid_release(answer)
+            self._record_source(health, src, time.perf_counter() - t0, ok, None if ok else "невалідна відповідь")
+            return src, answer if ok else None
+
+        floor = None
+        if cache.get("page") == self.download_page and re.fullmatch(r"\d+\.\d+", cache.get("version") or ""):
+            floor = tuple(int(x) for x in cache["version"].split("."))
+        results: "queue.SimpleQueue" = queue.SimpleQueue()
+        cancel = threading.Event()
+        started: dict = {}
+        opened: dict = {}  # UA: джерело → відкриті відповіді (закриваються при скасуванні)
+
+        def worker(src):
+            t0 = started[src]
+            try:
+                answer, error = self._query_release_source(src, cache, cached, cancel, retries=0,
+                                                           opened=opened[src]), None
+            except Exception as e:
+                answer, error = None, str(e)
+            # UA: власний час завершення; aborted — завершилось уже після скасування (не чесний замір)
+            results.put((src, answer, error, time.perf_counter() - t0, cancel.is_set()))
+
+        def launch(src):
+            started[src] = time.perf_counter()
+            opened[src] = []
+            threading.Thread(target=worker, args=(src,), name=f"7zip-release-{len(started)}", daemon=True).start()
+
+        waiting = [src for demoted, _, src in ranked if demoted]
+        for demoted, _, src in ranked:
+            if not demoted:
+                launch(src)
+        if not started:
+            launch(waiting.pop(0))
+        hedge_at = time.perf_counter() + self.release_hedge_delay
+        deadline = time.perf_counter() + 2 * self.release_hedge_timeout + self.release_hedge_delay
+        finished: set = set()
+        winner, stale = None, None
+        while len(finished) < len(started) or waiting:
+            now = time.perf_counter()
+            if waiting and (now >= hedge_at or len(finished) == len(started)):
+                for src in waiting:
+                    launch(src)
+                waiting = []
+                continue
+            timeout = (hedge_at if waiting else deadline) - now
+            if timeout <= 0 and not waiting:
+                self.log("   ⚠️ Джерела релізу не відповіли вчасно.", Colors.YELLOW)
+                break
+            try:
+                src, answer, error, latency, _aborted = results.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                continue
+            finished.add(src)
+            ok = self._valid_release(answer)
+            self._record_source(health, src, latency, ok, error or (None if ok else "невалідна відповідь"))
+            if not ok:
+                self.log(f"   ⚠️ Джерело релізу {label(src)}: {error or 'невалідна відповідь'}", Colors.YELLOW)
+                continue
+            version_key = tuple(int(x) for x in answer["version"].split("."))
+            if floor and version_key < floor:
+                self.logger.info(f"Джерело релізу {src}: застаріла версія {answer['version']}")
+                if stale is None or version_key > tuple(int(x) for x in stale[1]["version"].split(".")):
+                    stale = (src, answer)
+                continue
+            winner = (src, answer)
+            self.logger.info(f"Джерело релізу {src}: перемога за {latency * 1000:.0f} мс")
+            break
+
+        cancel.set()
+        for src in started:
+            if src not in finished:
+                for resp in list(opened[src]):
+                    try:
+                        resp.close()  # UA: звільняє потік і з'єднання, що чекають на байти
+                    except Exception:
+                        pass
+        # UA: Програвші: ті, що встигли завершитись до скасування, — їхній справжній час;
+        #     скасовані — штраф release_hedge_timeout (повільне джерело поступово понижується).
+        while True:
+            try:
+                src, answer, error, latency, aborted = results.get_nowait()
+            except queue.Empty:
+                break
+            if not aborted:
+                finished.add(src)
+                ok = self._valid_release(answer)
+                self._record_source(health, src, latency, ok, error or (None if ok else "невалідна відповідь"))
+        for src in started:
+            if src not in finished:
+                self._record_source(health, src, self.release_hedge_timeout, None)
+        return winner or stale or (None, None)
+
+    def check_and_update(self, refresh: bool = False, reinstall: bool = False) -> str:
+        """
+        Check 7-zip.org for new Extra release and update if needed.
+        UA: Перевіряє 7-zip.org на нову версію Extra пакету.
+            Якщо є — бере .7z зі сховища архівів (або завантажує і кладе туди),
+            розпаковує поверх apps/7zip/.
+            Використовує вже встановлений 7za.exe для розпакування.
+            reinstall=True (--reinstall) — встановити навіть якщо версія актуальна (ремонт).
+            Повертає "up_to_date", "updated" або "failed" (--daemon: адаптивний інтервал, коди виходу).
+        """
+        from packaging import version  # type: ignore
+
+        if self.console:
+            cprint("-" * 50, Colors.BLUE)
+        self.log("🌍 ПЕРЕВІРКА ОНОВЛЕНЬ (7-zip.org)", Colors.HEADER)
+
+        # UA: Локальна версія і сторінка релізу незалежні — паралельно (PhasePlan)
+        def probe() -> str:
+            ver = self.get_installed_version()
+            self.log(f"   ℹ️  Встановлена версія: {ver}", Colors.CYAN)
+            return ver
+
+        def release_check() -> tuple:
+            with self.span("release_check") as sp:
+                info = self.get_latest_info(refresh=refresh)
+                sp["latest"] = info[0]
+                if self.release_source:
+                    sp["source"] = self.release_source
+            return info
+
+        plan = PhasePlan(self, workers=2)
+        plan.add("version_probe", probe)
+        plan.add("release_check", release_check, span=False)
+        results = plan.run()
+        current_ver = results["version_probe"]
+        latest_ver, extra_url = results["release_check"]
+        self.metrics.labels["installed"] = current_ver
+        if latest_ver:
+            self.metrics.labels["latest"] = latest_ver
+        if not latest_ver or not extra_url:
+            self.log("   ⚠️ Не вдалося отримати інформацію про останню версію.", Colors.YELLOW)
+            return "failed"
+
+        self.log(f"   ℹ️  Остання версія:     {latest_ver}", Colors.CYAN)
+        self.log(f"   ℹ️  Extra URL:          {extra_url}", Colors.CYAN)
+
+        if current_ver != "0.0.0" and version.parse(latest_ver) <= version.parse(current_ver):
+            if not reinstall:
+                self.log("   ✅ Версія актуальна.", Colors.GREEN)
+                return "up_to_date"
+            self.log(f"🔁 Перевстановлення версії {latest_ver}...", Colors.HEADER)
+        else:
+            self.log(f"🚀 Знайдено нову версію {latest_ver}! Починаю завантаження...", Colors.HEADER)
+
+        with self.span("download", version=latest_ver) as sp:
+            archive_path = self.fetch_archive(latest_ver, extra_url)
+            if archive_path:
+                sp["bytes"] = os.path.getsize(archive_path)
+        if not archive_path:
+            return "failed"
+
+        self.cleanup_install_siblings()
+
+        self.log("   ⚙️  Розпакування поверх apps/7zip/...", Colors.BLUE)
+        try:
+            self._extract_extra_archive(archive_path, self.sevenzip_dir, version=latest_ver)
+        except Exception as e:
+            self.log(f"   ❌ Помилка розпакування: {e}", Colors.RED)
+            return "failed"
+
+        with self.span("version_probe"):
+            new_ver = self.get_installed_version()
+        self.metrics.labels["installed"] = new_ver
+        self.log(f"   ✅ Оновлення встановлено! Версія: {new_ver}", Colors.GREEN)
+        return "updated"
+
+    # -----------------------------------------------------------------------
+    # FLEET (кілька дерев 7-Zip)
+    # -----------------------------------------------------------------------
+    def update_fleet(self, roots: list, refresh: bool = False, reinstall: bool = False,
+                     workers: Optional[int] = None) -> dict:
+        """
+        Update many 7-Zip trees with one release check, one download and one extraction.
+        UA: Версії всіх коренів — паралельно; сторінка релізу і архів — один раз; розпакування —
+            один раз у тимчасову папку в DOWNLOADS; встановлення у кожен застарілий корінь —
+            пул з workers потоків (delta, або staged через копію staging-папки поруч з коренем).
+            Помилка одного кореня не зупиняє решту. Повертає {корінь: {status, before, after, error}},
+            status: up_to_date / updated / failed. Корінь, якого немає на диску (напр. одруківка
+            в --fleet), — failed без створення папки і без встановлення.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from packaging import version  # type: ignore
+
+        roots = list(dict.fromkeys(os.path.abspath(r) for r in roots))
+        workers = max(1, workers or _env_int(self.env, "FLEET_WORKERS", FLEET_WORKERS))
+        results: dict = {root: {"status": "failed"} for root in roots}
+        self.log(f"🚚 FLEET: {len(roots)} дерев 7-Zip, потоків встановлення: {workers}", Colors.HEADER)
+
+        def fail(targets, error):
+            for root in targets:
+                results[root].update(status="failed", error=error)
+            return results
+
+        missing = [root for root in roots if not os.path.isdir(root)]
+        for root in missing:
+            self.log(f"   ❌ {root}: папки не існує — пропущено (перевірте FLEET_ROOTS / --fleet)", Colors.RED)
+            self.event("fleet_root", root=root, status="failed", error="корінь не існує")
+        fail(missing, "корінь не існує")
+        roots = [root for root in roots if root not in missing]
+        if not roots:
+            return results
+
+        with self.span("version_probe", roots=len(roots)), ThreadPoolExecutor(workers) as pool:
+            for root, ver in zip(roots, pool.map(self.get_installed_version, roots)):
+                results[root]["before"] = ver
+
+        with self.span("release_check") as sp:
+            latest_ver, extra_url = self.get_latest_info(refresh=refresh)
+            sp["latest"] = latest_ver
+        if not latest_ver or not extra_url:
+            self.log("   ⚠️ Не вдалося отримати інформацію про останню версію.", Colors.YELLOW)
+            return fail(roots, "немає інформації про реліз")
+        self.metrics.labels["latest"] = latest_ver
+
+        outdated = []
+        for root in roots:
+            before = results[root]["before"]
+            if reinstall or before == "0.0.0" or version.parse(latest_ver) > version.parse(before):
+                outdated.append(root)
+            else:
+                results[root].update(status="up_to_date", after=before)
+        self.log(f"   ℹ️  Остання версія: {latest_ver}; застарілих дерев: {len(outdated)} з {len(roots)}", Colors.CYAN)
+        if not outdated:
+            return results
+
+        with self.span("download", version=latest_ver) as sp:
+            archive_path = self.fetch_archive(latest_ver, extra_url)
+            if archive_path:
+                sp["bytes"] = os.path.getsize(archive_path)
+        if not archive_path:
+            return fail(outdated, "не вдалося отримати архів")
+
+        # UA: Розпаковує 7za.exe будь-якого дерева (спершу — власного)
+        exe = next((e for e in map(self._component_exe, [self.sevenzip_dir] + roots) if os.path.exists(e)), None)
+        if exe is None:
+            return fail(outdated, "немає 7za.exe для розпакування")
+
+        os.makedirs(self.downloads_dir, exist_ok=True)
+        stage_dir = tempfile.mkdtemp(prefix="7zip_fleet_", dir=self.downloads_dir)
+        try:
+            with self.span("extract", bytes=os.path.getsize(archive_path)):
+                self._run_7za_extract(archive_path, stage_dir, exe=exe)
+            with self.span("install", mode=self.install_mode, roots=len(outdated)) as sp, \
+                    ThreadPoolExecutor(workers) as pool:
+                source = {"version": latest_ver, "archive": os.path.basename(archive_path)}
+                futures = {pool.submit(self._install_fleet_root, stage_dir, root, source): root for root in outdated}
+                for future in as_completed(futures):
+                    root = futures[future]
+                    try:
+                        results[root]["mode"] = future.result()
+                        results[root]["status"] = "updated"
+                    except Exception as e:
+                        results[root]["error"] = str(e)
+                        self.log(f"   ❌ {root}: {e}", Colors.RED)
+                sp["failed"] = sum(1 for r in outdated if results[r]["status"] == "failed")
+        except Exception as e:
+            self.log(f"   ❌ Помилка розпакування: {e}", Colors.RED)
+            return fail(outdated, f"розпакування: {e}")
+        finally:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+        updated = [r for r in outdated if results[r]["status"] == "updated"]
+        with self.span("version_probe", roots=len(updated)), ThreadPoolExecutor(workers) as pool:
+            for root, ver in zip(updated, pool.map(self.get_installed_version, updated)):
+                results[root]["after"] = ver
+        for root in roots:
+            self.event("fleet_root", root=root, **results[root])
+        return results
+
+    def _install_fleet_root(self, stage_dir: str, root: str, source: Optional[dict] = None) -> str:
+        """
+        Install the shared extracted tree into one fleet root; return the mode used.
+        UA: delta — копіювання змінених файлів напряму зі спільної staging-папки (лише читання);
+            staged — власна копія staging поруч з коренем (той самий том) і заміна перейменуванням.
+            Корінь має існувати — нових дерев fleet не створює.
+        """
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"корінь не існує: {root}")
+        self.cleanup_install_siblings(target_dir=root)
+        if self.install_mode == "staged":
+            own_stage = self._sibling_dir(root, f"staging-{os.getpid()}")
+            try:
+                shutil.rmtree(own_stage, ignore_errors=True)
+                shutil.copytree(stage_dir, own_stage)
+                if self._swap_staged_tree(own_stage, root, source):
+                    return "staged"
+            except OSError as e:
+                self.log(f"   ⚠️ {root}: staged недоступний ({e}) — delta.", Colors.YELLOW)
+            finally:
+                shutil.rmtree(own_stage, ignore_errors=True)
+        self._copy_extracted_files(stage_dir, root, source)
+        return "delta"
+
+    def fetch_archive(self, latest_ver: str, extra_url: str) -> Optional[str]:
+        """
+        Return path of the Extra archive in the store, downloading it only if missing.
+        UA: Архів зі сховища (за URL або версією) або завантаження → SHA-256 «на льоту» →
+            перенесення у сховище (downloads/7zip_store/<sha256>.7z). None — помилка.
+        """
+        stored = self.store.lookup(version=latest_ver, url=extra_url)
+        if stored:
+            self.log(f"   📦 Архів є у сховищі — завантаження пропущено: {os.path.basename(stored)}", Colors.GREEN)
+            self.metrics.add("store_hit")
+            return stored
+
+        archive_name = extra_url.split('/')[-1]  # UA: напр. 7z2600-extra.7z
+        save_path = os.path.join(self.downloads_dir, archive_name)
+        os.makedirs(self.downloads_dir, exist_ok=True)
+
+        self.log(f"   ⬇️  URL: {extra_url}", Colors.BLUE)
+        self.log(f"   💾 Збереження: {archive_name}", Colors.BLUE)
+
+        try:
+            sha256 = self._download_with_progress(extra_url, save_path)
+        except Exception as e:
+            self.log(f"   ❌ Помилка завантаження: {e}", Colors.RED)
+            self.metrics.add("failed")
+            return None
+
+        stored, evicted = self.store.put(save_path, sha256, version=latest_ver, url=extra_url)
+        self.log(f"   🔐 SHA-256: {sha256}", Colors.CYAN)
+        for sha in evicted:
+            self.log(f"   🗑️  Зі сховища витіснено: {sha[:12]}…", Colors.YELLOW)
+        return stored
+
+    # -----------------------------------------------------------------------
+    # BATCH (--batch: jobs compress / extract / test на керованому 7za)
+    # -----------------------------------------------------------------------
+    def best_7za(self, root: Optional[str] = None) -> str:
+        """
+        The installed 7za build that runs natively on this host.
+        UA: arm64-хост → arm64/, потім x64/ (емуляція Windows 11), потім x86; x64 → x64/, x86; x86 → 7za.exe.
+            32-бітний Python на 64-бітній Windows — архітектура з PROCESSOR_ARCHITEW6432.
+        """
+        import platform
+
+        root = root or self.sevenzip_dir
+        machine = (os.environ.get("PROCESSOR_ARCHITEW6432") or platform.machine()).lower()
+        if machine in ("arm64", "aarch64"):
+            order = ("arm64", "x64", "x86")
+        elif machine in ("amd64", "x86_64", "x64"):
+            order = ("x64", "x86")
+        else:
+            order = ("x86",)
+        for name in order:
+            path = os.path.join(root, EXTRA_COMPONENTS[name][1])
+            if os.path.isfile(path):
+                return path
+        return self._component_exe(root)
+
+    @staticmethod
+    def _batch_plan(jobs: int, cores: int, workers: Optional[int] = None, threads: Optional[int] = None) -> tuple[int, int]:
+        """
+        Split cores between concurrent jobs and 7za's own -mmt threads.
+        UA: jobs ≥ ядер — кожен job в один потік, ядер стільки ж jobs; менше jobs — ядра ділимо між ними
+            (4 jobs на 16 ядрах → 4 × -mmt4). workers / threads з маніфесту або .env мають пріоритет.
+        """
+        workers = max(1, min(workers or min(jobs, cores), jobs))
+        threads = max(1, threads or cores // workers)
+        return workers, threads
+
+    def run_batch(self, jobs: list, workers: Optional[int] = None, threads: Optional[int] = None) -> dict:
+        """
+        Run compress / extract / test jobs on a worker pool; return the JSON results summary.
+        UA: Бінарник — best_7za(); план пулу — _batch_plan(); найбільші jobs стартують першими
+            (коротший хвіст), результати — у порядку маніфесту. Прогрес кожного job — той самий розбір
+            відсотків 7za (SevenZipProcess), що й у розпакуванні оновлення; кілька jobs паралельно —
+            рядками в лог. Кожен job: status ok/failed, секунди, байти, MiB/s (+ ratio для compress).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        exe = self.best_7za()
+        cores = os.cpu_count() or 1
+        workers, threads = self._batch_plan(
+            len(jobs), cores, workers or _env_int(self.env, "BATCH_WORKERS", BATCH_WORKERS) or None, threads,
+        )
+        mode = "log" if workers > 1 and self.progress_mode in ("auto", "tty") else None
+        self.log(f"📦 Batch: {len(jobs)} job(ів), {workers} паралельно × -mmt{threads} ({cores} ядер), "
+                 f"7za: {os.path.relpath(exe, self.sevenzip_dir)}", Colors.HEADER)
+
+        started = time.time()
+        t0 = time.perf_counter()
+        order = sorted(range(len(jobs)), key=lambda i: -self._batch_input_bytes(jobs[i]))
+        results: list = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="7zip_batch") as pool:
+            futures = {pool.submit(self._run_batch_job, jobs[i], exe, threads, mode): i for i in order}
+            for fut, i in futures.items():
+                try:
+                    results[i] = fut.result()
+                except Exception as e:  # UA: збій поза 7za (шляхи, права) — лише цей job failed
+                    job = jobs[i]
+                    results[i] = {"id": job["id"], "op": job["op"], "archive": job["archive"], "status": "failed",
+                                  "bytes": 0, "returncode": None, "seconds": 0.0, "mib_per_s": None, "error": str(e)}
+                    self.log(f"   ❌ [{job['id']}] {job['op']}: {e}", Colors.RED)
+        seconds = time.perf_counter() - t0
+
+        total = sum(r["bytes"] for r in results)
+        summary = {
+            "started": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "seconds": round(seconds, 3),
+            "ok": all(r["status"] == "ok" for r in results),
+            "binary": exe,
+            "cpu_count": cores,
+            "workers": workers,
+            "threads_per_job": threads,
+            "bytes": total,
+            "mib_per_s": round(total / 1048576 / seconds, 2) if seconds > 0 else None,
+            "jobs": results,
+        }
+        self.metrics.labels["batch"] = "ok" if summary["ok"] else "failed"
+        return summary
+
+    @staticmethod
+    def _batch_input_bytes(job: dict) -> int:
+        """UA: Вхідні байти job-а: sources (compress) або архів (extract / test); 0 — недоступно."""
+        paths = job.get("sources") if job["op"] == "compress" else [job["archive"]]
+        total = 0
+        for path in paths or []:
+            if os.path.isdir(path):
+                for root, _dirs, files in os.walk(path):
+                    for name in files:
+                        try:
+                            total += os.path.getsize(os.path.join(root, name))
+                        except OSError:
+                            pass
+            elif os.path.isfile(path):
+                total += os.path.getsize(path)
+        return total
+
+    def _run_batch_job(self, job: dict, exe: str, threads: int, mode: Optional[str]) -> dict:
+        """UA: Один job: команда 7za (a / x / t + -mmt), прогрес, результат з пропускною здатністю."""
+        op, archive = job["op"], job["archive"]
+        cmd = [exe, {"compress": "a", "extract": "x", "test": "t"}[op], archive]
+        if op == "compress":
+            cmd += job["sources"]
+            if job.get("type"):
+                cmd.append(f"-t{job['type']}")
+            if job.get("level") is not None:
+                cmd.append(f"-mx={int(job['level'])}")
+        elif op == "extract":
+            cmd.append(f"-o{job['output']}")
+        cmd += [f"-mmt{threads}", "-y", "-bsp1"] + job["args"]
+
+        size = self._batch_input_bytes(job)
+        result = {"id": job["id"], "op": op, "archive": archive, "status": "failed", "bytes": size}
+        progress = self.progress(f"   [{job['id']}] {op}", size, mode=mode)
+        process = self.sevenzip_process(cmd, on_percent=lambda pct: progress.update(pct * size // 100))
+        t0 = time.perf_counter()
+        try:
+            if op == "compress" and os.path.dirname(archive):
+                os.makedirs(os.path.dirname(archive), exist_ok=True)
+            process.run()
+            self._check_7za(process)
+            result["status"] = "ok"
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            progress.finish()
+        seconds = time.perf_counter() - t0
+        result.update(returncode=process.returncode, seconds=round(seconds, 3), mib_per_s=None)
+        if result["status"] == "ok" and seconds > 0:
+            result["mib_per_s"] = round(size / 1048576 / seconds, 2)
+        if op == "compress" and result["status"] == "ok" and os.path.isfile(archive):
+            result["archive_bytes"] = os.path.getsize(archive)
+            result["ratio"] = round(result["archive_bytes"] / size, 4) if size else None
+        if result["status"] == "ok":
+            self.log(f"   ✅ [{job['id']}] {op} {os.path.basename(archive)}: {_format_bytes(size)} за {seconds:.2f} с "
+                     f"({result['mib_per_s']} MiB/s)", Colors.GREEN)
+        else:
+            self.log(f"   ❌ [{job['id']}] {op} {os.path.basename(archive)}: {result['error']}", Colors.RED)
+        return result
+
+    def serve_mirror(self, host: Optional[str] = None, port: Optional[int] = None) -> dict:
+        """
+        Run the LAN mirror until Ctrl+C; return its request stats.
+        UA: --serve: адреса — аргументи → MIRROR_HOST / MIRROR_PORT у .env → 0.0.0.0:8077.
+        """
+        server = MirrorServer(
+            self,
+            host or self.env.get("MIRROR_HOST") or MIRROR_HOST,
+            port or _env_int(self.env, "MIRROR_PORT", MIRROR_PORT),
+        )
+        self.log(f"🌐 Дзеркало 7-Zip Extra: {server.base_url}download.html (Ctrl+C — зупинка)", Colors.HEADER)
+        self.log(f"   Клієнтам (.env): SEVENZIP_DOWNLOAD_PAGE={server.base_url}download.html", Colors.CYAN)
+        self.log(f"                    SEVENZIP_BASE_URL={server.base_url}", Colors.CYAN)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+        self.log(f"   Запитів: {server.stats['requests']}, завантажень з upstream: {server.stats['upstream_fetches']}, "
+                 f"віддано: {_format_bytes(server.stats['bytes_sent'])}", Colors.BLUE)
+        return server.stats
+
+    # -----------------------------------------------------------------------
+    # DAEMON (--daemon)
+    # -----------------------------------------------------------------------
+    def run_daemon(self, stop: Optional[threading.Event] = None, max_cycles: Optional[int] = None) -> int:
+        """
+        Stay resident and check for updates on a jittered, adaptive schedule; return exit code.
+        UA: Без TTY і без інтерактиву: цикл перевірки → стан у DAEMON_STATUS_FILE → stop.wait(затримка)
+            (очікування події, не опитування; SIGTERM/SIGINT/SIGBREAK — зупинка між циклами).
+            Перший цикл — після випадкової паузи в межах jitter·інтервалу (fleet не стартує разом).
+            Кожен цикл — під single-flight блокуванням (зайнято — повтор через DAEMON_BUSY_RETRY),
+            зі своїм звітом запуску / Prometheus textfile. EXIT_OK — останній цикл успішний.
+        """
+        import random
+        import signal
+
+        env = self.env
+        base = max(1, _env_int(env, "DAEMON_INTERVAL", DAEMON_INTERVAL))
+        ceiling = max(base, _env_int(env, "DAEMON_INTERVAL_MAX", DAEMON_INTERVAL_MAX))
+        jitter = min(max(float(env.get("DAEMON_JITTER") or DAEMON_JITTER), 0.0), 0.9)
+        status_path = env.get("DAEMON_STATUS_FILE") or os.path.join(self.log_dir, "7zip_daemon_status.json")
+        # UA: Та сама подія скасовує запущений 7za — SIGTERM не чекає кінця розпакування (staging)
+        stop = self.cancel_event = stop or self.cancel_event
+
+        def on_signal(signum, _frame):
+            self.log(f"🛑 Сигнал {signum} — зупинка демона.", Colors.YELLOW)
+            stop.set()
+
+        if threading.current_thread() is threading.main_thread():
+            for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+                if hasattr(signal, name):
+                    signal.signal(getattr(signal, name), on_signal)
+
+        status: dict = {"pid": os.getpid(), "started": datetime.datetime.now().isoformat(timespec="seconds")}
+
+        def write_status(**fields) -> None:
+            status.update(fields)
+            try:
+                os.makedirs(os.path.dirname(status_path), exist_ok=True)
+                tmp_path = status_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(status, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, status_path)
+            except OSError as e:
+                self.logger.warning(f"Не вдалося записати стан демона: {e}")
+
+        self.log(f"🛰️  Демон: перевірка кожні {base} с (± {jitter:.0%}), без змін upstream — до {ceiling} с; "
+                 f"стан — {status_path}", Colors.HEADER)
+        interval, errors, cycle = base, 0, 0
+        last_latest, result = None, None
+        delay = random.uniform(0, base * jitter)
+        while True:
+            next_check = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            write_status(state="sleeping", next_check=next_check.isoformat(timespec="seconds"))
+            if stop.wait(delay):
+                break
+            cycle += 1
+            write_status(state="checking", cycle=cycle)
+            outcome = self._daemon_cycle()
+            if outcome == "busy":
+                self.log("   ⏳ Виконується інший запуск — цикл перенесено.", Colors.YELLOW)
+                delay = DAEMON_BUSY_RETRY
+                continue
+            result = outcome
+            latest = self.metrics.labels.get("latest")
+            if result == "failed":
+                errors += 1
+                delay = min(base, DAEMON_RETRY * 2 ** (errors - 1))
+            else:
+                errors = 0
+                # UA: Upstream без змін — рідше; нова версія (або щойно оновились) — знову базовий інтервал
+                unchanged = result == "up_to_date" and last_latest is not None and latest == last_latest
+                interval = min(interval * DAEMON_BACKOFF, ceiling) if unchanged else base
+                delay = interval
+                last_latest = latest
+            delay *= random.uniform(1 - jitter, 1 + jitter)
+            write_status(
+                last_check=datetime.datetime.now().isoformat(timespec="seconds"), last_result=result,
+                installed=self.metrics.labels.get("installed"), latest=latest,
+                interval=round(interval), errors=errors,
+            )
+            self.log(f"   🕒 Наступна перевірка через {int(delay)} с ({result}).", Colors.BLUE)
+            if max_cycles and cycle >= max_cycles:
+                break
+        code = EXIT_FAILED if result == "failed" else EXIT_OK
+        write_status(state="stopped", exit_code=code, stopped=datetime.datetime.now().isoformat(timespec="seconds"))
+        return code
+
+    def _daemon_cycle(self) -> str:
+        """UA: Один цикл демона: новий день — новий лог + ротація; блокування; перевірка; звіт запуску."""
+        today = datetime.date.today().strftime("%Y-%m-%d")
+        if self.log_path and not os.path.basename(self.log_path).startswith(f"7zip_log_{today}"):
+            self.shutdown_logging()
+            self.log_path = None
+            self.setup_logging()
+            self.cleanup_old_logs(max_days=_env_int(self.env, "LOG_KEEP_DAYS", LOG_KEEP_DAYS))
+
+        lock = RunLock(self.run_lock_file)
+        if not lock.acquire(wait=False, action="update"):
+            return "busy"
+        self.run_lock = lock
+        self.metrics = RunMetrics()
+        result = "failed"
+        try:
+            with self.span("update"):
+                result = self.check_and_update()
+        except Exception as e:
+            self.log(f"❌ Помилка циклу демона: {e}", Colors.RED)
+        finally:
+            self.write_run_report(ok=result != "failed")
+            lock.release(ok=result != "failed", labels=self.metrics.labels, result=result)
+            self.run_lock = None
+        return result
+
+    def progress(self, label: str, total: int = 0, initial: int = 0, mode: Optional[str] = None) -> ProgressReporter:
+        """
+        Progress reporter for a phase (download, extraction).
+        UA: Режим: PROGRESS=auto (TTY → прогрес-бар, інакше рядки в лог), tty, log, off;
+            console=False → лише слухачі self.progress_listeners; mode — примусово (напр. паралельні jobs).
+        """
+        mode = mode or self.progress_mode
+        if not self.console:
+            mode = "off"
+        elif mode == "auto":
+            try:
+                mode = "tty" if sys.stdout.isatty() else "log"
+            except (AttributeError, ValueError):
+                mode = "log"
+        return ProgressReporter(
+            label, total, mode=mode, log=lambda msg: self.log(msg, Colors.YELLOW),
+            listeners=self.progress_listeners, initial=initial,
+        )
+
+    def _download_with_progress(self, url: str, save_path: str) -> str:
+        """
+        Download file with progress bar (follows redirects), resumable.
+        Return SHA-256 hex digest computed while the chunks are written.
+        UA: Завантажує файл з відображенням прогресу.
+            Пише у save_path.part + save_path.part.json (URL, ETag, розмір, прогрес сегментів);
+            після обриву — докачка з offset-у (Range: bytes=N-) як у наступній спробі,
+            так і при наступному запуску. Якщо сервер підтримує Range і файл достатньо
+            великий — паралельно по сегментах (download_segments з'єднань).
+        """
+        for attempt in range(1, DOWNLOAD_RETRIES + 1):
+            try:
+                return self._download_resumable(url, save_path)
+            except Exception as e:
+                if attempt == DOWNLOAD_RETRIES:
+                    raise
+                self.metrics.add("retries")
+                response = getattr(e, "response", None)
+                delay = self._backoff_delay(attempt, response.headers.get("Retry-After") if response is not None else None)
+                self.log(f"   Спроба {attempt}/{DOWNLOAD_RETRIES} невдала: {e}. Докачка через {delay:.1f}с...", Colors.YELLOW)
+                time.sleep(delay)
+
+    def _download_resumable(self, url: str, save_path: str) -> str:
+        """
+        One download attempt into .part, continuing from the sidecar state if it still matches.
+        UA: Одна спроба: звіряє .part.json з віддаленим об'єктом (ETag / розмір / Last-Modified),
+            докачує лише відсутні байти, по завершенні — атомарно перейменовує .part → save_path.
+            Повертає SHA-256, порахований під час запису (_RangeHasher).
+        """
+        part_path = save_path + ".part"
+        remote = self._probe_remote(url)
+        state = self._load_part_state(part_path)
+
+        if state and not self._part_matches(state, url, remote):
+            self.log("   ℹ️  Віддалений файл змінився — завантаження з нуля.", Colors.CYAN)
+            state = None
+        if state and not os.path.exists(part_path):
+            state = None
+
+        if state is None:
+            self._discard_part(part_path)
+            if not remote["ranges"] or remote["total"] <= 0:
+                # UA: Без Range докачка неможлива — звичайне завантаження в .part
+                hasher = _RangeHasher(part_path)
+                self._download_single(remote["url"], part_path, hasher)
+                os.replace(part_path, save_path)
+                return hasher.hexdigest()
+            state = self._new_part_state(url, remote)
+            with open(part_path, "wb") as f:
+                f.truncate(remote["total"])  # UA: попереднє виділення — сегменти пишуть у свої offset-и
+            self._save_part_state(part_path, state)
+        else:
+            done = sum(r[2] for r in state["ranges"])
+            self.log(f"   ⏯️  Докачка: {done // 1024} KiB з {state['total'] // 1024} KiB вже є.", Colors.CYAN)
+
+        hasher = _RangeHasher(part_path, state["ranges"])
+        try:
+            self._download_ranges(remote["url"], part_path, state, hasher)
+        except _RangeNotSupported as e:
+            self.log(f"   ℹ️  Докачка/сегменти недоступні ({e}) — один потік з нуля.", Colors.CYAN)
+            self._discard_part(part_path)
+            hasher = _RangeHasher(part_path)
+            self._download_single(remote["url"], part_path, hasher)
+
+        os.replace(part_path, save_path)
+        self._discard_part(part_path, keep_data=True)
+        hasher.path = save_path
+        return hasher.hexdigest()
+
+    def _download_single(self, url: str, save_path: str, hasher: Optional[_RangeHasher] = None) -> None:
+        """Single-stream download. UA: Завантаження одним з'єднанням (хеш — з тих самих chunk-ів)."""
+        with self.request("GET", url, stream=True) as r:
+            r.raise_for_status()
+            total = int(r.headers.get("content-length", 0))
+            downloaded = 0
+            progress = self.progress("   Download", total)
+            with open(save_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK):
+                    f.write(chunk)
+                    if hasher:
+                        hasher.feed(downloaded, chunk)
+                    downloaded += len(chunk)
+                    progress.update(downloaded)
+            progress.finish()
+
+    def _probe_remote(self, url: str) -> dict:
+        """
+        HEAD probe: final URL after redirects, size, ETag/Last-Modified, Range support.
+        UA: Метадані віддаленого файлу. Помилка HEAD → «нічого не відомо» (без Range).
+        """
+        info = {"url": url, "total": 0, "etag": None, "last_modified": None, "ranges": False}
+        try:
+            r = self.request("HEAD", url, allow_redirects=True)
+            r.raise_for_status()
+        except Exception:
+            return info
+        info["url"] = r.url
+        info["total"] = int(r.headers.get("content-length", 0) or 0)
+        info["etag"] = r.headers.get("etag")
+        info["last_modified"] = r.headers.get("last-modified")
+        info["ranges"] = r.headers.get("accept-ranges", "").lower() == "bytes"
+        return info
+
+    # -----------------------------------------------------------------------
+    # .part + .part.json (стан докачки)
+    # -----------------------------------------------------------------------
+    def _new_part_state(self, url: str, remote: dict) -> dict:
+        """Split remote object into ranges. UA: Новий стан: сегменти [start, end, записано]."""
+        total = remote["total"]
+        segments = max(1, min(self.download_segments, total // DOWNLOAD_MIN_SEGMENT))
+        step = -(-total // segments)  # UA: ceil(total / segments)
+        return {
+            "url": url,
+            "etag": remote["etag"],
+            "last_modified": remote["last_modified"],
+            "total": total,
+            "ranges": [[start, min(start + step, total) - 1, 0] for start in range(0, total, step)],
+        }
+
+    @staticmethod
+    def _part_matches(state: dict, url: str, remote: dict) -> bool:
+        """Same remote object as recorded? UA: Той самий об'єкт: URL, розмір, ETag (або Last-Modified)."""
+        if state.get("url") != url or state.get("total") != remote["total"] or not remote["ranges"]:
+            return False
+        if state.get("etag") or remote["etag"]:
+            return state.get("etag") == remote["etag"]
+        return state.get("last_modified") == remote["last_modified"]
+
+    @staticmethod
+    def _load_part_state(part_path: str) -> Optional[dict]:
+        """UA: Читає .part.json (None — немає або пошкоджений)."""
+        try:
+            with open(part_path + ".json", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) and state.get("ranges") else None
+        except Exception:
+            return None
+
+    @staticmethod
+    def _save_part_state(part_path: str, state: dict) -> None:
+        """UA: Атомарний запис .part.json (tmp → replace)."""
+        tmp_path = part_path + ".json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, part_path + ".json")
+
+    @staticmethod
+    def _discard_part(part_path: str, keep_data: bool = False) -> None:
+        """UA: Видаляє .part.json (і сам .part, якщо keep_data=False)."""
+        paths = [part_path + ".json", part_path + ".json.tmp"] + ([] if keep_data else [part_path])
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _download_ranges(self, url: str, part_path: str, state: dict, hasher: _RangeHasher) -> None:
+        """
+        Fetch the missing tail of every range in parallel, persisting progress.
+        UA: Докачує незавершені сегменти паралельно (ThreadPoolExecutor + пул з'єднань),
+            кожен — у свій offset файлу .part; прогрес періодично зберігається в .part.json.
+            Відповідь 200 замість 206 (Range/If-Range відхилено) → _RangeNotSupported.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        total = state["total"]
+        pending = [r for r in state["ranges"] if r[2] < r[1] - r[0] + 1]
+        if len(pending) > 1:
+            self.log(f"   🔀 Сегментоване завантаження: {len(pending)} з'єднань", Colors.CYAN)
+
+        lock = threading.Lock()
+        progress = {"done": sum(r[2] for r in state["ranges"]), "saved": 0}
+        progress["saved"] = progress["done"]
+        reporter = self.progress("   Download", total, initial=progress["done"])
+
+        hasher.catch_up()  # UA: при докачці — хешуємо вже наявний префікс
+
+        def on_progress(rng: list, offset: int, chunk: bytes) -> None:
+            n = len(chunk)
+            with lock:
+                rng[2] += n
+                progress["done"] += n
+                if progress["done"] - progress["saved"] >= PART_STATE_EVERY:
+                    self._save_part_state(part_path, state)
+                    progress["saved"] = progress["done"]
+                reporter.update(progress["done"])
+            hasher.feed(offset, chunk)  # UA: поза спільним замком — дочитування не гальмує інші сегменти
+
+        validator = state.get("etag") or state.get("last_modified")
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix="7zip_dl") as pool:
+                futures = [pool.submit(self._fetch_range, url, part_path, rng, validator, on_progress) for rng in pending]
+                try:
+                    for fut in futures:
+                        fut.result()
+                except Exception:
+                    for fut in futures:
+                        fut.cancel()  # UA: не запускаємо сегменти, що ще в черзі
+                    raise
+        finally:
+            with lock:
+                self._save_part_state(part_path, state)
+            reporter.finish()
+
+    def _fetch_range(self, url: str, part_path: str, rng: list, validator: Optional[str], on_progress) -> None:
+        """Fetch rng[0]+rng[2]..rng[1] at its offset. UA: Один сегмент: докачка з offset-у у файл .part."""
+        start, end = rng[0] + rng[2], rng[1]
+        headers = {'Range': f"bytes={start}-{end}"}
+        if validator:
+            headers['If-Range'] = validator  # UA: об'єкт змінився → сервер віддасть 200, а не 206
+        with self.request("GET", url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code != 206 or not r.headers.get("content-range", "").startswith(f"bytes {start}-"):
+                raise _RangeNotSupported(f"HTTP {r.status_code} на Range-запит")
+            # UA: buffering=0 — лічильник у .part.json ніколи не випереджає записане на диск
+            with open(part_path, "r+b", buffering=0) as f:
+                f.seek(start)
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK):
+                    f.write(chunk)
+                    on_progress(rng, start, chunk)
+                    start += len(chunk)
+        if rng[2] != rng[1] - rng[0] + 1:
+            raise ConnectionError(f"Сегмент {rng[0]}-{rng[1]}: отримано {rng[2]} з {rng[1] - rng[0] + 1} байт")
+
+    def _extract_extra_archive(self, archive_path: str, target_dir: str, version: Optional[str] = None) -> None:
+        """
+        Extract 7-Zip Extra .7z archive using the existing 7za.exe.
+        UA: Розпаковує Extra архів поверх apps/7zip/ за допомогою поточного 7za.exe.
+            Розпаковуємо у staging-папку поруч з apps/7zip/ (той самий том), а не в %TEMP% —
+            щоб уникнути конфлікту "оновлення себе" (7za.exe не можна перезаписати поки він
+            запущений) і зайвого копіювання між томами. Далі залежно від install_mode:
+              - "delta"  — копіювання лише змінених файлів (_copy_extracted_files)
+              - "staged" — атомарна заміна дерева перейменуванням (_swap_staged_tree)
+            Маніфест запам'ятовує архів і версію (source) — з них --repair бере зіпсовані файли.
+        """
+        source = {"version": version, "archive": os.path.basename(archive_path)}
+        stage_dir = self._sibling_dir(target_dir, f"staging-{os.getpid()}")
+        try:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            os.makedirs(stage_dir)
+        except OSError:
+            # UA: Немає прав на батьківську папку — fallback на %TEMP% (лише delta)
+            stage_dir = tempfile.mkdtemp(prefix="7zip_update_")
+        try:
+            self.log(f"   📂 Staging-папка: {stage_dir}", Colors.CYAN)
+            with self.span("extract", bytes=os.path.getsize(archive_path)):
+                self._run_7za_extract(archive_path, stage_dir)
+
+            # UA: Структура Extra архіву: файли лежать у корені (без підпапки з версією)
+            with self.span("install", mode=self.install_mode) as sp:
+                if self.install_mode == "staged" and os.path.dirname(stage_dir) == os.path.dirname(os.path.abspath(target_dir)):
+                    if self._swap_staged_tree(stage_dir, target_dir, source):
+                        return
+                    sp["mode"] = "delta"
+                stats = self._copy_extracted_files(stage_dir, target_dir, source)
+                sp["bytes"] = stats["bytes_written"]
+
+        finally:
+            # UA: Завжди видаляємо staging-папку (після swap її вже немає)
+            try:
+                shutil.rmtree(stage_dir, ignore_errors=True)
+            except Exception:
+                pass
+
+    def _run_7za_extract(self, archive_path: str, out_dir: str, exe: Optional[str] = None,
+                         members: Optional[list] = None) -> None:
+        """Run 7za x into out_dir with progress. UA: Розпакування архіву поточним 7za.exe
+        (members — лише ці члени архіву, напр. для --repair; інакше — фільтри профілю)."""
+        # UA: Використовуємо поточний 7za.exe для розпакування (fleet — 7za.exe одного з дерев)
+        cmd = [exe or self.sevenzip_exe, "x", archive_path, f"-o{out_dir}", "-y", "-bsp1"]
+        cmd += [m.replace("/", "\\") for m in members] if members else self._extract_filters()
+        # UA: 7za звітує відсотки — переводимо у байти архіву (швидкість/ETA як у завантаження)
+        size = os.path.getsize(archive_path)
+        progress = self.progress("   Розпакування", size)
+        process = self.sevenzip_process(cmd, on_percent=lambda pct: progress.update(pct * size // 100))
+        try:
+            process.run()
+        finally:
+            if process.returncode == 0 and not process.reason:
+                progress.update(size)
+            progress.finish()
+        self._check_7za(process)
+
+    def sevenzip_process(self, cmd: list, on_percent=None) -> SevenZipProcess:
+        """UA: SevenZipProcess з таймаутами (SEVENZIP_TIMEOUT / SEVENZIP_IDLE_TIMEOUT) і cancel_event менеджера."""
+        return SevenZipProcess(
+            cmd, timeout=self.sevenzip_timeout or None, idle_timeout=self.sevenzip_idle_timeout or None,
+            cancel=self.cancel_event, on_percent=on_percent,
+        )
+
+    @staticmethod
+    def _check_7za(process: SevenZipProcess) -> None:
+        """UA: RuntimeError з причиною і хвостом виводу 7za (код ≠ 0, таймаут, скасування)."""
+        reasons = {"timeout": "загальний таймаут", "idle": "немає виводу (idle timeout)", "cancelled": "скасовано"}
+        if process.reason:
+            raise RuntimeError(f"7za.exe зупинено: {reasons[process.reason]} — {process.output_tail()}")
+        if process.returncode != 0:
+            raise RuntimeError(f"7za.exe повернув код {process.returncode}: {process.output_tail()}")
+
+    # -----------------------------------------------------------------------
+    # STAGED INSTALL (атомарна заміна дерева)
+    # -----------------------------------------------------------------------
+    @staticmethod
+    def _sibling_dir(target_dir: str, suffix: str) -> str:
+        """UA: Папка поруч з target_dir (той самий том): apps/.7zip.<suffix>."""
+        target_dir = os.path.abspath(target_dir)
+        return os.path.join(os.path.dirname(target_dir), f".{os.path.basename(target_dir)}.{suffix}")
+
+    def _swap_staged_tree(self, stage_dir: str, target_dir: str, source: Optional[dict] = None) -> bool:
+        """
+        Make stage_dir the live tree via renames; keep the old tree as .previous.
+        UA: Переносить у staging файли поза маніфестом (напр. README.md), пише маніфест,
+            потім: apps/7zip → apps/.7zip.previous, staging → apps/7zip (дві операції з метаданими,
+            без копіювання байтів). Помилка другого перейменування → повернення старого дерева.
+            Повертає False, якщо дерево заблоковане (Windows lock) — тоді виклик іде у delta-режим;
+            перенесені файли і маніфест перед цим прибираються зі staging (лише вміст архіву).
+        """
+        previous_dir = self._sibling_dir(target_dir, "previous")
+        old_files = self._load_install_manifest(target_dir).get("files", {})
+        new_files: dict = {}
+
+        for root, _dirs, files in os.walk(stage_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, stage_dir).replace(os.sep, "/")
+                st = os.stat(path)
+                new_files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(path)}
+
+        # UA: Файли, яких немає ні в архіві, ні в маніфесті старого дерева — наші (README.md тощо)
+        carried: list = []
+        if os.path.isdir(target_dir):
+            for root, _dirs, files in os.walk(target_dir):
+                for name in files:
+                    src = os.path.join(root, name)
+                    rel = os.path.relpath(src, target_dir).replace(os.sep, "/")
+                    if rel in new_files or rel in old_files or rel.startswith(INSTALL_MANIFEST):
+                        continue
+                    dst = os.path.join(stage_dir, *rel.split("/"))
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    carried.append(dst)
+        self._save_install_manifest(stage_dir, {"files": new_files, "source": source or {}})
+
+        shutil.rmtree(previous_dir, ignore_errors=True)
+        if os.path.isdir(target_dir):
+            try:
+                os.rename(target_dir, previous_dir)
+            except OSError as e:
+                self.log(f"   ⚠️ Дерево заблоковане ({e}) — delta-копіювання замість заміни.", Colors.YELLOW)
+                # UA: delta копіює staging як вміст архіву — свої файли й маніфест туди не повинні потрапити
+                for path in carried + [os.path.join(stage_dir, INSTALL_MANIFEST)]:
+                    try:
+                        os.remove(path)
+                        self._remove_empty_parents(os.path.dirname(path), stage_dir)
+                    except OSError:
+                        pass
+                return False
+            os.utime(previous_dir)  # UA: вік .previous рахуємо від моменту заміни
+        try:
+            os.rename(stage_dir, target_dir)
+        except OSError:
+            if os.path.isdir(previous_dir) and not os.path.exists(target_dir):
+                os.rename(previous_dir, target_dir)  # UA: відкат — старе дерево знову живе
+            raise
+        self.invalidate_version_cache(target_dir)
+
+        self.log(
+            f"   🔁 Staged: нове дерево активоване перейменуванням ({len(new_files)} файлів, "
+            f"перенесено своїх: {len(carried)}); попереднє — {os.path.basename(previous_dir)}",
+            Colors.CYAN,
+        )
+        return True
+
+    def rollback_install(self) -> bool:
+        """
+        Swap the live tree with .previous (instant rollback, itself reversible).
+        UA: Миттєвий відкат: apps/7zip ⇄ apps/.7zip.previous (три перейменування).
+        """
+        target_dir = self.sevenzip_dir
+        previous_dir = self._sibling_dir(target_dir, "previous")
+        if not os.path.isdir(previous_dir):
+            self.log("   ⚠️ Попереднього дерева немає — відкат неможливий.", Colors.YELLOW)
+            return False
+        swap_dir = self._sibling_dir(target_dir, f"rollback-{os.getpid()}")
+        os.rename(target_dir, swap_dir)
+        try:
+            os.rename(previous_dir, target_dir)
+        except OSError:
+            os.rename(swap_dir, target_dir)
+            raise
+        os.rename(swap_dir, previous_dir)
+        os.utime(previous_dir)
+        self.invalidate_version_cache(target_dir)
+        self.log("   ⏪ Відкат виконано: активне попереднє дерево.", Colors.GREEN)
+        return True
+
+    def cleanup_install_siblings(self, max_days: int = PREVIOUS_KEEP_DAYS, target_dir: Optional[str] = None) -> None:
+        """
+        Remove stale staging dirs and .previous older than max_days.
+        UA: Автоприбирання: staging-папки від перерваних запусків та .previous старше max_days.
+        """
+        target_dir = os.path.abspath(target_dir or self.sevenzip_dir)
+        parent, base = os.path.dirname(target_dir), os.path.basename(target_dir)
+        try:
+            names = os.listdir(parent)
+        except OSError:
+            return
+        own_stage = os.path.basename(self._sibling_dir(target_dir, f"staging-{os.getpid()}"))
+        for name in names:
+            path = os.path.join(parent, name)
+            stale_stage = name.startswith(f".{base}.staging-") and name != own_stage
+            old_previous = (
+                name == f".{base}.previous"
+                and time.time() - os.path.getmtime(path) > max_days * 86400
+            )
+            if stale_stage or old_previous:
+                shutil.rmtree(path, ignore_errors=True)
+                self.log(f"   🗑️  Прибрано: {name}", Colors.YELLOW)
+
+    def _copy_extracted_files(self, src_dir: str, dst_dir: str, source: Optional[dict] = None) -> dict:
+        """
+        Delta-copy extracted files to target directory.
+        UA: Копіює у цільову папку лише додані/змінені файли (порівняння за маніфестом
+            розмір + mtime + SHA-256) і видаляє файли, які були встановлені з попереднього
+            архіву, але зникли з нового. У маніфест потрапляє все, що є в архіві (і файл, що вже
+            лежав на диску з тим самим вмістом); файли поза архівом (напр. README.md) і сам маніфест —
+            ніколи, тож і не видаляються. src_dir — лише вміст архіву (staging без перенесених
+            файлів користувача, див. _swap_staged_tree). 7za.exe не можна перезаписати поки він запущений — але ми
+            вже завершили розпакування, тому копіювання безпечне.
+            Повертає статистику: written/skipped/deleted (+ байти).
+        """
+        os.makedirs(dst_dir, exist_ok=True)
+        old_files = self._load_install_manifest(dst_dir).get("files", {})
+        new_files: dict = {}
+        stats = {"written": 0, "bytes_written": 0, "skipped": 0, "bytes_skipped": 0, "deleted": 0}
+
+        for root, _dirs, files in os.walk(src_dir):
+            for name in files:
+                src = os.path.join(root, name)
+                rel = os.path.relpath(src, src_dir).replace(os.sep, "/")
+                if rel.startswith(INSTALL_MANIFEST):
+                    continue  # UA: маніфест (і його .tmp) — не вміст архіву
+                dst = os.path.join(dst_dir, *rel.split("/"))
+                try:
+                    src_sha = _file_sha256(src)
+                    size = os.path.getsize(src)
+                    if self._installed_matches(dst, old_files.get(rel), size, src_sha):
+                        st = os.stat(dst)
+                        stats["skipped"] += 1
+                        stats["bytes_skipped"] += size
+                    else:
+                        if os.path.isdir(dst):
+                            shutil.rmtree(dst)
+                        os.makedirs(os.path.dirname(dst), exist_ok=True)
+                        shutil.copy2(src, dst)
+                        st = os.stat(dst)
+                        stats["written"] += 1
+                        stats["bytes_written"] += size
+                    new_files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": src_sha}
+                except Exception as e:
+                    self.log(f"   ⚠️ Не вдалося скопіювати {rel}: {e}", Colors.YELLOW)
+
+        # UA: Видаляємо лише те, що сами встановили раніше і чого немає в новому архіві
+        for rel in sorted(set(old_files) - set(new_files)):
+            dst = os.path.join(dst_dir, *rel.split("/"))
+            try:
+                os.remove(dst)
+                stats["deleted"] += 1
+                self._remove_empty_parents(os.path.dirname(dst), dst_dir)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.log(f"   ⚠️ Не вдалося видалити {rel}: {e}", Colors.YELLOW)
+                new_files[rel] = old_files[rel]  # UA: лишаємо у маніфесті — спробуємо наступного разу
+
+        self._save_install_manifest(dst_dir, {"files": new_files, "source": source or {}})
+        if stats["written"] or stats["deleted"]:
+            self.invalidate_version_cache(dst_dir)
+        self.log(
+            f"   📋 Delta: записано {stats['written']} ({stats['bytes_written'] // 1024} KiB), "
+            f"пропущено {stats['skipped']} ({stats['bytes_skipped'] // 1024} KiB), "
+            f"видалено {stats['deleted']}",
+            Colors.CYAN,
+        )
+        return stats
+
+    @staticmethod
+    def _installed_matches(dst: str, entry: Optional[dict], size: int, sha256: str) -> bool:
+        """
+        Is dst already byte-identical to the new file?
+        UA: Маніфест + stat збігаються → порівнюємо збережений хеш (без читання dst);
+            stat змінився або маніфесту немає → хешуємо dst (лише при однаковому розмірі).
+        """
+        try:
+            st = os.stat(dst)
+        except OSError:
+            return False
+        if not os.path.isfile(dst) or st.st_size != size:
+            return False
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry.get("sha256") == sha256
+        return _file_sha256(dst) == sha256
+
+    @staticmethod
+    def _remove_empty_parents(path: str, stop_dir: str) -> None:
+        """UA: Прибирає порожні папки вгору до stop_dir (не включно)."""
+        stop_dir = os.path.abspath(stop_dir)
+        path = os.path.abspath(path)
+        while path != stop_dir and path.startswith(stop_dir):
+            try:
+                os.rmdir(path)
+            except OSError:
+                return
+            path = os.path.dirname(path)
+
+    @staticmethod
+    def _load_install_manifest(dst_dir: str) -> dict:
+        """UA: Маніфест встановленого дерева (порожній — немає або пошкоджений)."""
+        try:
+            with open(os.path.join(dst_dir, INSTALL_MANIFEST), encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _save_install_manifest(dst_dir: str, manifest: dict) -> None:
+        """UA: Атомарний запис маніфесту (tmp → replace)."""
+        path = os.path.join(dst_dir, INSTALL_MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+# ---------------------------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------------------------
+def main() -> None:
+    """Main entry point. UA: Головна функція менеджера.
+    Усі побічні ефекти (залежності, ANSI, логування, таймер) — тут, а не під час імпорту."""
+    global _auto_close
+    start_time = time.time()
+
+    os.system('')  # UA: Вмикаємо ANSI-кольори в Windows CMD
+    ensure_dependencies()
+    manager = SevenZipManager()
+    if "--staged" in sys.argv:
+        manager.install_mode = "staged"
+    for arg in sys.argv[1:]:
+        if arg.startswith("--components="):
+            manager.components = _parse_install_profile(arg.split("=", 1)[1])
+    manager.setup_logging()
+
+    # UA: --serve[=[HOST:]PORT] — LAN-дзеркало замість оновлення (без автозакриття)
+    for arg in sys.argv[1:]:
+        if arg == "--serve" or arg.startswith("--serve="):
+            bind = arg.partition("=")[2]
+            host, _, port = bind.rpartition(":") if ":" in bind else ("", "", bind)
+            manager.serve_mirror(host or None, int(port) if port else None)
+            return
+
+    # UA: --daemon — резидентний режим без TTY (розклад + jitter, стан у файлі, код виходу)
+    if "--daemon" in sys.argv:
+        if not os.path.exists(manager.sevenzip_exe):
+            manager.log(f"❌ 7za.exe не знайдено: {manager.sevenzip_exe}", Colors.RED)
+            sys.exit(EXIT_FAILED)
+        sys.exit(manager.run_daemon())
+
+    # UA: --batch=FILE — jobs compress / extract / test з маніфесту, JSON-підсумок поруч (без оновлення)
+    for arg in sys.argv[1:]:
+        if arg.startswith("--batch="):
+            sys.exit(_run_batch_cli(manager, arg.split("=", 1)[1]))
+
+    _auto_close = AutoCloseTimer(30, on_exit=manager.shutdown_logging)
+
+    _console_drain()
+    os.system('cls' if os.name == 'nt' else 'clear')
+    _console_write("\n\n")
+    cprint("=" * 50, Colors.HEADER)
+    cprint(f"🚀 MNT: 7-ZIP EXTRA (AUTO-PILOT v{__version__})", Colors.HEADER)
+    cprint(f"   Hash: {get_manager_hash()}", Colors.BLUE)
+    cprint("=" * 50 + "\n", Colors.HEADER)
+
+    # UA: --fleet[=ROOTS] — кілька дерев 7-Zip (ROOTS або FLEET_ROOTS: через os.pathsep або @файл)
+    fleet_roots = None
+    for arg in sys.argv[1:]:
+        if arg == "--fleet" or arg.startswith("--fleet="):
+            fleet_roots = _parse_fleet_roots(arg.partition("=")[2] or manager.env.get("FLEET_ROOTS", ""))
+
+    # UA: Single-flight — другий запуск чекає на перший і бере його результат (--no-wait — лише статус)
+    # UA: --verify[=deep] / --repair — перевірка дерева за маніфестом (repair — завжди deep)
+    verify_mode = None
+    if "--verify=deep" in sys.argv or "--repair" in sys.argv:
+        verify_mode = "deep"
+    elif "--verify" in sys.argv:
+        verify_mode = "fast"
+
+    action = ("rollback" if "--rollback" in sys.argv else "fleet" if fleet_roots is not None
+              else "repair" if "--repair" in sys.argv else "verify" if verify_mode else "update")
+    lock = manager.run_lock = RunLock(manager.run_lock_file)
+    reuse = None
+    if not lock.acquire(wait=False, action=action):
+        state = lock.read()
+        age = int(time.time() - float(state.get("started") or time.time()))
+        manager.log(
+            f"⏳ Уже виконується інший запуск: PID {state.get('pid', '?')} ({state.get('action', '?')}), "
+            f"фаза: {state.get('phase') or '—'}, {age} с",
+            Colors.YELLOW,
+        )
+        if "--no-wait" in sys.argv:
+            sys.exit(EXIT_BUSY)
+        wait_started = time.time()
+        if not lock.acquire(timeout=_env_int(manager.env, "RUN_LOCK_WAIT", RUN_LOCK_WAIT), action=action):
+            manager.log("❌ Інший запуск не завершився вчасно (RUN_LOCK_WAIT).", Colors.RED)
+            sys.exit(EXIT_BUSY)
+        previous = lock.previous
+        if (previous.get("status") == "finished" and previous.get("ok") and previous.get("action") == action
+                and float(previous.get("finished") or 0) >= wait_started and "--reinstall" not in sys.argv):
+            reuse = previous
+    if lock.stale:
+        manager.log(f"   ⚠️ Попередній запуск (PID {lock.previous.get('pid', '?')}) було перервано "
+                    f"на фазі {lock.previous.get('phase') or '—'}.", Colors.YELLOW)
+
+    if fleet_roots is None and not os.path.exists(manager.sevenzip_exe):
+        manager.log(f"❌ 7za.exe не знайдено: {manager.sevenzip_exe}", Colors.RED)
+        lock.release(ok=False)
+        _pause_before_exit()
+        sys.exit(EXIT_FAILED)
+
+    # UA: --profile — cProfile на весь запуск, статистика поруч з логами
+    profiler = None
+    if "--profile" in sys.argv:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        manager.serial_phases = True  # UA: cProfile бачить лише потік, що його увімкнув
+
+    # UA: Крок 3 — перевірка та оновлення (або відкат на попереднє дерево); True — успіх
+    def update_step() -> bool:
+        if reuse is not None:
+            labels = reuse.get("labels") or {}
+            manager.metrics.labels.update(labels)
+            manager.log(
+                f"♻️  Паралельний запуск (PID {reuse.get('pid', '?')}) щойно виконав {action}: "
+                f"версія {labels.get('installed', '?')} — повтор не потрібен.",
+                Colors.GREEN,
+            )
+        elif "--rollback" in sys.argv:
+            with manager.span("rollback"):
+                manager.rollback_install()
+        elif verify_mode is not None:
+            with manager.span("verify", mode=verify_mode) as sp:
+                report = manager.verify_install(deep=verify_mode == "deep")
+                sp["bytes"] = report["bytes_hashed"]
+            if report["ok"] is None:
+                manager.log("   ℹ️  Маніфесту немає — дерево встановлене не менеджером, звіряти ні з чим.", Colors.CYAN)
+            if "--repair" in sys.argv and report["drifted"]:
+                with manager.span("repair"):
+                    repaired = manager.repair_install(report)
+                return not repaired["failed"]
+            return report["ok"] is not False
+        elif fleet_roots is not None:
+            if not fleet_roots:
+                raise ValueError("--fleet: список коренів порожній (FLEET_ROOTS у .env або --fleet=ROOTS)")
+            with manager.span("update"):
+                results = manager.update_fleet(fleet_roots, refresh="--refresh" in sys.argv, reinstall="--reinstall" in sys.argv)
+            cprint("-" * 50, Colors.BLUE)
+            for root, item in results.items():
+                color = Colors.RED if item["status"] == "failed" else Colors.GREEN
+                detail = item.get("error") or f"{item.get('before', '?')} → {item.get('after', '?')}"
+                cprint(f"   {item['status']:<10} {root}  ({detail})", color)
+            return all(item["status"] != "failed" for item in results.values())
+        else:
+            with manager.span("update"):
+                result = manager.check_and_update(refresh="--refresh" in sys.argv, reinstall="--reinstall" in sys.argv)
+            return result != "failed"
+        return True
+
+    # UA: Кроки незалежні (PATH — реєстр, логи — LOG_DIR, оновлення — apps/7zip + мережа) — паралельно;
+    #     вивід у консоль — у порядку кроків. Стиснення part-файлів (фон) чекаємо після ротації.
+    plan = PhasePlan(manager)
+    plan.add("path_check", manager.ensure_in_system_path)
+    plan.add("log_cleanup", lambda: manager.cleanup_old_logs(max_days=_env_int(manager.env, "LOG_KEEP_DAYS", LOG_KEEP_DAYS)))
+    plan.add("update_step", update_step, span=False)
+    plan.add("log_compress", manager.wait_log_maintenance, after=("log_cleanup",))
+    try:
+        ok = plan.run()["update_step"]
+    except Exception as e:
+        manager.log(f"❌ Критична помилка: {e}", Colors.RED)
+        _finish_run(manager, profiler, ok=False)
+        _pause_before_exit()
+        sys.exit(EXIT_FAILED)
+
+    _finish_run(manager, profiler, ok=ok)
+    elapsed = time.time() - start_time
+    cprint("-" * 50, Colors.BLUE)
+    # UA: Фази йдуть паралельно — впорядковуємо за стартом, вкладені (update) — під батьком
+    spans = sorted(manager.metrics.spans, key=lambda sp: sp["start"])
+    for span in spans:
+        if "parent" in span:
+            continue
+        cprint(f"   {span['name']:<16} {span['duration']:7.2f} с", Colors.BLUE)
+        for child in spans:
+            if span["name"] == "update" and child.get("parent") == "update":
+                cprint(f"      {child['name']:<16} {child['duration']:7.2f} с", Colors.BLUE)
+    cprint(f"⏱️  Час виконання: {elapsed:.1f} сек", Colors.BLUE)
+    _console_write("\n\n")
+
+    # UA: Автозакриття через 30 секунд (лише в інтерактивній консолі)
+    if "--install-only" not in sys.argv and sys.stdout.isatty():
+        for i in range(30, 0, -1):
+            _console_write(f"\r{Colors.CYAN}Автозакриття через {i} с... {Colors.RESET}")
+            time.sleep(1)
+        _console_write(f"\r{Colors.CYAN}Автозакриття через 0 с...  {Colors.RESET}   \n")
+    sys.exit(EXIT_OK if ok else EXIT_FAILED)
+
+
+def _run_batch_cli(manager: "SevenZipManager", manifest_path: str) -> int:
+    """UA: --batch: маніфест → run_batch() → таблиця + JSON-підсумок (атомарно); код виходу."""
+    try:
+        manifest = _load_batch_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        manager.log(f"❌ Маніфест batch: {e}", Colors.RED)
+        return EXIT_FAILED
+    if not os.path.exists(manager.sevenzip_exe):
+        manager.log(f"❌ 7za.exe не знайдено: {manager.sevenzip_exe}", Colors.RED)
+        return EXIT_FAILED
+    try:
+        with manager.span("batch", jobs=len(manifest["jobs"])) as sp:
+            summary = manager.run_batch(manifest["jobs"], manifest["workers"], manifest["threads"])
+            sp["bytes"] = summary["bytes"]
+    except Exception as e:
+        manager.log(f"❌ Batch: {e}", Colors.RED)
+        manager.write_run_report(ok=False)
+        return EXIT_FAILED
+    summary["manifest"] = manifest["path"]
+
+    cprint("-" * 50, Colors.BLUE)
+    for job in summary["jobs"]:
+        color = Colors.GREEN if job["status"] == "ok" else Colors.RED
+        cprint(f"   {job['id']:<12} {job['op']:<9} {job['status']:<7} {job['seconds']:8.2f} с "
+               f"{job['mib_per_s'] or 0:8.2f} MiB/s  {os.path.basename(job['archive'])}", color)
+    cprint(f"   Разом: {_format_bytes(summary['bytes'])} за {summary['seconds']:.2f} с "
+           f"({summary['mib_per_s']} MiB/s)", Colors.BLUE)
+
+    tmp_path = manifest["output"] + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest["output"])
+        manager.log(f"   📊 Результати: {manifest['output']}", Colors.CYAN)
+    except OSError as e:
+        manager.log(f"❌ Не вдалося записати результати {manifest['output']}: {e}", Colors.RED)
+        summary["ok"] = False
+    manager.write_run_report(ok=summary["ok"])
+    return EXIT_OK if summary["ok"] else EXIT_FAILED
+
+
+def _pause_before_exit() -> None:
+    """UA: «Enter для виходу» — лише в інтерактивній консолі (--install-only / без TTY — не блокує).
+        Поки чекаємо на Enter, працює AutoCloseTimer: без реакції — os._exit після зливу логів (on_exit)."""
+    if "--install-only" in sys.argv or sys.stdin is None or not sys.stdin.isatty():
+        return
+    _console_drain()
+    if _auto_close is not None:
+        _auto_close.start()
+    try:
+        input("Enter для виходу...")
+    finally:
+        if _auto_close is not None:
+            _auto_close.stop()
+
+def _finish_run(manager: "SevenZipManager", profiler, ok: bool) -> None:
+    """UA: Звіт запуску (JSON + Prometheus) і, з --profile, статистика cProfile у LOG_DIR."""
+    if profiler is not None:
+        import pstats
+        profiler.disable()
+        prof_path = os.path.join(manager.log_dir, "7zip_profile.prof")
+        profiler.dump_stats(prof_path)
+        with open(os.path.join(manager.log_dir, "7zip_profile.txt"), "w", encoding="utf-8") as f:
+            pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        manager.log(f"   📊 Профіль: {prof_path}", Colors.CYAN)
+    report = manager.write_run_report(ok=ok)
+    if report:
+        manager.log(f"   📊 Звіт запуску: {report}", Colors.CYAN, console=False)
+    if manager.run_lock is not None:
+        manager.run_lock.release(ok=ok, labels=manager.metrics.labels)
 
-    # UA: Автозакриття через 30 секунд
-    if "--install-only" not in sys.argv:
-        for i in range(30, 0, -1):
-            sys.stdout.write(f"\r{Colors.CYAN}Автозакриття через {i} с... {Colors.RESET}")
-            sys.stdout.flush()
-            time.sleep(1)
-        sys.stdout.write(f"\r{Colors.CYAN}Автозакриття через 0 с...  {Colors.RESET}   \n")
-        sys.stdout.flush()
-        sys.exit(0)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: single-stream vs segmented (HTTP Range) download of the Extra archive.
+UA: Порівняння _download_with_progress() з DOWNLOAD_SEGMENTS=1 та N на локальному
+    stand-in сервері з затримкою та лімітом швидкості на з'єднання:
+    - час і пропускна здатність (MiB/s) для кожного режиму
+    - SHA-256 результату (і SHA-256, порахований «на льоту») збігається з оригіналом
+    - сервер без Range → коректний fallback на один потік
+    - обриви з'єднань → докачка з .part (у межах спроб і між окремими запусками),
+      сумарно передано ≈ розмір файлу, а не кратно більше
+
+Запуск:
+    python bench/bench_download.py [--size-mib 8] [--latency 0.05] [--bandwidth-kib 2048] [--segments 4]
+Вивід — JSON у stdout.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from common import load_manager
+from standin_server import StandinServer, synthetic_payload
+
+ARCHIVE_PATH = "/a/7z2600-extra.7z"
+
+
+def _run(m, base_url: str, segments: int, workdir: str, expected: str) -> dict:
+    """One download through SevenZipManager. UA: Одне завантаження + перевірка хешу."""
+    manager = m.SevenZipManager(env={"DOWNLOAD_SEGMENTS": str(segments)}, console=False,
+                                downloads_dir=workdir, log_dir=workdir)
+    save_path = os.path.join(workdir, f"extra_{segments}.7z")
+    t0 = time.perf_counter()
+    streamed_sha = manager._download_with_progress(base_url + ARCHIVE_PATH.lstrip("/"), save_path)
+    elapsed = time.perf_counter() - t0
+    with open(save_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    size = os.path.getsize(save_path)
+    return {
+        "segments": segments,
+        "seconds": round(elapsed, 3),
+        "mib_per_s": round(size / 1048576 / elapsed, 2),
+        "sha256_ok": digest == expected,
+        "streamed_sha256_ok": streamed_sha == expected,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mib", type=float, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--bandwidth-kib", type=int, default=2048, help="ліміт на одне з'єднання")
+    parser.add_argument("--segments", type=int, default=4)
+    args = parser.parse_args()
+
+    m = load_manager()
+    payload = synthetic_payload(int(args.size_mib * 1048576))
+    expected = hashlib.sha256(payload).hexdigest()
+    report = {"size_mib": args.size_mib, "latency_s": args.latency, "bandwidth_kib": args.bandwidth_kib}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = StandinServer({ARCHIVE_PATH: payload}, latency=args.latency,
+                               bandwidth=args.bandwidth_kib * 1024)
+        base_url = server.start()
+        try:
+            report["single"] = _run(m, base_url, 1, workdir, expected)
+            report["segmented"] = _run(m, base_url, args.segments, workdir, expected)
+        finally:
+            server.stop()
+
+        # UA: Сервер без підтримки Range — має бути чистий fallback на один потік
+        server = StandinServer({ARCHIVE_PATH: payload}, latency=args.latency,
+                               bandwidth=args.bandwidth_kib * 1024, ranges=False)
+        base_url = server.start()
+        try:
+            report["no_ranges_fallback"] = _run(m, base_url, args.segments, workdir, expected)
+            report["no_ranges_fallback"]["range_requests"] = sum(1 for r in server.requests if r[2])
+        finally:
+            server.stop()
+
+        # UA: Обриви: кожна з перших 2 відповідей рветься після 1/8 файлу — докачка в межах спроб
+        size = len(payload)
+        server = StandinServer({ARCHIVE_PATH: payload}, drops=2, drop_after=size // 8)
+        base_url = server.start()
+        try:
+            result = _run(m, base_url, 1, workdir, expected)
+            result["bytes_sent"] = server.bytes_sent
+            result["overhead"] = round(server.bytes_sent / size, 3)
+            report["resume_retries"] = result
+        finally:
+            server.stop()
+
+        # UA: Окремі запуски: перший запуск падає (1 спроба), другий докачує з .part.json
+        server = StandinServer({ARCHIVE_PATH: payload}, drops=1, drop_after=size // 2)
+        base_url = server.start()
+        retries, m.DOWNLOAD_RETRIES = m.DOWNLOAD_RETRIES, 1
+        try:
+            try:
+                _run(m, base_url, 1, workdir, expected)
+                first_failed = False
+            except Exception:
+                first_failed = True
+            result = _run(m, base_url, 1, workdir, expected)
+            result["first_run_failed"] = first_failed
+            result["bytes_sent"] = server.bytes_sent
+            result["overhead"] = round(server.bytes_sent / size, 3)
+            report["resume_across_runs"] = result
+        finally:
+            m.DOWNLOAD_RETRIES = retries
+            server.stop()
+
+    report["speedup"] = round(report["single"]["seconds"] / report["segmented"]["seconds"], 2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: end-to-end update against a local 7-zip.org stand-in and a fake 7za.
+UA: Повний check_and_update() офлайн — SEVENZIP_DOWNLOAD_PAGE/SEVENZIP_BASE_URL вказують
+    на standin_server (download.html + синтетичний 7zNNNN-extra.7z), розпаковує bench/fake_7za.py.
+    Сценарії (кожен — в окремому процесі, щоб peak RSS був саме його):
+    - update        — встановлено 25.01, на сервері нова версія: завантаження + розпакування + копіювання
+    - up_to_date    — повторний запуск з RELEASE_CACHE_TTL=0: conditional GET → 304, без завантаження
+    - reinstall     — --reinstall: архів зі сховища, delta-встановлення нічого не переписує; файл архіву,
+                      якого немає в старому маніфесті, але на диску той самий вміст, — потрапляє в маніфест
+    - store_corrupt — --reinstall, архів у сховищі пошкоджено без зміни розміру: SHA-256 не збігається,
+                      запис відкидається і архів качається заново
+    - drops         — свіжа капсула, перші відповіді обриваються: докачка, retries у span-і download
+    - staged_locked — INSTALL_MODE=staged, перейменування живого дерева падає (як Windows lock):
+                      fallback на delta не записує у маніфест README.md і сам маніфест, README.md живий
+    Метрики: загальний час, час фаз (span-и RunMetrics), пропускна здатність завантаження,
+    peak RSS процесу менеджера і дочірніх процесів (7za).
+
+Запуск (лише POSIX — фейковий 7za.exe є скриптом із shebang):
+    python bench/bench_e2e.py [--size-mib 8] [--latency 0.02] [--bandwidth-kib 0] [--version 26.00]
+                              [--output bench/results.jsonl]
+Вивід — JSON у stdout; --output дописує той самий звіт одним рядком (історія запусків).
+Код виходу 1 — якщо хоч один сценарій не пройшов перевірки.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BENCH_DIR, load_manager
+from fake_7za import install_fake_7za
+from standin_server import StandinServer, release_site
+
+SCHEMA = 1
+PHASES = ("version_probe", "release_check", "download", "extract", "install")
+
+
+def _peak_rss_mib(who: str = "self"):
+    """UA: Пік RSS (MiB) процесу або його дочірніх процесів; None — немає модуля resource (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    scale = 1 if sys.platform == "darwin" else 1024  # UA: macOS — байти, Linux — KiB
+    return round(usage.ru_maxrss * scale / 1048576, 1)
+
+
+def _child(args) -> None:
+    """One scenario inside a fresh interpreter. UA: Один запуск менеджера, JSON у stdout."""
+    m = load_manager()
+    root = args.workdir
+    env = {
+        "SEVENZIP_DOWNLOAD_PAGE": args.base_url + "download.html",
+        "SEVENZIP_BASE_URL": args.base_url,
+        "RELEASE_CACHE_TTL": "0",
+        "DOWNLOAD_SEGMENTS": str(args.segments),
+    }
+    live_dir = os.path.abspath(os.path.join(root, "apps", "7zip"))
+    if args.child == "staged_locked":
+        env["INSTALL_MODE"] = "staged"
+        with open(os.path.join(live_dir, "README.md"), "w", encoding="utf-8") as f:
+            f.write("user notes\n")
+        real_rename = os.rename
+
+        def locked_rename(src, dst):
+            if os.path.abspath(src) == live_dir:
+                raise PermissionError(13, "The process cannot access the file", src)
+            return real_rename(src, dst)
+        m.os.rename = locked_rename
+    adopted = None
+    if args.child == "reinstall":
+        # UA: Як після релізу, що не мав цього файлу: на диску він є (той самий вміст), у маніфесті — ні
+        manifest_path = os.path.join(live_dir, m.INSTALL_MANIFEST)
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        adopted = sorted(manifest["files"])[0]
+        del manifest["files"][adopted]
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+    store_dir = os.path.join(root, "downloads", "7zip_store")
+    if args.child == "store_corrupt":
+        for name in os.listdir(store_dir):
+            if name.endswith(".7z"):
+                with open(os.path.join(store_dir, name), "r+b") as f:
+                    f.seek(os.path.getsize(f.name) // 2)
+                    f.write(b"\x00" * 16)  # UA: розмір той самий — перевірка лише розміру пропустила б
+    manager = m.SevenZipManager(
+        sevenzip_dir=os.path.join(root, "apps", "7zip"), log_dir=os.path.join(root, "logs"),
+        downloads_dir=os.path.join(root, "downloads"), capsule_root=root, env=env, console=False,
+    )
+    t0 = time.perf_counter()
+    with manager.span("update"):
+        manager.check_and_update(reinstall=args.child in ("reinstall", "store_corrupt"))
+    total = time.perf_counter() - t0
+
+    phases: dict = {}
+    for span in manager.metrics.spans:
+        if span["name"] in PHASES:
+            item = phases.setdefault(span["name"], {"seconds": 0.0, "bytes": 0})
+            item["seconds"] = round(item["seconds"] + span["duration"], 4)
+            item["bytes"] += span.get("bytes", 0)
+            if span.get("retries"):
+                item["retries"] = item.get("retries", 0) + span["retries"]
+            if span.get("store_hit"):
+                item["store_hit"] = True
+    download = phases.get("download", {})
+    result = {
+        "seconds": round(total, 4),
+        "phases": phases,
+        "download_mib_per_s": round(download["bytes"] / 1048576 / download["seconds"], 2)
+        if download.get("seconds") and not download.get("store_hit") else None,
+        "installed": manager.metrics.labels.get("installed"),
+        "peak_rss_mib": _peak_rss_mib("self"),
+        "children_peak_rss_mib": _peak_rss_mib("children"),
+    }
+    if args.child == "staged_locked":
+        manifest = manager._load_install_manifest(live_dir).get("files", {})
+        with manager.span("update"):
+            manager.check_and_update(reinstall=True)  # UA: наступний delta-запуск не видаляє README.md
+        result["manifest_clean"] = "README.md" not in manifest and m.INSTALL_MANIFEST not in manifest
+        result["readme_kept"] = os.path.isfile(os.path.join(live_dir, "README.md"))
+        result["verify_ok"] = manager.verify_install(deep=True)["ok"]
+    if adopted:
+        result["manifest_adopted"] = adopted in m.SevenZipManager._load_install_manifest(live_dir).get("files", {})
+    if args.child == "store_corrupt":
+        result["store_intact"] = all(
+            m._file_sha256(os.path.join(store_dir, name)) == name[:-len(".7z")]
+            for name in os.listdir(store_dir) if name.endswith(".7z")
+        )
+    print(json.dumps(result))
+
+
+def _run_scenario(name: str, base_url: str, workdir: str, segments: int) -> dict:
+    """UA: Запуск сценарію в окремому процесі."""
+    cmd = [sys.executable, os.path.join(BENCH_DIR, "bench_e2e.py"), "--child", name,
+           "--base-url", base_url, "--workdir", workdir, "--segments", str(segments)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=BENCH_DIR)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1:] or ["exit %d" % proc.returncode]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _fresh_capsule(base: str, name: str) -> str:
+    """UA: Капсула з встановленим фейковим 7-Zip 25.01."""
+    root = os.path.join(base, name)
+    install_fake_7za(os.path.join(root, "apps", "7zip"), "25.01")
+    return root
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mib", type=float, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth-kib", type=int, default=0, help="ліміт на одне з'єднання (0 — без ліміту)")
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--version", default="26.00")
+    parser.add_argument("--output", help="дописати звіт рядком JSON (історія запусків)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+    if os.name == "nt":
+        sys.exit("bench_e2e.py потребує POSIX (фейковий 7za.exe — скрипт із shebang); використайте WSL.")
+
+    size = int(args.size_mib * 1048576)
+    files = release_site(args.version, size)
+    report = {
+        "schema": SCHEMA,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "manager_version": load_manager().__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"size_mib": args.size_mib, "latency_s": args.latency,
+                   "bandwidth_kib": args.bandwidth_kib, "segments": args.segments, "version": args.version},
+        "scenarios": {},
+    }
+    checks = {}
+    with tempfile.TemporaryDirectory(prefix="7zip_bench_e2e_") as base:
+        server = StandinServer(files, latency=args.latency, bandwidth=args.bandwidth_kib * 1024)
+        base_url = server.start()
+        try:
+            root = _fresh_capsule(base, "capsule")
+            for name in ("update", "up_to_date", "reinstall", "store_corrupt"):
+                before = dict(server.status_counts)
+                result = _run_scenario(name, base_url, root, args.segments)
+                result["http_304"] = server.status_counts.get(304, 0) - before.get(304, 0)
+                report["scenarios"][name] = result
+        finally:
+            server.stop()
+
+        server = StandinServer(files, latency=args.latency, bandwidth=args.bandwidth_kib * 1024,
+                               drops=2, drop_after=size // 8)
+        base_url = server.start()
+        try:
+            result = _run_scenario("drops", base_url, _fresh_capsule(base, "capsule_drops"), args.segments)
+            result["overhead"] = round(server.bytes_sent / len(files[f"/a/7z{args.version.replace('.', '')}-extra.7z"]), 3)
+            report["scenarios"]["drops"] = result
+        finally:
+            server.stop()
+
+        server = StandinServer(files, latency=args.latency, bandwidth=args.bandwidth_kib * 1024)
+        base_url = server.start()
+        try:
+            root = _fresh_capsule(base, "capsule_locked")
+            report["scenarios"]["staged_locked"] = _run_scenario("staged_locked", base_url, root, args.segments)
+        finally:
+            server.stop()
+
+    s = report["scenarios"]
+    checks["update_installed"] = s["update"].get("installed") == args.version
+    checks["up_to_date_304"] = s["up_to_date"].get("http_304", 0) >= 1 and "download" not in s["up_to_date"].get("phases", {})
+    checks["reinstall_from_store"] = s["reinstall"].get("phases", {}).get("download", {}).get("store_hit", False)
+    checks["reinstall_manifest_adopted"] = bool(s["reinstall"].get("manifest_adopted"))
+    corrupt = s["store_corrupt"]
+    checks["store_corrupt_refetched"] = bool(
+        corrupt.get("installed") == args.version and corrupt.get("store_intact")
+        and corrupt.get("phases", {}).get("download", {}).get("bytes", 0) > 0
+        and not corrupt.get("phases", {}).get("download", {}).get("store_hit")
+    )
+    checks["drops_recovered"] = s["drops"].get("installed") == args.version
+    locked = s["staged_locked"]
+    checks["staged_locked_fallback"] = bool(
+        locked.get("installed") == args.version and locked.get("manifest_clean")
+        and locked.get("readme_kept") and locked.get("verify_ok")
+    )
+    report["checks"] = checks
+    report["ok"] = all(checks.values())
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: import time of 7zip_manager.py (must stay side-effect-free and fast).
+UA: Вимірює час імпорту модуля у свіжому інтерпретаторі (python -X importtime):
+    - медіана часу exec модуля (мс) проти бюджету --budget-ms
+    - найдорожчі вкладені імпорти (з -X importtime)
+    - відсутність важких залежностей (requests, bs4, packaging) після імпорту
+    - відсутність побічних ефектів (нові файли/папки, logging handlers)
+Код виходу 1 — бюджет перевищено або імпорт має побічні ефекти.
+
+Запуск:
+    python bench/bench_import.py [--runs 7] [--budget-ms 50]
+Вивід — JSON у stdout.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import MANAGER_PATH
+
+_PROBE = r"""
+import importlib.util, json, logging, os, sys, time
+capsule_root = os.path.abspath(os.path.join(os.path.dirname(sys.argv[1]), "..", ".."))
+watched = (os.getcwd(), capsule_root)
+before = {d: set(os.listdir(d)) for d in watched}
+sys.stderr.write("--probe--\n")
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("sevenzip_manager", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = (time.perf_counter() - t0) * 1000
+print(json.dumps({
+    "exec_ms": elapsed,
+    "heavy_loaded": sorted(m for m in ("requests", "bs4", "packaging") if m in sys.modules),
+    "new_files": sorted(f for d in watched for f in set(os.listdir(d)) - before[d]),
+    "log_handlers": len(logging.getLogger("7zip").handlers) + len(logging.getLogger().handlers),
+}))
+"""
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$")
+
+
+def _run_once(workdir: str) -> dict:
+    """Import the manager in a fresh interpreter. UA: Один імпорт у новому процесі."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, MANAGER_PATH],
+        capture_output=True, text=True, cwd=workdir, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    nested = []
+    # UA: Лише імпорти, які запускає сам модуль (після маркера, без старту інтерпретатора)
+    probe_lines = proc.stderr.split("--probe--", 1)[-1]
+    for line in probe_lines.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            nested.append((m.group(3).strip(), int(m.group(2))))
+    result["nested"] = nested
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [_run_once(workdir) for _ in range(args.runs)]
+
+    exec_ms = [r["exec_ms"] for r in runs]
+    last = runs[-1]["nested"]
+    top = sorted(last, key=lambda x: x[1], reverse=True)[:10]
+    report = {
+        "runs": args.runs,
+        "budget_ms": args.budget_ms,
+        "median_ms": round(statistics.median(exec_ms), 2),
+        "max_ms": round(max(exec_ms), 2),
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "side_effect_files": runs[-1]["new_files"],
+        "log_handlers": runs[-1]["log_handlers"],
+        "top_imports_us": [{"module": name, "cumulative_us": us} for name, us in top],
+    }
+    report["ok"] = (
+        report["median_ms"] <= args.budget_ms
+        and not report["heavy_loaded"]
+        and not report["side_effect_files"]
+        and not report["log_handlers"]
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
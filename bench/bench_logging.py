@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: per-call overhead of SevenZipManager.log() — synchronous vs queued sinks.
+UA: Вартість одного виклику log()/event() для потоку, що логує (console=False):
+    - sync:        FileHandler з flush() на кожен запис (поведінка до v2.9.0)
+    - async:       QueueHandler → QueueListener → пакетний flush
+    - async+jsonl: те саме + JSON-lines синк подій
+    - console-sync / console-async: console=True, LOG_CONSOLE=sync|async (stdout підмінено лічильником)
+    --slow-ms імітує повільний диск (мережева папка): затримка у кожному flush().
+    --console-ms — затримка flush() stdout (консоль Windows / SSH ~0.1–1 мс на рядок).
+    Після shutdown_logging() перевіряється, що всі записи дійшли до файлів і в консоль.
+    exit_drain — окремий процес завершується через AutoCloseTimer (os._exit, atexit не спрацьовує):
+    on_exit=shutdown_logging має злити чергу, тож у файлах ті самі N записів.
+
+Запуск:
+    python bench/bench_logging.py [--calls 20000] [--slow-ms 0] [--console-ms 0.2]
+Вивід — JSON у stdout.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import load_manager
+
+CONFIGS = {
+    "sync":        {"LOG_FILE": "sync"},
+    "async":       {"LOG_FILE": "async"},
+    "async+jsonl": {"LOG_FILE": "async", "LOG_JSONL": "on"},
+    "console-sync":  {"LOG_FILE": "async", "LOG_CONSOLE": "sync"},
+    "console-async": {"LOG_FILE": "async", "LOG_CONSOLE": "async"},
+}
+
+
+class _SlowConsole:
+    """UA: Підміна stdout: рахує рядки, flush() коштує console_ms (як повільний термінал)."""
+
+    def __init__(self, console_ms: float):
+        self.delay = console_ms / 1000
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        self.lines += text.count("\n")
+        return len(text)
+
+    def flush(self) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _count_lines(path) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def _run(m, env: dict, calls: int, batch: int = 100, console_ms: float = 0.0) -> dict:
+    """Per-call latency of log() (+ event() with JSONL) and drain time. UA: Один прогін конфігурації."""
+    with_console = "LOG_CONSOLE" in env
+    stdout, console = sys.stdout, _SlowConsole(console_ms)
+    with tempfile.TemporaryDirectory(prefix="7zip_bench_log_") as log_dir:
+        manager = m.SevenZipManager(log_dir=log_dir, env=dict(env), console=with_console)
+        log_path = manager.setup_logging()
+        if with_console:
+            sys.stdout = console
+        with_events = manager.events_path is not None
+        per_call = []
+        for i in range(0, calls, batch):
+            t0 = time.perf_counter()
+            for j in range(i, i + batch):
+                manager.log(f"   ⬇️  chunk {j}: 65536 bytes")
+                if with_events:
+                    manager.event("chunk", phase="download", nbytes=65536, index=j)
+            per_call.append((time.perf_counter() - t0) / batch * 1e6)
+        t0 = time.perf_counter()
+        try:
+            manager.shutdown_logging()
+        finally:
+            sys.stdout = stdout
+        drain_ms = (time.perf_counter() - t0) * 1000
+        return {
+            "median_us_per_call": round(statistics.median(per_call), 2),
+            "p95_us_per_call": round(sorted(per_call)[int(len(per_call) * 0.95) - 1], 2),
+            "drain_ms": round(drain_ms, 1),
+            "complete": _count_lines(log_path) == calls
+            and (not with_events or _count_lines(manager.events_path) == calls)
+            and (not with_console or console.lines == calls),
+        }
+
+
+def _exit_child(log_dir: str, calls: int) -> None:
+    """UA: Дочірній процес exit_drain: записи в чергу, далі os._exit з AutoCloseTimer."""
+    m = load_manager()
+    env = {"LOG_FILE": "async", "LOG_JSONL": "on", "LOG_FLUSH_EVERY": str(calls * 10)}  # UA: без проміжних flush
+    manager = m.SevenZipManager(log_dir=log_dir, env=env, console=False)
+    manager.setup_logging()
+    for j in range(calls):
+        manager.log(f"   ⬇️  chunk {j}: 65536 bytes")
+        manager.event("chunk", phase="download", nbytes=65536, index=j)
+    m.AutoCloseTimer(0.2, on_exit=manager.shutdown_logging).start()
+    time.sleep(30)  # UA: таймер завершить процес раніше (os._exit(0))
+    raise SystemExit(3)
+
+
+def _exit_drain(calls: int) -> dict:
+    """UA: Чи доходять усі записи до файлів, коли процес закриває AutoCloseTimer (os._exit)."""
+    with tempfile.TemporaryDirectory(prefix="7zip_bench_log_exit_") as log_dir:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--exit-child", log_dir,
+                               "--calls", str(calls)], capture_output=True, text=True, timeout=60)
+        names = os.listdir(log_dir)
+        lines = {
+            kind: sum(_count_lines(os.path.join(log_dir, n)) for n in names if n.startswith(prefix))
+            for kind, prefix in (("log", "7zip_log_"), ("events", "7zip_events_"))
+        }
+    return {"exit_code": proc.returncode, **lines,
+            "complete": proc.returncode == 0 and lines["log"] == calls and lines["events"] == calls}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="затримка кожного flush() (імітація мережевої папки)")
+    parser.add_argument("--console-ms", type=float, default=0.2, help="затримка flush() stdout (повільний термінал)")
+    parser.add_argument("--exit-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.exit_child:
+        _exit_child(args.exit_child, args.calls)
+
+    m = load_manager()
+    if args.slow_ms:
+        flush = m._BatchFileHandler.flush
+
+        def slow_flush(self):
+            time.sleep(args.slow_ms / 1000)
+            flush(self)
+        m._BatchFileHandler.flush = slow_flush
+
+    results = {name: _run(m, env, args.calls, console_ms=args.console_ms) for name, env in CONFIGS.items()}
+    report = {
+        "calls": args.calls,
+        "slow_ms": args.slow_ms,
+        "console_ms": args.console_ms,
+        "results": results,
+        "speedup_async": round(results["sync"]["median_us_per_call"] / max(results["async"]["median_us_per_call"], 1e-9), 1),
+        "speedup_console_async": round(results["console-sync"]["median_us_per_call"]
+                                       / max(results["console-async"]["median_us_per_call"], 1e-9), 1),
+        "exit_drain": _exit_drain(min(args.calls, 5000)),
+    }
+    report["ok"] = all(r["complete"] for r in results.values()) and report["exit_drain"]["complete"]
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: streaming release-page scanner vs full BeautifulSoup parse.
+UA: Порівняння _scan_release_stream() і _parse_release_page() на фікстурі download.html:
+    - однаковість результатів (включно з fallback URL і різними розмірами chunk-ів)
+    - латентність (медіана, мс) і піковий обсяг пам'яті (tracemalloc, KiB)
+
+Запуск:
+    python bench/bench_release_page.py [--iterations 200] [--fixture download.html]
+Вивід — JSON у stdout.
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+import tracemalloc
+
+from common import chunked, load_manager, read_fixture
+
+
+def _measure(fn, iterations: int) -> dict:
+    """Median latency and peak traced memory of fn(). UA: Медіана часу + пік пам'яті."""
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(sorted(timings)[int(len(timings) * 0.95) - 1], 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--fixture", default="download.html")
+    args = parser.parse_args()
+
+    m = load_manager()
+    manager = m.SevenZipManager(env={}, console=False)
+    data = read_fixture(args.fixture)
+    chunk = m.RELEASE_SCAN_CHUNK
+
+    def bs4_path(page: bytes = data):
+        return manager._resolve_release(*m._parse_release_page(page.decode("utf-8")))
+
+    def stream_path(page: bytes = data, size: int = chunk):
+        return manager._resolve_release(*m._scan_release_stream(chunked(page, size), "utf-8"))
+
+    # UA: Перевірка еквівалентності: різні межі chunk-ів і сторінка без Extra посилання (fallback)
+    no_extra = re.sub(rb'<A href="a/7z\d+-extra\.7z">', b'<A href="a/none.7z">', data)
+    equivalence = {
+        "default": stream_path() == bs4_path(),
+        "chunk_1": stream_path(size=1) == bs4_path(),
+        "chunk_7": stream_path(size=7) == bs4_path(),
+        "fallback_url": stream_path(no_extra) == bs4_path(no_extra),
+    }
+
+    report = {
+        "fixture": args.fixture,
+        "fixture_bytes": len(data),
+        "iterations": args.iterations,
+        "result": list(stream_path()),
+        "equivalent": equivalence,
+        "bs4": _measure(bs4_path, args.iterations),
+        "stream": _measure(stream_path, args.iterations),
+    }
+    report["speedup"] = round(report["bs4"]["median_ms"] / max(report["stream"]["median_ms"], 1e-6), 1)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
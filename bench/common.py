@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the offline benchmarks.
+UA: Спільні утиліти бенчмарків: завантаження 7zip_manager.py як модуля
+    (ім'я файлу починається з цифри — звичайний import неможливий) і фікстури.
+"""
+import importlib.util
+import os
+import sys
+
+BENCH_DIR    = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR     = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+MANAGER_PATH = os.path.join(REPO_DIR, "7zip_manager.py")
+
+
+def load_manager(name: str = "sevenzip_manager"):
+    """Import 7zip_manager.py under a valid module name. UA: Імпорт менеджера як модуля."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, MANAGER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def read_fixture(name: str) -> bytes:
+    """Read fixture file as bytes. UA: Читає фікстуру з bench/fixtures/."""
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def chunked(data: bytes, size: int):
+    """Yield data in fixed-size chunks (like iter_content). UA: Ділить байти на chunk-и."""
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Fake 7za for the offline benchmarks (no real 7-Zip needed).
+UA: Імітація 7za.exe для бенчмарків:
+    - без аргументів — банер "7-Zip (a) <версія> (x86) : Copyright ..." (як справжній 7za)
+    - `x <archive> -o<dir> -y -bsp1 [-x!...] [members...]` — «розпаковує» синтетичний архів
+      (standin_server.synthetic_archive): дерево Extra пакету (x86 у корені, x64/, arm64/,
+      Far/, txt-файли), байти архіву розподілені між файлами; фільтри -x! і перелік членів як у 7za;
+      прогрес — як у 7za -bsp1: кадри " NN% N - файл", що перемальовуються backspace-ами (без "\n").
+    - `a <archive> <files/dirs...>` — синтетичний архів із вмістом файлів (для --batch);
+      `t <archive>` — перевірка заголовка (код 2 — не архів). Ключі -m*/-t*/-y ігноруються.
+    Встановлений 7za.exe у дереві — копія цього скрипта з версією з архіву, тож
+    наступний запуск менеджера бачить нову версію.
+
+install_fake_7za(dir, version) — кладе 7za.exe (shebang на поточний Python) у dir.
+Лише POSIX: Windows не запускає скрипти як .exe (для e2e-бенчмарку — WSL).
+"""
+import os
+import stat
+import sys
+
+VERSION = "25.01"
+MAGIC = b"FAKE7Z\0"
+
+# UA: Структура 7-Zip Extra (відносні шляхи; вага — частка байтів архіву)
+TREE = (
+    ("7za.exe", 3), ("7za.dll", 2), ("7zxa.dll", 1),
+    ("x64/7za.exe", 4), ("x64/7za.dll", 3), ("x64/7zxa.dll", 1),
+    ("arm64/7za.exe", 4), ("arm64/7za.dll", 3), ("arm64/7zxa.dll", 1),
+    ("Far/7-ZipEng.hlf", 1), ("Far/7-ZipFar.dll", 2), ("Far/7-ZipFar64.dll", 2),
+    ("history.txt", 1), ("License.txt", 1), ("readme.txt", 1),
+)
+
+
+def install_fake_7za(target_dir: str, version: str = VERSION) -> str:
+    """Write an executable fake 7za.exe reporting `version`. UA: Встановлює фейковий 7za.exe."""
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, "7za.exe")
+    with open(__file__, encoding="utf-8") as f:
+        source = f.read()
+    if source.startswith("#!"):
+        source = source.split("\n", 1)[1]  # UA: копія з уже встановленого 7za.exe
+    source = source.replace(f'VERSION = "{VERSION}"', f'VERSION = "{version}"', 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"#!{sys.executable}\n" + source)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _excluded(rel: str, patterns: list) -> bool:
+    """UA: -x!name — файл/папка в корені архіву; -x!dir\\* — вміст папки."""
+    top = rel.split("/", 1)[0]
+    for pattern in patterns:
+        pattern = pattern.replace("\\", "/")
+        if pattern.endswith("/*"):
+            pattern = pattern[:-2]
+        if rel == pattern or top == pattern:
+            return True
+    return False
+
+
+def extract(archive: str, out_dir: str, excludes: list, members: tuple = ()) -> int:
+    """UA: «Розпакування» синтетичного архіву у out_dir. Код виходу як у 7za (2 — помилка)."""
+    with open(archive, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        sys.stdout.write("ERROR: Can not open the file as archive\n")
+        return 2
+    header_end = data.index(b"\n")
+    version = data[len(MAGIC):header_end].decode("ascii")
+    body = memoryview(data)[header_end + 1:]
+
+    weights = sum(w for _, w in TREE)
+    offset, last_pct, frame = 0, -1, ""
+    for rel, weight in TREE:
+        size = len(body) * weight // weights
+        chunk = body[offset:offset + size]
+        offset += size
+        if _excluded(rel, excludes) or (members and rel not in members):
+            continue
+        dst = os.path.join(out_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if rel == "7za.exe" or rel.endswith("/7za.exe"):
+            install_fake_7za(os.path.dirname(dst), version)
+        else:
+            with open(dst, "wb") as f:
+                f.write(chunk)
+        pct = offset * 100 // max(len(body), 1)
+        if pct != last_pct:
+            frame = _progress(frame, pct, rel)
+            last_pct = pct
+    sys.stdout.write("\b" * len(frame) + "Everything is Ok\n")
+    return 0
+
+
+def _progress(frame: str, pct: int, name: str) -> str:
+    """UA: Кадр прогресу -bsp1: стерти попередній backspace-ами, вивести новий."""
+    sys.stdout.write("\b" * len(frame) + " " * len(frame) + "\b" * len(frame))
+    frame = f"{pct:3d}% {name}"
+    sys.stdout.write(frame)
+    sys.stdout.flush()
+    return frame
+
+
+def compress(archive: str, sources: list) -> int:
+    """UA: «Стискання»: MAGIC + версія + байти файлів (обхід папок), прогрес по файлах."""
+    paths = []
+    for src in sources:
+        if os.path.isdir(src):
+            for root, _dirs, files in os.walk(src):
+                paths += [os.path.join(root, name) for name in sorted(files)]
+        elif os.path.isfile(src):
+            paths.append(src)
+        else:
+            sys.stdout.write(f"WARNING: The system cannot find the file specified.\n{src}\n")
+            return 1
+    total = sum(os.path.getsize(p) for p in paths) or 1
+    done, frame = 0, ""
+    with open(archive, "wb") as out:
+        out.write(MAGIC + VERSION.encode("ascii") + b"\n")
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            out.write(data)
+            done += len(data)
+            frame = _progress(frame, done * 100 // total, os.path.basename(path))
+    sys.stdout.write("\b" * len(frame) + "Everything is Ok\n")
+    return 0
+
+
+def test(archive: str) -> int:
+    """UA: «Перевірка»: заголовок синтетичного архіву."""
+    try:
+        with open(archive, "rb") as f:
+            ok = f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        sys.stdout.write(f"ERROR: The system cannot find the file specified.\n{archive}\n")
+        return 2
+    if not ok:
+        sys.stdout.write("ERROR: Can not open the file as archive\n")
+        return 2
+    frame = _progress("", 100, os.path.basename(archive))
+    sys.stdout.write("\b" * len(frame) + "Everything is Ok\n")
+    return 0
+
+
+def main(argv: list) -> int:
+    if not argv:
+        sys.stdout.write(f"\n7-Zip (a) {VERSION} (x86) : Copyright (c) 1999-2026 Igor Pavlov : 2026-02-12\n")
+        return 0
+    if argv[0] not in ("x", "a", "t") or len(argv) < 2:
+        sys.stdout.write("ERROR: unsupported command\n")
+        return 7
+    if argv[0] == "a":
+        return compress(argv[1], [a for a in argv[2:] if not a.startswith("-")])
+    if argv[0] == "t":
+        return test(argv[1])
+    out_dir = next((a[2:] for a in argv if a.startswith("-o")), ".")
+    excludes = [a[3:] for a in argv if a.startswith("-x!")]
+    members = tuple(a.replace("\\", "/") for a in argv[2:] if not a.startswith("-"))
+    return extract(argv[1], out_dir, excludes, members)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
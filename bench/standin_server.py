@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for 7-zip.org used by the offline benchmarks.
+UA: Локальний HTTP-сервер замість 7-zip.org для бенчмарків:
+    - роздає файли з пам'яті (ETag, Last-Modified, Accept-Ranges, 206 Partial Content)
+    - latency — затримка перед першим байтом кожної відповіді (сек)
+    - bandwidth — ліміт швидкості на одне з'єднання (байт/с, 0 — без ліміту)
+    - ranges=False — сервер ігнорує Range і завжди віддає 200 (перевірка fallback-у)
+    - drops/drop_after — перші `drops` GET-відповідей обриваються після `drop_after` байт тіла
+      (перевірка докачки .part)
+    - not_modified=True — будь-який conditional GET (If-None-Match / If-Modified-Since) отримує 304,
+      навіть якщо валідатор не збігається (ін'єкція 304)
+
+release_site(version, size) — download.html (фікстура з підміненою версією) + синтетичний
+7zNNNN-extra.7z, який «розпаковує» bench/fake_7za.py.
+
+Використання з коду:
+    server = StandinServer({"/a/7z2600-extra.7z": payload}, latency=0.05, bandwidth=2_000_000)
+    base_url = server.start()      # http://127.0.0.1:PORT/
+    ...
+    server.stop()
+"""
+import argparse
+import email.utils
+import hashlib
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class StandinServer:
+    """In-memory HTTP file server with latency/bandwidth shaping.
+    UA: HTTP-сервер з файлами в пам'яті та емуляцією затримки/пропускної здатності."""
+
+    def __init__(self, files: dict, latency: float = 0.0, bandwidth: int = 0,
+                 ranges: bool = True, drops: int = 0, drop_after: int = 0,
+                 not_modified: bool = False, host: str = "127.0.0.1", port: int = 0):
+        self.files = dict(files)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.drops = drops
+        self.drop_after = drop_after
+        self.not_modified = not_modified
+        self.status_counts: dict = {}  # UA: {код статусу: кількість} — напр. скільки було 304
+        self.bytes_sent = 0
+        self.requests: list = []  # UA: журнал (method, path, range) — для перевірок у бенчмарках
+        self._lock = threading.Lock()
+        self._mtime = email.utils.formatdate(time.time(), usegmt=True)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._httpd.handle_error = lambda request, client_address: None  # UA: обриви клієнтів — норма
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> str:
+        """Serve in a background thread. UA: Запуск у фоновому потоці, повертає base_url."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def etag(self, path: str) -> str:
+        return '"' + hashlib.sha256(self.files[path]).hexdigest()[:16] + '"'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):  # UA: тиша в консолі
+                pass
+
+            def send_response(self, code, message=None):
+                with server._lock:
+                    server.status_counts[code] = server.status_counts.get(code, 0) + 1
+                super().send_response(code, message)
+
+            def do_HEAD(self):
+                self._serve(head=True)
+
+            def do_GET(self):
+                self._serve(head=False)
+
+            def _serve(self, head: bool) -> None:
+                path = self.path.split("?", 1)[0]
+                server.requests.append((self.command, path, self.headers.get("Range")))
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.files.get(path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                etag = server.etag(path)
+                conditional = self.headers.get("If-None-Match") or self.headers.get("If-Modified-Since")
+                if self.headers.get("If-None-Match") == etag or (server.not_modified and conditional):
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                start, end, status = 0, len(body) - 1, 200
+                m = _RANGE_RE.match(self.headers.get("Range", ""))
+                if server.ranges and m and (m.group(1) or m.group(2)):
+                    if m.group(1):
+                        start = int(m.group(1))
+                        end = min(int(m.group(2)), end) if m.group(2) else end
+                    else:
+                        start = max(0, len(body) - int(m.group(2)))
+                    if start > end:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(body)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html" if path.endswith(".html") else "application/octet-stream")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", server._mtime)
+                if server.ranges:
+                    self.send_header("Accept-Ranges", "bytes")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+                self.end_headers()
+                if not head:
+                    data = memoryview(body)[start:end + 1]
+                    with server._lock:
+                        drop = server.drops > 0
+                        server.drops -= int(drop)
+                    if drop:
+                        self._write_throttled(data[:server.drop_after])
+                        self.close_connection = True
+                        self.connection.shutdown(2)  # UA: обрив посеред тіла відповіді
+                        return
+                    self._write_throttled(data)
+
+            def _write_throttled(self, data: memoryview) -> None:
+                """UA: Відправка з лімітом bandwidth байт/с на з'єднання."""
+                step = 16384
+                t0 = time.perf_counter()
+                for i in range(0, len(data), step):
+                    try:
+                        self.wfile.write(data[i:i + step])
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    with server._lock:
+                        server.bytes_sent += len(data[i:i + step])
+                    if server.bandwidth:
+                        ahead = (i + step) / server.bandwidth - (time.perf_counter() - t0)
+                        if ahead > 0:
+                            time.sleep(ahead)
+
+        return Handler
+
+
+def synthetic_payload(size: int, seed: int = 7) -> bytes:
+    """Deterministic incompressible bytes. UA: Детерміновані псевдовипадкові байти заданого розміру."""
+    out = bytearray()
+    block = hashlib.sha256(str(seed).encode()).digest()
+    while len(out) < size:
+        block = hashlib.sha256(block).digest()
+        out += block * 64
+    return bytes(out[:size])
+
+
+def synthetic_archive(version: str, size: int, seed: int = 7) -> bytes:
+    """Synthetic Extra archive understood by fake_7za. UA: Заголовок з версією + псевдовипадкові байти."""
+    from fake_7za import MAGIC
+    return MAGIC + version.encode("ascii") + b"\n" + synthetic_payload(size, seed)
+
+
+def release_site(version: str = "26.00", size: int = 2 * 1024 * 1024, seed: int = 7) -> dict:
+    """
+    download.html + archive for `version`. UA: Фікстура download.html з підміненою останньою
+    версією та посиланням a/7zNNNN-extra.7z → файли для StandinServer.
+    """
+    from common import read_fixture
+    nodot = version.replace(".", "")
+    page = read_fixture("download.html")
+    page = page.replace(b"Download 7-Zip 26.00", f"Download 7-Zip {version}".encode(), 1)
+    page = page.replace(b"a/7z2600-extra.7z", f"a/7z{nodot}-extra.7z".encode(), 1)
+    return {
+        "/download.html": page,
+        f"/a/7z{nodot}-extra.7z": synthetic_archive(version, size, seed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8919)
+    parser.add_argument("--size", type=int, default=2 * 1024 * 1024, help="розмір синтетичного архіву, байт")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=int, default=0)
+    parser.add_argument("--no-ranges", action="store_true")
+    parser.add_argument("--version", default="26.00", help="остання версія на download.html")
+    parser.add_argument("--drops", type=int, default=0)
+    parser.add_argument("--not-modified", action="store_true")
+    args = parser.parse_args()
+
+    files = release_site(args.version, args.size)
+    server = StandinServer(files, latency=args.latency, bandwidth=args.bandwidth,
+                           ranges=not args.no_ranges, drops=args.drops, drop_after=args.size // 4,
+                           not_modified=args.not_modified, port=args.port)
+    print(f"Serving {list(files)} on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()